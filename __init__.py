@@ -1,4 +1,37 @@
-from .request import Request, PersonalRequest, EthConnectionError
-from . import hextools
+from .request import (
+    Request, PersonalRequest, EthConnectionError, EthTimeoutError, EthError,
+    EthParseError, EthInvalidRequest, EthMethodNotFound, EthInvalidParams,
+    EthInternalError, EthServerError, EthExecutionError
+    )
+from .fanout import CurlFanout, PipelineFanout
+from .transport import Transport, HTTPTransport, IPCTransport, CallableTransport
+from .checkpoint import Checkpoint
+from .scanner import LogScanner
+from .filters import FilterManager
+from .cache import RequestCache, Coalescer
+from .multinode import MultiRequest, MultiPersonalRequest
+from .metrics import Metrics
+from .objects import Block, Transaction, Receipt, Log
+from .submit import NonceManager, TransactionPipeline, TransactionStatus
+from .receipts import ReceiptWaiter
+from .multicall import Multicall
+from .events import Event, EventLog, EventRegistry
+from . import hextools, abi
 
-__all__ = [Request, PersonalRequest, EthConnectionError, hextools]
+__all__ = [
+    Request, PersonalRequest, EthConnectionError, EthTimeoutError, EthError,
+    EthParseError, EthInvalidRequest, EthMethodNotFound, EthInvalidParams,
+    EthInternalError, EthServerError, EthExecutionError, CurlFanout,
+    PipelineFanout, Transport, HTTPTransport, IPCTransport, CallableTransport,
+    Checkpoint, LogScanner, FilterManager, RequestCache, Coalescer,
+    MultiRequest, MultiPersonalRequest, Metrics, Block, Transaction, Receipt,
+    Log, NonceManager, TransactionPipeline, TransactionStatus, ReceiptWaiter,
+    Multicall, Event, EventLog, EventRegistry, hextools, abi
+    ]
+
+try:
+    from .asyncrequest import AsyncRequest, AsyncPersonalRequest
+    __all__ += [AsyncRequest, AsyncPersonalRequest]
+except SyntaxError:
+    # Python 2 has no asyncio
+    pass
@@ -0,0 +1,608 @@
+# -*- coding: utf8 -*-
+"""Compiled ABI codecs. Signatures and types are parsed once into encoders
+that write words straight into preallocated bytearray, see 'Encoder', and
+decoders that read bytes with offsets arithmetic, see 'Decoder'."""
+import re
+from binascii import hexlify, unhexlify
+from .hextools import methodID, _isstring
+
+try:
+    _fromBytes = int.from_bytes
+
+    def _word(value):
+        return value.to_bytes(32, "big")
+except AttributeError:
+    # Python 2
+    def _fromBytes(data, byteorder="big"):
+        return int(hexlify(data), 16) if data else 0
+
+    def _word(value):
+        return unhexlify("%064x" % value)
+
+_signatureRe = re.compile(r"^\s*([A-Za-z_$][\w$]*)?\s*\((.*)\)\s*$")
+_elementaryRe = re.compile(r"^(uint|int|bytes|address|bool|string|byte)(\d*)$")
+
+class ABIType(object):
+    """Parsed Solidity type.
+    Attributes:
+    - kind: String - 'uint', 'int', 'address', 'bool', 'bytes' (bytes1..32),
+    'dbytes' (dynamic bytes), 'string', 'array', 'darray' (dynamic array) or 'tuple'.
+    - size: Number - bits of integers, bytes of bytesN, length of arrays.
+    - item: ABIType - type of array items.
+    - components: List of ABIType - types of tuple items.
+    - dynamic: Boolean - True if the type is encoded in the tail.
+    - words: Number - head size in 32 bytes words of static types.
+    - canonical: String - canonical name of the type, e.g. 'uint256'."""
+    def __init__(self, kind, size=None, item=None, components=None):
+        self.kind = kind
+        self.size = size
+        self.item = item
+        self.components = components
+        if kind == "array":
+            self.dynamic = item.dynamic
+            self.words = item.words * size
+            self.canonical = "%s[%d]" % (item.canonical, size)
+        elif kind == "darray":
+            self.dynamic = True
+            self.words = 1
+            self.canonical = "%s[]" % item.canonical
+        elif kind == "tuple":
+            self.dynamic = any(c.dynamic for c in components)
+            self.words = sum(c.words for c in components)
+            self.canonical = "(%s)" % ",".join(c.canonical for c in components)
+        else:
+            self.dynamic = kind in ("dbytes", "string")
+            self.words = 1
+            if kind in ("uint", "int", "bytes"):
+                self.canonical = "%s%d" % (kind, size)
+            else:
+                self.canonical = "bytes" if kind == "dbytes" else kind
+        if self.dynamic:
+            self.words = 1
+
+    def __repr__(self):
+        return "ABIType(%s)" % self.canonical
+
+def _splitTypes(types):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(types):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and not depth:
+            parts.append(types[start:i])
+            start = i + 1
+    tail = types[start:]
+    if tail.strip() or parts:
+        parts.append(tail)
+    return parts
+
+def parseType(name):
+    """Returns ABIType of the given Solidity type name, e.g. 'uint',
+    'bytes32', 'address[]', 'uint8[3]' or '(address,bool,bytes)[]'."""
+    name = name.strip()
+    if name.endswith("]"):
+        base, _, length = name[:-1].rpartition("[")
+        item = parseType(base)
+        if length.strip():
+            return ABIType("array", int(length), item=item)
+        return ABIType("darray", item=item)
+    if name.startswith("tuple("):
+        name = name[5:]
+    if name.startswith("(") and name.endswith(")"):
+        return ABIType("tuple", components=parseTypes(name[1:-1]))
+    match = _elementaryRe.match(name)
+    if match is None:
+        raise ValueError("Unsupported type %r" % name)
+    kind, size = match.group(1), match.group(2)
+    if kind in ("uint", "int"):
+        size = int(size or 256)
+        if not 8 <= size <= 256 or size % 8:
+            raise ValueError("Unsupported type %r" % name)
+        return ABIType(kind, size)
+    elif kind == "byte" and not size:
+        return ABIType("bytes", 1)
+    elif kind == "bytes":
+        if not size:
+            return ABIType("dbytes")
+        if not 1 <= int(size) <= 32:
+            raise ValueError("Unsupported type %r" % name)
+        return ABIType("bytes", int(size))
+    elif size or kind == "byte":
+        raise ValueError("Unsupported type %r" % name)
+    return ABIType(kind)
+
+def parseTypes(types):
+    """Returns list of ABIType of comma separated Solidity type names."""
+    return [parseType(name) for name in _splitTypes(types)]
+
+def parseSignature(signature):
+    """Returns pair of function name and list of ABIType of the given signature,
+    e.g. 'transfer(address,uint256)'. Name is None if signature is a bare
+    list of types like '(address,uint256)'."""
+    match = _signatureRe.match(signature)
+    if match is None:
+        raise ValueError("Invalid signature %r" % signature)
+    return match.group(1), parseTypes(match.group(2))
+
+def _argumentTypes(types):
+    """Returns pair of function name and list of ABIType of arguments of
+    the signature, e.g. 'f(uint256,string)', or of comma separated types,
+    e.g. 'uint256,string'. Types in parentheses without a name, e.g.
+    '(uint256,string)', are a single tuple argument."""
+    match = _signatureRe.match(types)
+    if match is not None and match.group(1):
+        return match.group(1), parseTypes(match.group(2))
+    return None, parseTypes(types)
+
+def _toBytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if _isstring(value):
+        if value[:2] == "0x":
+            try:
+                return unhexlify(value[2:])
+            except (TypeError, ValueError):
+                pass
+        return value.encode("utf8")
+    raise ValueError("Unsupported bytes value %r" % (value,))
+
+def _toInt(value):
+    if isinstance(value, bool):
+        return int(value)
+    if _isstring(value):
+        return int(value, 0)
+    return value
+
+class _Codec(object):
+    """Encoding function of a single type. 'write(buf, pos, value)' writes
+    the value at pos and returns position after it, 'size(value)' returns
+    number of bytes it writes."""
+    def __init__(self, abitype):
+        self.type = abitype
+        self.dynamic = abitype.dynamic
+        self.head = abitype.words * 32
+        kind = abitype.kind
+        if kind in ("tuple", "array"):
+            if kind == "tuple":
+                components = abitype.components
+            else:
+                components = [abitype.item] * abitype.size
+            self._items = [_Codec(c) for c in components]
+            self.write, self.size = self._writeTuple, self._sizeTuple
+        elif kind == "darray":
+            self._item = _Codec(abitype.item)
+            self.write, self.size = self._writeArray, self._sizeArray
+        elif kind in ("dbytes", "string"):
+            self.write, self.size = self._writeBytes, self._sizeBytes
+        else:
+            self.write, self.size = getattr(self, "_write_" + kind), self._sizeStatic
+
+    def _sizeStatic(self, value):
+        return 32
+
+    def _write_uint(self, buf, pos, value):
+        value = _toInt(value)
+        if not 0 <= value < 1 << self.type.size:
+            raise ValueError("%r is out of %s range" % (value, self.type.canonical))
+        buf[pos:pos+32] = _word(value)
+        return pos + 32
+
+    def _write_int(self, buf, pos, value):
+        value = _toInt(value)
+        bound = 1 << (self.type.size - 1)
+        if not -bound <= value < bound:
+            raise ValueError("%r is out of %s range" % (value, self.type.canonical))
+        buf[pos:pos+32] = _word(value % (1 << 256))
+        return pos + 32
+
+    def _write_bool(self, buf, pos, value):
+        buf[pos+31] = 1 if value else 0
+        return pos + 32
+
+    def _write_address(self, buf, pos, value):
+        if isinstance(value, (bytes, bytearray)) and len(value) == 20:
+            buf[pos+12:pos+32] = value
+        else:
+            value = _toInt(value)
+            if not 0 <= value < 1 << 160:
+                raise ValueError("%r is not an address" % (value,))
+            buf[pos:pos+32] = _word(value)
+        return pos + 32
+
+    def _write_bytes(self, buf, pos, value):
+        data = _toBytes(value)
+        if len(data) > self.type.size:
+            raise ValueError("%r is too long for %s" % (value, self.type.canonical))
+        buf[pos:pos+len(data)] = data
+        return pos + 32
+
+    def _bytesOf(self, value):
+        if self.type.kind == "string" and not isinstance(value, (bytes, bytearray)):
+            return value.encode("utf8")
+        return _toBytes(value)
+
+    def _sizeBytes(self, value):
+        # Size of Hexnumber values is of their bytes, same as written
+        size = len(self._bytesOf(value))
+        return 32 + size + (-size % 32)
+
+    def _writeBytes(self, buf, pos, value):
+        data = self._bytesOf(value)
+        buf[pos:pos+32] = _word(len(data))
+        buf[pos+32:pos+32+len(data)] = data
+        return pos + 32 + len(data) + (-len(data) % 32)
+
+    def _sizeItems(self, codecs, values):
+        size = 0
+        for codec, value in zip(codecs, values):
+            size += codec.size(value) + 32 if codec.dynamic else codec.head
+        return size
+
+    def _writeItems(self, codecs, buf, pos, values):
+        head = pos
+        tail = pos + sum(codec.head for codec in codecs)
+        for codec, value in zip(codecs, values):
+            if codec.dynamic:
+                buf[head:head+32] = _word(tail - pos)
+                tail = codec.write(buf, tail, value)
+                head += 32
+            else:
+                head = codec.write(buf, head, value)
+        return tail
+
+    def _checkLength(self, values, length):
+        if len(values) != length:
+            raise ValueError("%s expects %d values, %d given" % (
+                self.type.canonical, length, len(values)))
+
+    def _sizeTuple(self, values):
+        if not self.dynamic:
+            return self.head
+        return self._sizeItems(self._items, values)
+
+    def _writeTuple(self, buf, pos, values):
+        self._checkLength(values, len(self._items))
+        return self._writeItems(self._items, buf, pos, values)
+
+    def _sizeArray(self, values):
+        return 32 + self._sizeItems([self._item] * len(values), values)
+
+    def _writeArray(self, buf, pos, values):
+        buf[pos:pos+32] = _word(len(values))
+        return self._writeItems([self._item] * len(values), buf, pos + 32, values)
+
+class Encoder(object):
+    """ABI encoder compiled once from the given signature, e.g.:
+        transfer = Encoder("transfer(address,uint256)")
+        data = transfer.encode([to, 10**18])
+        datas = transfer.encodeMany([[to, 1], [to, 2]])
+    Comma separated types without function name, e.g. 'address,uint256',
+    encode arguments without the method ID. Types in parentheses without a
+    name, e.g. '(address,uint256)', are a single tuple argument, the same
+    as for Decoder.
+    Given arguments are not modified.
+    Values:
+    - uintN/intN: Number, or Hexnumber.
+    - address: Hexnumber, Number or 20 bytes.
+    - bool: any value, converted by truth.
+    - bytesN/bytes: bytes, Hexnumber or String encoded to utf8.
+    - string: String or bytes.
+    - arrays and tuples: sequence of item values."""
+    def __init__(self, signature):
+        name, types = _argumentTypes(signature)
+        self.types = types
+        self.signature = "%s(%s)" % (name or "", ",".join(t.canonical for t in types))
+        self.methodID = methodID(self.signature) if name else "0x"
+        self._prefix = unhexlify(self.methodID[2:])
+        self._codec = _Codec(ABIType("tuple", components=types))
+
+    def encodeBytes(self, args):
+        "Returns encoded arguments as bytes prefixed with 4 bytes of methodID."
+        codec = self._codec
+        prefix = len(self._prefix)
+        buf = bytearray(prefix + codec.size(args))
+        buf[:prefix] = self._prefix
+        codec.write(buf, prefix, args)
+        return bytes(buf)
+
+    def encode(self, args):
+        """Returns Hexnumber of methodID with encoded arguments, same as
+        'getData(args, data=methodID)'.
+        Parameters:
+        1. Array - arguments of the signature."""
+        return "0x" + hexlify(self.encodeBytes(args)).decode("ascii")
+
+    def encodeMany(self, rows):
+        """Returns list of Hexnumbers of encoded rows of arguments. Rows of
+        static types are written into single buffer.
+        Parameters:
+        1. Iterable - sequence of arguments arrays."""
+        codec = self._codec
+        if codec.dynamic:
+            return [self.encode(row) for row in rows]
+        rows = list(rows)
+        size = codec.head
+        buf = bytearray(size * len(rows))
+        for i, row in enumerate(rows):
+            codec.write(buf, i * size, row)
+        hexed = hexlify(buf).decode("ascii")
+        prefix = self.methodID
+        width = size * 2
+        return [prefix + hexed[i:i+width] for i in range(0, len(hexed), width)]
+
+def _toView(data):
+    if _isstring(data) and not isinstance(data, bytes):
+        data = unhexlify(data[2:] if data[:2] == "0x" else data)
+    elif isinstance(data, bytes) and data[:2] == b"0x":
+        data = unhexlify(data[2:])
+    return memoryview(data)
+
+def _readUint(view, pos):
+    return _fromBytes(view[pos:pos+32], "big")
+
+def _readOffset(view, pos):
+    if pos + 32 > len(view):
+        raise ValueError("Word at %d is out of data" % pos)
+    offset = _fromBytes(view[pos:pos+32], "big")
+    if offset > len(view):
+        raise ValueError("Offset %d is out of data" % offset)
+    return offset
+
+def _checkHead(view, pos, size):
+    if pos + size > len(view):
+        raise ValueError("%d bytes at %d are out of data" % (size, pos))
+
+def _readerOf(abitype):
+    """Returns function(view, pos) that reads value of the type located at
+    pos, which for dynamic types is position of their tail. Words of
+    elementary types are read unchecked, heads holding them are checked
+    against the data by readers of arrays and tuples, and by callers for
+    the heads of the top level."""
+    kind = abitype.kind
+    if kind == "uint":
+        return _readUint
+    elif kind == "int":
+        sign, full = 1 << 255, 1 << 256
+        def _read(view, pos):
+            value = _fromBytes(view[pos:pos+32], "big")
+            return value - full if value >= sign else value
+    elif kind == "address":
+        def _read(view, pos):
+            return "0x" + hexlify(bytes(view[pos+12:pos+32])).decode("ascii")
+    elif kind == "bool":
+        def _read(view, pos):
+            return _fromBytes(view[pos:pos+32], "big") != 0
+    elif kind == "bytes":
+        size = abitype.size
+        def _read(view, pos):
+            return bytes(view[pos:pos+size])
+    elif kind in ("dbytes", "string"):
+        string = kind == "string"
+        def _read(view, pos):
+            size = _readOffset(view, pos)
+            if pos + 32 + size > len(view):
+                raise ValueError("Length %d is out of data" % size)
+            value = bytes(view[pos+32:pos+32+size])
+            return value.decode("utf8") if string else value
+    elif kind == "darray":
+        item = _readerOf(abitype.item)
+        dynamic, head = abitype.item.dynamic, abitype.item.words * 32
+        def _read(view, pos):
+            length = _readOffset(view, pos)
+            _checkHead(view, pos + 32, length * head)
+            readers = [(item, dynamic, head)] * length
+            return _readItems(readers, view, pos + 32)
+    else:
+        if kind == "array":
+            components = [abitype.item] * abitype.size
+        else:
+            components = abitype.components
+        readers = [(_readerOf(c), c.dynamic, c.words * 32) for c in components]
+        wrap = list if kind == "array" else tuple
+        size = sum(head for read, dynamic, head in readers)
+        def _read(view, pos):
+            _checkHead(view, pos, size)
+            return wrap(_readItems(readers, view, pos))
+    return _read
+
+def _readItems(readers, view, base):
+    values = []
+    pos = base
+    for read, dynamic, head in readers:
+        if dynamic:
+            values.append(read(view, base + _readOffset(view, pos)))
+            pos += 32
+        else:
+            values.append(read(view, pos))
+            pos += head
+    return values
+
+def _legacyFloat(view, base, pos):
+    data = hexlify(bytes(view[pos:pos+32])).decode("ascii")
+    left = "".join(x for x in (data[i:i+2] for i in range(0, 32, 2)) if x != "00")
+    data = ".".join([left, data[32:34]])
+    return "0x" + data.replace("0", "")
+
+class Decoder(object):
+    """ABI decoder compiled once from the given types and reusable for any
+    number of results, e.g.:
+        decoder = Decoder((int, hex, str, str, [int, int, int], str))
+        values = decoder.decode(r.eth_call(data))
+    Types are either:
+    - tuple of types of 'hextools.decodeArgData', decoded with the same
+    results.
+    - String of comma separated Solidity types, e.g. 'uint256,address,string[]',
+    or a signature of them, e.g. 'f(uint256,address,string[])'. Types in
+    parentheses without a name are a single tuple, so a function returning
+    one struct is decoded by '(uint256,string)', the same as by the
+    signature 'f((uint256,string))', and '((uint256,string))' is a tuple
+    nested in a tuple.
+    Solidity integers are decoded to Number, address to Hexnumber, bool to
+    Boolean, bytes and bytesN to bytes, string to String, arrays to lists and
+    tuples to tuples.
+    Data is decoded from bytes with offsets arithmetic, Hexnumber is
+    converted to bytes once."""
+    def __init__(self, types):
+        if _isstring(types):
+            self.types = _argumentTypes(types)[1]
+            self._words = sum(t.words for t in self.types)
+            readers = [(_readerOf(t), t.dynamic, t.words * 32) for t in self.types]
+            self._decode = lambda view: _readItems(readers, view, 0)
+            self._legacy = False
+        else:
+            assert isinstance(types, tuple), "Types must be a sequence of tuple"
+            assert types, "Zero length of types"
+            self.types = types
+            readers, self._words = self._compileLegacy(types)
+            self._decode = lambda view: [read(view, 0, pos) for pos, read in readers]
+            self._legacy = True
+
+    def _compileLegacy(self, types):
+        try:
+            strtypes = (str, unicode)
+        except NameError:
+            strtypes = (str,)
+        readers = []
+        word = 0
+        for tp in types:
+            pos = word * 32
+            if tp is list:
+                raise TypeError("list must be a list of types, not a type of list")
+            elif type(tp) is list:
+                assert tp, "Empty list"
+                items, words = self._compileLegacy(tuple(tp))
+                readers.append((pos, self._legacyList(items, pos)))
+                word += words
+                continue
+            elif tp in (int, float, hex) or tp in strtypes:
+                readers.append((pos, self._legacyReader(tp, tp in strtypes)))
+            else:
+                raise TypeError("%s Unsopported type format" % tp)
+            word += 1
+        return readers, word
+
+    def _legacyList(self, items, start):
+        def _read(view, base, pos):
+            return [read(view, start, start + itempos) for itempos, read in items]
+        return _read
+
+    def _legacyReader(self, tp, string):
+        if tp is int:
+            return lambda view, base, pos: _readUint(view, pos)
+        elif tp is float:
+            return _legacyFloat
+        elif tp is hex:
+            return lambda view, base, pos: "0x" + hexlify(
+                bytes(view[pos:pos+32]).replace(b"\x00", b"")).decode("ascii")
+        def _read(view, base, pos):
+            word = bytes(view[pos:pos+32])
+            if word[:1] != b"\x00":
+                return word.replace(b"\x00", b"")
+            start = base + _readOffset(view, pos)
+            size = _readOffset(view, start)
+            _checkHead(view, start + 32, size)
+            return bytes(view[start+32:start+32+size])
+        return _read
+
+    def decode(self, data):
+        """Returns list of decoded values.
+        Parameters:
+        1. Hexnumber|bytes - result that contract returns."""
+        view = _toView(data)
+        if self._legacy:
+            if not len(view):
+                return [hex(0)]
+            if len(view) % 32:
+                raise ValueError("Unknown length of data")
+        if len(view) < self._words * 32:
+            raise ValueError("Data is shorter than types require")
+        return self._decode(view)
+
+    def decodeMany(self, datas):
+        """Returns list of decoded values of every given result.
+        Parameters:
+        1. Iterable - results that contract returns."""
+        return [self.decode(data) for data in datas]
+
+def decodeColumns(datas, types, bigint="limbs"):
+    """Returns list of NumPy arrays, one column per type, of many results of
+    the same static layout, e.g. results of one view function polled across
+    contracts or blocks. Requires NumPy.
+    Hexnumbers are converted to bytes in a single pass and columns are read
+    as strided views of the resulting matrix:
+    - uint8..uint64, int8..int64: native integer dtypes.
+    - wider integers: (N, 4) array of uint64 limbs, most significant first,
+    or object array of Numbers if 'bigint' is 'object'.
+    - address: 'S20' dtype, bytesN: 'SN' dtype, bool: bool dtype. NumPy
+    strips trailing zero bytes of 'S' items on access, use 'tobytes' of the
+    column or view it as 'V20' to get exact values.
+    - fixed arrays of the above: column with additional dimension.
+    Parameters:
+    1. Sequence - Hexnumbers or bytes of equal length.
+    2. String - comma separated static Solidity types, e.g. 'uint8,address,uint256'.
+    3. String - (optional) 'limbs' or 'object', format of wide integers."""
+    import numpy as np
+    assert bigint in ("limbs", "object"), "Unknown bigint format %r" % bigint
+    abitypes = Decoder(types).types
+    for abitype in abitypes:
+        if abitype.dynamic:
+            raise ValueError("Dynamic type %s is not supported" % abitype.canonical)
+    words = sum(t.words for t in abitypes)
+    datas = list(datas)
+    if datas and _isstring(datas[0]) and not isinstance(datas[0], bytes):
+        raw = unhexlify("".join(data[2:] if data[:2] == "0x" else data for data in datas))
+    else:
+        raw = b"".join(bytes(data) for data in datas)
+    if len(raw) != len(datas) * words * 32:
+        raise ValueError("Results must be %d bytes each" % (words * 32))
+    matrix = np.frombuffer(raw, dtype=np.uint8).reshape(len(datas), words, 32)
+    columns = []
+    word = 0
+    for abitype in abitypes:
+        if abitype.kind == "array":
+            item, length = abitype.item, abitype.size
+            if item.kind in ("array", "tuple"):
+                raise ValueError("Nested type %s is not supported" % abitype.canonical)
+        elif abitype.kind == "tuple":
+            raise ValueError("Tuple type %s is not supported" % abitype.canonical)
+        else:
+            item, length = abitype, None
+        span = length or 1
+        block = matrix[:, word:word+span, :]
+        column = _column(np, block, item, bigint)
+        columns.append(column if length else column[:, 0])
+        word += span
+    return columns
+
+def _column(np, block, abitype, bigint):
+    # block is (N, words, 32) view, returns (N, words, ...) column
+    kind = abitype.kind
+    if kind in ("uint", "int") and abitype.size <= 64:
+        size = max(1, 1 << (abitype.size // 8 - 1).bit_length())
+        dtype = np.dtype(">%s%d" % ("u" if kind == "uint" else "i", size))
+        column = np.ascontiguousarray(block[:, :, 32-size:]).view(dtype)[..., 0]
+        if kind == "int" and size * 8 != abitype.size:
+            shift = 64 - abitype.size
+            column = (column.astype(np.int64) << shift) >> shift
+        return column.astype(dtype.newbyteorder("="))
+    elif kind in ("uint", "int"):
+        limbs = np.ascontiguousarray(block).view(">u8").astype(np.uint64)
+        if bigint == "limbs":
+            return limbs
+        shape = limbs.shape[:2]
+        column = np.empty(shape, dtype=object)
+        flat = block.reshape(-1, 32)
+        signed = kind == "int"
+        column.reshape(-1)[:] = [
+            int.from_bytes(word.tobytes(), "big", signed=signed) for word in flat]
+        return column
+    elif kind == "address":
+        return np.ascontiguousarray(block[:, :, 12:]).view("S20")[..., 0]
+    elif kind == "bytes":
+        size = abitype.size
+        return np.ascontiguousarray(block[:, :, :size]).view("S%d" % size)[..., 0]
+    elif kind == "bool":
+        return block.any(axis=2)
+    raise ValueError("Unsupported type %s" % abitype.canonical)
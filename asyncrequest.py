@@ -0,0 +1,258 @@
+# -*- coding: utf8 -*-
+import asyncio, collections, ssl
+from urllib.parse import urlsplit
+from .metrics import _timer
+from .checkpoint import _toCheckpoint, _closeCheckpoint
+from .transport import Transport
+from .request import (
+    BaseRequest, Request, PersonalRequest, EthConnectionError, EthTimeoutError,
+    EthParseError, _formatResponse
+    )
+
+class _StaleConnection(Exception):
+    pass
+
+class _HTTPStatus(Exception):
+    pass
+
+class AsyncBaseRequest(BaseRequest):
+    """Base of asyncio clients. Every method of the sync client returns a
+    coroutine instead of the value, so the requests are built and the results
+    are converted by the same code.
+    Calls share a pool of keep-alive HTTP connections, at most 'concurrency'
+    calls are in flight, the rest wait for a free connection, so it is safe to
+    'asyncio.gather' thousands of calls. Only HTTP nodes are supported.
+    Batches, fanouts and streamed calls of the sync client block on pycurl,
+    so they are not supported, neither are the clients in sync 'with'."""
+    def __init__(self, host, port, timeout=None, connecttimeout=None, cache=None,
+                 concurrency=16, metrics=None, codec=None):
+        # Calls are sent by the connections of the client, the sync
+        # transport is a placeholder without connections
+        super(AsyncBaseRequest, self).__init__(
+            host, port, timeout, connecttimeout, cache, metrics=metrics,
+            transport=Transport(), codec=codec)
+        assert concurrency > 0, "Concurrency must be positive"
+        url = urlsplit(host if "://" in host else "http://" + host)
+        self._scheme = url.scheme
+        self._hostname = url.hostname
+        self._path = url.path or "/"
+        self._concurrency = concurrency
+        self._idle = []
+        self._semaphore = None
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' for asyncio clients")
+
+    def __exit__(self, *exc):
+        raise TypeError("Use 'async with' for asyncio clients")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        "Closes all pooled connections to the node."
+        idle, self._idle = self._idle, []
+        for reader, writer in idle:
+            writer.close()
+
+    def _unsupported(self, name):
+        return NotImplementedError(
+            "'%s' of asyncio clients is not supported, 'asyncio.gather' the calls" % name)
+
+    def batch(self, size=500):
+        "Not supported, see 'AsyncBaseRequest'."
+        raise self._unsupported("batch")
+
+    def fanout(self, calls, concurrency=8, ordered=True, failfast=True):
+        "Not supported, see 'AsyncBaseRequest'."
+        raise self._unsupported("fanout")
+
+    def _openFanout(self, concurrency):
+        raise self._unsupported("fanout")
+
+    def _streamItems(self, data, path):
+        raise self._unsupported(data["method"])
+
+    async def iterBlocks(self, start, end=None, fulltx=False, window=64, checkpoint=None):
+        """Async generator of blocks from start to end inclusive, in order,
+        see 'Request.iterBlocks', e.g.:
+            async for block in r.iterBlocks(start):
+                ...
+        Up to 'window' blocks are requested concurrently ahead of the
+        yielded one."""
+        checkpoint = _toCheckpoint(checkpoint)
+        if checkpoint is not None:
+            saved = checkpoint.load()
+            if saved is not None and saved >= start:
+                start = saved + 1
+        if end is None:
+            end = await self.eth_blockNumber
+        numbers = iter(range(start, end + 1))
+        tasks = collections.deque()
+        def _schedule():
+            for number in numbers:
+                block = self.eth_getBlockByNumber(number, fulltx)
+                tasks.append((number, asyncio.ensure_future(block)))
+                if len(tasks) >= window:
+                    return
+        try:
+            _schedule()
+            while tasks:
+                number, task = tasks.popleft()
+                block = await task
+                _schedule()
+                yield block
+                if checkpoint is not None:
+                    checkpoint.save(number)
+        finally:
+            for number, task in tasks:
+                task.cancel()
+            _closeCheckpoint(checkpoint)
+
+    def _setLocal(self, result):
+        async def _result():
+            return result
+        return _result()
+
+    def _setRequest(self, data, formatter=None, onerror=None):
+        request = self._requestData.copy()
+        request.update(data)
+        return self._asyncRequest(request, formatter, onerror)
+
+    async def _asyncRequest(self, request, formatter, onerror):
+        cache = self._cache
+        response = None if cache is None else cache.get(request)
+        if response is None:
+            response = await self._getRequestResultAsync(request)
+            if cache is not None:
+                cache.put(request, response)
+        return _formatResponse(response, formatter, onerror)
+
+    async def _getRequestResultAsync(self, requestData):
+        metrics = self._metrics
+        if metrics is not None:
+            metrics.before(requestData)
+        start = _timer()
+        postfields = self._codec.dumps(requestData)
+        encoded = _timer()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        async with self._semaphore:
+            try:
+                body = await asyncio.wait_for(self._post(postfields), self._timeout)
+            except (OSError, EOFError, ValueError, asyncio.TimeoutError, _HTTPStatus) as exc:
+                if metrics is not None:
+                    durations = {"encode": encoded - start, "network": _timer() - encoded}
+                    metrics.record(requestData, None, durations, len(postfields), 0)
+                if isinstance(exc, _HTTPStatus):
+                    raise EthConnectionError(self._host, self._port, reason=str(exc))
+                elif isinstance(exc, asyncio.TimeoutError):
+                    raise EthTimeoutError(self._host, self._port)
+                raise EthConnectionError(self._host, self._port)
+        received = _timer()
+        try:
+            res = self._codec.loads(body)
+        except ValueError:
+            res = None
+        if metrics is not None:
+            # Network phase includes waiting for a free connection
+            durations = {
+                "encode": encoded - start,
+                "network": received - encoded,
+                "decode": _timer() - received,
+                }
+            metrics.record(requestData, res, durations, len(postfields), len(body))
+        if res is None:
+            raise EthParseError("Invalid response: %s" % body[:200])
+        return res
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self._scheme == "https" else None
+        return await asyncio.wait_for(
+            asyncio.open_connection(self._hostname, self._port, ssl=context),
+            self._connecttimeout
+            )
+
+    async def _post(self, postfields):
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                return await self._exchange(connection, postfields)
+            except _StaleConnection:
+                # Node closed kept alive connection before the request
+                connection[1].close()
+        try:
+            return await self._exchange(await self._connect(), postfields)
+        except _StaleConnection:
+            raise EOFError("Connection closed by the node")
+
+    async def _exchange(self, connection, postfields):
+        reader, writer = connection
+        head = (
+            "POST %s HTTP/1.1\r\n"
+            "Host: %s:%s\r\n"
+            "Accept: application/json\r\n"
+            "Content-Type: application/json\r\n"
+            "Content-Length: %d\r\n"
+            "Connection: keep-alive\r\n\r\n"
+            ) % (self._path, self._hostname, self._port, len(postfields))
+        status = None
+        try:
+            writer.write(head.encode('latin-1') + postfields)
+            await writer.drain()
+            status = await reader.readline()
+            if not status:
+                raise EOFError("Connection closed by the node")
+            body, keepalive = await self._readResponse(reader)
+        except BaseException as exc:
+            writer.close()
+            if not status and isinstance(exc, (ConnectionError, EOFError)):
+                raise _StaleConnection()
+            raise
+        if keepalive:
+            self._idle.append(connection)
+        else:
+            writer.close()
+        # Response is read whole first, so the connection is kept alive
+        version, code, reason = (status.decode('latin-1').split(None, 2) + [""])[:3]
+        if not 200 <= int(code) < 300:
+            raise _HTTPStatus("HTTP %s %s" % (code, reason.strip()))
+        return body
+
+    async def _readResponse(self, reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n"):
+                break
+            if not line:
+                raise EOFError("Connection closed by the node")
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+        keepalive = headers.get("connection") != "close"
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                chunk = await reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            body = b"".join(chunks)
+        else:
+            body = await reader.read()
+            keepalive = False
+        return body, keepalive
+
+class AsyncRequest(AsyncBaseRequest, Request):
+    """asyncio version of 'Request', every method is a coroutine, e.g.:
+        balance = await r.eth_getBalance(address)
+        number = await r.eth_blockNumber"""
+
+class AsyncPersonalRequest(AsyncBaseRequest, PersonalRequest):
+    "asyncio version of 'PersonalRequest', every method is a coroutine."
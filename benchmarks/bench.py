@@ -0,0 +1,319 @@
+# -*- coding: utf8 -*-
+"""Benchmarks of hextools and of the RPC client against the local stub node.
+Runs offline and writes results in JSON, e.g.:
+    python benchmarks/bench.py --output before.json
+    ... change the code ...
+    python benchmarks/bench.py --output after.json --compare before.json
+Groups:
+    hextools - encode and decode functions over payloads of 1 word to KBs.
+    request  - throughput of single calls of 'Request' over HTTP.
+    ipc      - the same over the Unix domain socket transport.
+    compare  - sequential, batched and concurrent calls of the same set."""
+import argparse, json, os, platform, socket, sys, tempfile, threading, time
+
+try:
+    _timer = time.perf_counter
+except AttributeError:
+    # Python 2
+    _timer = time.time
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _loadPackage():
+    # The repository is the package itself, so it is imported from the
+    # checkout unless PYETHTOOLS_INSTALLED is set
+    if os.environ.get("PYETHTOOLS_INSTALLED"):
+        import pyethtools
+        return pyethtools
+    try:
+        import importlib.util
+    except ImportError:
+        # Python 2
+        import imp
+        return imp.load_module("pyethtools", None, _root, ("", "", imp.PKG_DIRECTORY))
+    spec = importlib.util.spec_from_file_location(
+        "pyethtools", os.path.join(_root, "__init__.py"),
+        submodule_search_locations=[_root])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["pyethtools"] = module
+    spec.loader.exec_module(module)
+    return module
+
+pyethtools = _loadPackage()
+from pyethtools import hextools as ht
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stubnode import StubNode, StubIPCNode
+
+def measure(func, mintime=0.2, repeat=5):
+    """Returns dict of timings of func() in seconds per call.
+    Number of calls in a round is raised until the round takes 'mintime'."""
+    number = 1
+    while True:
+        start = _timer()
+        for _ in range(number):
+            func()
+        elapsed = _timer() - start
+        if elapsed >= mintime / repeat or number >= 10**6:
+            break
+        number *= 10 if elapsed < mintime / repeat / 10 else 2
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = _timer()
+        for _ in range(number):
+            func()
+        rounds.append((_timer() - start) / number)
+    rounds.sort()
+    return {"number": number, "repeat": repeat, "best": rounds[0],
+            "median": rounds[len(rounds) // 2], "mean": sum(rounds) / len(rounds)}
+
+class Runner(object):
+    "Collects results of benchmarks filtered by name."
+    def __init__(self, mintime=0.2, repeat=5, match=None, verbose=True):
+        self.mintime = mintime
+        self.repeat = repeat
+        self.match = match
+        self.verbose = verbose
+        self.results = []
+
+    def _selected(self, name):
+        return not self.match or any(m in name for m in self.match)
+
+    def add(self, group, name, func, items=1, **params):
+        """Measures func and records per item rates, 'items' is the number
+        of calls or values processed by a single func() call."""
+        name = "%s.%s" % (group, name)
+        if not self._selected(name):
+            return
+        result = measure(func, self.mintime, self.repeat)
+        result.update({"name": name, "group": group, "items": items,
+                       "params": params, "ops": items / result["median"]})
+        self.results.append(result)
+        if self.verbose:
+            sys.stderr.write("%-52s %12.1f us %12.0f items/s\n" % (
+                name, result["median"] * 1e6, result["ops"]))
+
+    def addOnce(self, group, name, func, items, **params):
+        """Records a single timed run of func, for benchmarks too slow or
+        stateful to repeat many times."""
+        name = "%s.%s" % (group, name)
+        if not self._selected(name):
+            return
+        timings = []
+        for _ in range(self.repeat):
+            start = _timer()
+            func()
+            timings.append(_timer() - start)
+        timings.sort()
+        median = timings[len(timings) // 2]
+        self.results.append({
+            "name": name, "group": group, "items": items, "params": params,
+            "number": 1, "repeat": self.repeat, "best": timings[0],
+            "median": median, "mean": sum(timings) / len(timings),
+            "ops": items / median})
+        if self.verbose:
+            sys.stderr.write("%-52s %12.1f ms %12.0f items/s\n" % (
+                name, median * 1e3, items / median))
+
+# Payload sizes in 32 bytes words
+_sizes = (1, 8, 64, 256)
+
+def _text(words):
+    line = "The Solidity optimizer operates on assembly. "
+    return (line * (words * 32 // len(line) + 1))[:words * 32]
+
+def benchHextools(runner):
+    method = ht.methodID("f()")
+    runner.add("hextools", "toHex.int", lambda: ht.toHex(2**200 + 12345))
+    runner.add("hextools", "encodeData.int", lambda: ht.encodeData(2**200 + 12345))
+    runner.add("hextools", "encodeData.address", lambda: ht.encodeData("0x" + "ab" * 20))
+    runner.add("hextools", "methodID", lambda: ht.methodID("transfer(address,uint256)"))
+    word = "0x" + "ab" * 32
+    runner.add("hextools", "sha3.word", lambda: ht.sha3(word))
+    for words in _sizes:
+        text = _text(words)
+        size = words * 32
+        runner.add("hextools", "toHex.str.%d" % size, lambda: ht.toHex(text), bytes=size)
+        ints = [i * 7919 for i in range(words)]
+        runner.add("hextools", "getData.ints.%d" % size,
+                   lambda: ht.getData(ints, data=method), bytes=size)
+        runner.add("hextools", "getData.array.%d" % size,
+                   lambda: ht.getData([ints], data=method), bytes=size)
+        runner.add("hextools", "getData.string.%d" % size,
+                   lambda: ht.getData([text], data=method), bytes=size)
+        intsData = "0x" + ht.getData(ints, data=method)[10:]
+        types = (int,) * words
+        runner.add("hextools", "decodeArgData.ints.%d" % size,
+                   lambda: ht.decodeArgData(intsData, types), bytes=size)
+        runner.add("hextools", "decodeData.ints.%d" % size,
+                   lambda: ht.decodeData(intsData), bytes=size)
+        stringData = "0x" + ht.getData([text], data=method)[10:]
+        runner.add("hextools", "decodeArgData.string.%d" % size,
+                   lambda: ht.decodeArgData(stringData, (str,)), bytes=size)
+        runner.add("hextools", "decodeData.string.%d" % size,
+                   lambda: ht.decodeData(stringData), bytes=size)
+        mixed = "0x" + ht.getData([255, "0x" + "ca" * 20, text], data=method)[10:]
+        runner.add("hextools", "decodeArgData.mixed.%d" % size,
+                   lambda: ht.decodeArgData(mixed, (int, hex, str)), bytes=size)
+        runner.add("hextools", "decodeData.mixed.%d" % size,
+                   lambda: ht.decodeData(mixed), bytes=size)
+        strings = "0x" + ht.getData([_text(1)] * max(1, words // 4), data=method)[10:]
+        runner.add("hextools", "decodeData.strings.%d" % size,
+                   lambda: ht.decodeData(strings), bytes=size)
+    events = pyethtools.EventRegistry(
+        ["Transfer(address indexed from, address indexed to, uint256 value)"])
+    topic = ht.eventTopic("Transfer(address,address,uint256)")
+    logs = [{"topics": [topic, "0x%064x" % i, "0x%064x" % (i + 1)], "data": "0x%064x" % (i * 7919)}
+            for i in range(1000)]
+    runner.add("hextools", "decodeLogs.transfer", lambda: events.decodeLogs(logs), items=len(logs))
+    objects = [pyethtools.Log(log) for log in logs]
+    runner.add("hextools", "decodeLogs.transfer.objects", lambda: events.decodeLogs(objects),
+               items=len(objects))
+
+def benchRequest(runner, node, group="request"):
+    r = pyethtools.Request(node.host, node.port)
+    address = "0x" + "00" * 16 + "0000abcd"
+    call = {"to": address, "data": ht.methodID("balanceOf(address)") + ht.encodeData(address)[2:]}
+    try:
+        runner.add(group, "eth_blockNumber", lambda: r.eth_blockNumber)
+        runner.add(group, "eth_getBalance", lambda: r.eth_getBalance(address))
+        runner.add(group, "eth_call", lambda: r.eth_call(call))
+        runner.add(group, "eth_getBlockByNumber", lambda: r.eth_getBlockByNumber(1000),
+                   txcount=node._server.txcount)
+        runner.add(group, "iterTransactions", lambda: list(r.iterTransactions(1000, False)),
+                   txcount=node._server.txcount)
+    finally:
+        r.close()
+
+def benchCompare(runner, node, calls=500, latency=0.001, concurrency=16, batchsize=100):
+    addresses = ["0x%040x" % i for i in range(calls)]
+    params = dict(calls=calls, latency=latency)
+    node.delay = latency
+    r = pyethtools.Request(node.host, node.port)
+
+    def sequential():
+        for address in addresses:
+            r.eth_getBalance(address)
+
+    def batched():
+        for start in range(0, calls, batchsize):
+            with r.batch(batchsize) as b:
+                for address in addresses[start:start + batchsize]:
+                    b.eth_getBalance(address)
+
+    def fanout():
+        for _ in r.fanout([("eth_getBalance", [a, "latest"]) for a in addresses],
+                          concurrency=concurrency):
+            pass
+
+    def threaded():
+        chunks = [addresses[i::concurrency] for i in range(concurrency)]
+        def work(chunk):
+            for address in chunk:
+                r.eth_getBalance(address)
+        threads = [threading.Thread(target=work, args=(c,)) for c in chunks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    try:
+        runner.addOnce("compare", "sequential", sequential, calls, **params)
+        runner.addOnce("compare", "batch", batched, calls, batchsize=batchsize, **params)
+        runner.addOnce("compare", "fanout", fanout, calls, concurrency=concurrency, **params)
+        runner.addOnce("compare", "threads", threaded, calls, concurrency=concurrency, **params)
+        if hasattr(pyethtools, "AsyncRequest"):
+            import asyncio
+            async def gather():
+                async with pyethtools.AsyncRequest(
+                        node.host, node.port, concurrency=concurrency) as client:
+                    await asyncio.gather(*[client.eth_getBalance(a) for a in addresses])
+            runner.addOnce("compare", "async", lambda: asyncio.run(gather()), calls,
+                           concurrency=concurrency, **params)
+    finally:
+        node.delay = 0.0
+        r.close()
+
+def compareResults(current, baseline, threshold):
+    """Prints ratios of current to baseline medians, returns names of
+    benchmarks slower than the baseline by more than the threshold."""
+    previous = dict((item["name"], item) for item in baseline["results"])
+    regressions = []
+    sys.stderr.write("\n%-52s %12s %12s %8s\n" % ("benchmark", "baseline", "current", "ratio"))
+    for item in current["results"]:
+        before = previous.get(item["name"])
+        if before is None:
+            continue
+        ratio = item["median"] / before["median"]
+        mark = ""
+        if ratio > 1 + threshold:
+            regressions.append(item["name"])
+            mark = " slower"
+        elif ratio < 1 - threshold:
+            mark = " faster"
+        sys.stderr.write("%-52s %12.6f %12.6f %8.2f%s\n" % (
+            item["name"], before["median"], item["median"], ratio, mark))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("groups", nargs="*", default=["hextools", "request", "ipc", "compare"],
+                        help="groups to run: hextools, request, ipc, compare")
+    parser.add_argument("-k", "--match", action="append",
+                        help="run only benchmarks whose name contains the string")
+    parser.add_argument("-o", "--output", help="JSON file of results, default stdout")
+    parser.add_argument("-c", "--compare", help="JSON file of baseline results")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative slowdown reported as regression")
+    parser.add_argument("--mintime", type=float, default=0.2,
+                        help="minimal seconds of measuring a benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=500,
+                        help="number of calls compared in the compare group")
+    parser.add_argument("--latency", type=float, default=0.001,
+                        help="emulated latency of the stub node in the compare group")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--quick", action="store_true",
+                        help="short runs for a smoke test")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.mintime, args.repeat, args.calls = 0.02, 3, 100
+    runner = Runner(args.mintime, args.repeat, args.match, not args.quiet)
+    if "hextools" in args.groups:
+        benchHextools(runner)
+    if "request" in args.groups or "compare" in args.groups:
+        with StubNode() as node:
+            if "request" in args.groups:
+                benchRequest(runner, node)
+            if "compare" in args.groups:
+                benchCompare(runner, node, args.calls, args.latency, args.concurrency)
+    if "ipc" in args.groups and hasattr(socket, "AF_UNIX"):
+        path = os.path.join(tempfile.mkdtemp(), "stub.ipc")
+        with StubIPCNode(path) as node:
+            benchRequest(runner, node, "ipc")
+        os.rmdir(os.path.dirname(path))
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "mintime": args.mintime, "repeat": args.repeat,
+            },
+        "results": runner.results,
+        }
+    text = json.dumps(report, indent=1, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compareResults(report, baseline, args.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
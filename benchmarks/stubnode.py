@@ -0,0 +1,186 @@
+# -*- coding: utf8 -*-
+"""Local JSON-RPC node stub for benchmarks, answers every call with
+deterministic data without any chain, e.g.:
+    with StubNode() as node:
+        r = Request(node.host, node.port)
+    with StubIPCNode("/tmp/stub.ipc") as node:
+        r = Request(node.host, None)
+Run as a script to serve on the given port or IPC path:
+    python stubnode.py 8545
+    python stubnode.py /tmp/stub.ipc"""
+import json, os, sys, threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer, BaseRequestHandler
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer, BaseRequestHandler
+
+def _word(number):
+    return "%064x" % number
+
+def _block(number, txcount):
+    transactions = ["0x" + _word(number * 1000 + i) for i in range(txcount)]
+    return {
+        "number": hex(number), "hash": "0x" + _word(number),
+        "parentHash": "0x" + _word(number - 1), "timestamp": hex(1500000000 + number),
+        "gasLimit": "0x7a1200", "gasUsed": hex(21000 * txcount),
+        "miner": "0x" + _word(number)[24:], "transactions": transactions,
+        }
+
+def _result(method, params, txcount):
+    if method == "eth_blockNumber":
+        return "0x10d4f"
+    elif method == "eth_getBalance":
+        return hex(int(params[0][-8:], 16) * 10**15)
+    elif method == "eth_gasPrice":
+        return "0x4a817c800"
+    elif method in ("eth_getBlockByNumber", "eth_getBlockByHash"):
+        number = int(params[0], 16) if params[0].startswith("0x") else 0x10d4f
+        return _block(number % 0x10d4f, txcount)
+    elif method == "eth_call":
+        # Echoes arguments of the called method
+        return "0x" + params[0].get("data", "0x")[10:]
+    elif method == "eth_getLogs":
+        return []
+    return None
+
+def _response(request, txcount):
+    if not isinstance(request, dict) or "method" not in request:
+        return {"jsonrpc": "2.0", "id": None,
+                "error": {"code": -32600, "message": "Invalid request"}}
+    result = _result(request["method"], request.get("params", []), txcount)
+    return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Nagle delays small responses on kept alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        request = json.loads(body.decode("utf-8"))
+        data = json.dumps(_answer(request, self.server)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # Default backlog of 5 drops concurrent connects for a second
+    request_queue_size = 128
+
+    def handle_error(self, request, address):
+        # Clients drop connections of abandoned streamed responses
+        if not isinstance(sys.exc_info()[1], (IOError, OSError)):
+            HTTPServer.handle_error(self, request, address)
+
+class StubNode(object):
+    """Stub node served by a background thread.
+    Parameters:
+    1. Number - (optional) port, 0 takes a free one.
+    2. Number - (optional) delay of every response in seconds, emulates
+    network latency.
+    3. Number - (optional) number of transactions in every block."""
+    host = "http://127.0.0.1"
+
+    def __init__(self, port=0, delay=0.0, txcount=100):
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.delay = delay
+        self._server.txcount = txcount
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def delay(self):
+        return self._server.delay
+
+    @delay.setter
+    def delay(self, value):
+        self._server.delay = value
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def _answer(request, server):
+    if server.delay:
+        threading.Event().wait(server.delay)
+    if isinstance(request, list):
+        return [_response(item, server.txcount) for item in request]
+    return _response(request, server.txcount)
+
+class _IPCHandler(BaseRequestHandler):
+    # Like geth, reads concatenated JSON messages and writes every response
+    # followed by a newline
+    def handle(self):
+        decoder = json.JSONDecoder()
+        buff = ""
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            buff += data.decode("utf-8")
+            while True:
+                buff = buff.lstrip()
+                try:
+                    request, end = decoder.raw_decode(buff)
+                except ValueError:
+                    break
+                buff = buff[end:]
+                response = _answer(request, self.server)
+                self.request.sendall(json.dumps(response).encode("utf-8") + b"\n")
+
+class _IPCServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+    handle_error = _Server.__dict__["handle_error"]
+
+class StubIPCNode(StubNode):
+    """Stub node served on the Unix domain socket of the given path, a stand
+    in of 'geth.ipc'.
+    Parameters:
+    1. String - path of the socket, replaced if exists.
+    2. Number - (optional) delay of every response in seconds.
+    3. Number - (optional) number of transactions in every block."""
+    def __init__(self, path, delay=0.0, txcount=100):
+        if os.path.exists(path):
+            os.remove(path)
+        self._path = path
+        self._server = _IPCServer(path, _IPCHandler)
+        self._server.delay = delay
+        self._server.txcount = txcount
+        self.host = path if path.endswith(".ipc") else "ipc://" + path
+        self.port = None
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        super(StubIPCNode, self).close()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+if __name__ == "__main__":
+    address = sys.argv[1] if len(sys.argv) > 1 else "8545"
+    if address.isdigit():
+        node = _Server(("127.0.0.1", int(address)), _Handler)
+    else:
+        node = _IPCServer(address, _IPCHandler)
+    node.delay, node.txcount = 0.0, 100
+    node.serve_forever()
@@ -0,0 +1,293 @@
+# -*- coding: utf8 -*-
+import threading, json, sqlite3, time
+from collections import OrderedDict
+
+class LRUCache(object):
+    """Thread-safe mapping bounded to 'maxsize' most recently used items.
+    Counts hits and misses of 'get'.
+    Parameters:
+    1. Number - maximum number of items, or their total size.
+    2. Function - (optional) sizeof(key, value) of an item, default is 1."""
+    def __init__(self, maxsize=1024, sizeof=None):
+        assert maxsize > 0, "Cache size must be positive"
+        self._maxsize = maxsize
+        self._sizeof = sizeof
+        self._size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self):
+        "Returns number of items, or their total size."
+        return self._size
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        "Returns cached value of the key, or default."
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        "Caches the value, evicting least recently used items on overflow."
+        size = 1 if self._sizeof is None else self._sizeof(key, value)
+        if size > self._maxsize:
+            return
+        with self._lock:
+            if key in self._items:
+                self._size -= self._itemSize(key, self._items.pop(key))
+            self._items[key] = value
+            self._size += size
+            while self._size > self._maxsize:
+                self._size -= self._itemSize(*self._items.popitem(last=False))
+
+    def _itemSize(self, key, value):
+        return 1 if self._sizeof is None else self._sizeof(key, value)
+
+    def clear(self):
+        "Removes all items and resets counters."
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+# Methods which results never change once they are found, with position of
+# the block parameter, None if the call is addressed by a hash
+_immutable = {
+    "eth_getBlockByHash": None,
+    "eth_getTransactionByHash": None,
+    "eth_getTransactionReceipt": None,
+    "eth_getTransactionByBlockHashAndIndex": None,
+    "eth_getUncleByBlockHashAndIndex": None,
+    "eth_getBlockTransactionCountByHash": None,
+    "eth_getUncleCountByBlockHash": None,
+    "eth_getBalance": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getCode": 1,
+    "eth_getStorageAt": 2,
+    "eth_call": 1,
+}
+
+# Calls addressed by a hash whose result moves to another block on a chain
+# reorganization
+_mined = ("eth_getTransactionByHash", "eth_getTransactionReceipt")
+
+def requestKey(request):
+    "Returns canonical JSON of method and params of the request."
+    return json.dumps([request.get("method"), request.get("params", [])],
+                      sort_keys=True, separators=(",", ":"))
+
+class RequestCache(object):
+    """Cache of results of calls that never change: calls addressed by
+    block hash, transactions and receipts once they are mined at least
+    'depth' blocks below the head, and state calls at an explicit block
+    number at least 'depth' blocks below the head. Calls with block tags
+    like 'latest' or 'pending' are never cached.
+    The head is taken from results of 'eth_blockNumber' passing the cache,
+    until the first one is seen only calls addressed by block hash are
+    stored. It may also be set in 'head'.
+    Results are kept JSON encoded in memory LRU bounded by total size, and
+    optionally in SQLite database file.
+    Parameters:
+    1. Number - (optional) maximum size of memory cache in bytes.
+    2. String - (optional) path of SQLite database of the disk cache.
+    3. Number - (optional) number of confirmations of blocks that are not
+    reorganized any more."""
+    def __init__(self, maxbytes=64 * 2**20, path=None, depth=64):
+        assert depth >= 0, "Depth must not be negative"
+        self._memory = LRUCache(maxbytes, sizeof=lambda key, value: len(key) + len(value))
+        self._disk = None
+        self._lock = threading.Lock()
+        self._depth = depth
+        self.head = None
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            self._disk = sqlite3.connect(path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT)")
+            self._disk.commit()
+
+    def close(self):
+        "Closes the disk cache."
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self):
+        "Returns dict of hits, misses and size of memory cache in bytes."
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._memory.size}
+
+    def key(self, request):
+        """Returns canonical key of the request, or None if its result may
+        change."""
+        method = request.get("method")
+        if method not in _immutable:
+            return None
+        params = request.get("params", [])
+        position = _immutable[method]
+        if position is not None:
+            if len(params) <= position:
+                return None
+            block = params[position]
+            if not isinstance(block, str) or block[:2] != "0x":
+                return None
+        return requestKey(request)
+
+    def get(self, request):
+        "Returns cached response of the request, or None."
+        key = self.key(request)
+        if key is None:
+            return None
+        value = self._memory.get(key)
+        if value is None and self._disk is not None:
+            with self._lock:
+                row = self._disk.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                value = row[0]
+                self._memory.put(key, value)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": json.loads(value)}
+
+    def _final(self, block):
+        "Returns True if the block of hex number is 'depth' blocks deep."
+        head = self.head
+        try:
+            return head is not None and int(block, 16) + self._depth <= head
+        except (TypeError, ValueError):
+            return False
+
+    def put(self, request, response):
+        """Caches result of the response if the request is cacheable and
+        its block is final. Results of 'eth_blockNumber' update the head."""
+        result = response.get("result")
+        if result is None:
+            return
+        method = request["method"]
+        if method == "eth_blockNumber":
+            self._setHead(result)
+            return
+        key = self.key(request)
+        if key is None:
+            return
+        position = _immutable[method]
+        if position is not None:
+            if not self._final(request["params"][position]):
+                return
+        elif method in _mined:
+            if not isinstance(result, dict) or not result.get("blockHash") or \
+                    not self._final(result.get("blockNumber")):
+                return
+        value = json.dumps(result, separators=(",", ":"))
+        self._memory.put(key, value)
+        if self._disk is not None:
+            with self._lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value))
+                self._disk.commit()
+
+    def _setHead(self, result):
+        try:
+            number = int(result, 16)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            if self.head is None or number > self.head:
+                self.head = number
+
+# Calls that change the node state or consume its data
+_uncoalesced = set([
+    "eth_sendTransaction", "eth_sendRawTransaction", "eth_sign",
+    "eth_newFilter", "eth_newBlockFilter", "eth_newPendingTransactionFilter",
+    "eth_uninstallFilter", "eth_getFilterChanges",
+])
+
+class _InFlight(object):
+    __slots__ = ("event", "response", "exc")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+        self.exc = None
+
+class Coalescer(object):
+    """Shares a call in flight among threads making the identical call, so N
+    concurrent identical calls cost one RPC and all N callers get its result.
+    Results of tag based calls, i.e. calls without parameters like
+    'eth_blockNumber' or with 'latest' or 'pending' tag, are also reused for
+    'ttl' seconds. Calls that change state, 'personal_*' calls and filter
+    polls are never shared. Note that shared results are the same objects.
+    Parameters:
+    1. Number - (optional) seconds to reuse results of tag based calls."""
+    def __init__(self, ttl=0.0):
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._recent = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _tagged(self, request):
+        params = request.get("params")
+        return not params or any(p in ("latest", "pending") for p in params
+                                 if isinstance(p, str))
+
+    def call(self, request, fetch):
+        """Returns response of the request, fetched by fetch(request) unless
+        the identical call is in flight or recent."""
+        method = request.get("method", "")
+        if method in _uncoalesced or method.startswith("personal_"):
+            return fetch(request)
+        key = requestKey(request)
+        ttl = self._ttl if self._ttl and self._tagged(request) else 0
+        with self._lock:
+            if ttl:
+                recent = self._recent.get(key)
+                if recent is not None and recent[0] > time.time():
+                    self.shared += 1
+                    return recent[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            flight.event.wait()
+            if flight.exc is not None:
+                raise flight.exc
+            return flight.response
+        try:
+            flight.response = fetch(request)
+        except BaseException as exc:
+            flight.exc = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if ttl and flight.exc is None:
+                    self._recent[key] = (time.time() + ttl, flight.response)
+                    if len(self._recent) > 1024:
+                        now = time.time()
+                        for k in [k for k, v in self._recent.items() if v[0] <= now]:
+                            del self._recent[k]
+            flight.event.set()
+        return flight.response
@@ -0,0 +1,70 @@
+# -*- coding: utf8 -*-
+import os, time
+
+class Checkpoint(object):
+    """Keeps the last processed block number in a file to resume long scans
+    after a crash. Saves are written at most every 'every' blocks or
+    'interval' seconds, the last one on close, so a scan resumed after a
+    crash may process some blocks again. The file is replaced atomically.
+    Parameters:
+    1. String - path of the checkpoint file.
+    2. Number - (optional) saves between writes of the file.
+    3. Number - (optional) seconds between writes of the file."""
+    def __init__(self, path, every=100, interval=5.0):
+        assert every > 0, "Every must be positive"
+        self._path = path
+        self._every = every
+        self._interval = interval
+        self._pending = None
+        self._count = 0
+        self._written = time.time()
+
+    def load(self, default=None):
+        "Returns saved block number, or default if nothing is saved yet."
+        if self._pending is not None:
+            return self._pending
+        try:
+            with open(self._path) as f:
+                return int(f.read().strip(), 0)
+        except (IOError, OSError, ValueError):
+            return default
+
+    def save(self, number):
+        "Saves the given block number, the file is written when due."
+        self._pending = number
+        self._count += 1
+        if self._count >= self._every or time.time() - self._written >= self._interval:
+            self.flush()
+
+    def flush(self):
+        "Writes the last saved block number to the file."
+        if self._pending is None:
+            return
+        tmp = "%s.tmp" % self._path
+        with open(tmp, "w") as f:
+            f.write("%d\n" % self._pending)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.replace(tmp, self._path)
+        except AttributeError:
+            # Python 2
+            if os.name == "nt" and os.path.exists(self._path):
+                os.remove(self._path)
+            os.rename(tmp, self._path)
+        self._pending = None
+        self._count = 0
+        self._written = time.time()
+
+    def close(self):
+        "Writes the pending block number, the checkpoint can be used again."
+        self.flush()
+
+def _toCheckpoint(checkpoint):
+    if checkpoint is None or hasattr(checkpoint, "save"):
+        return checkpoint
+    return Checkpoint(checkpoint)
+
+def _closeCheckpoint(checkpoint):
+    if checkpoint is not None and hasattr(checkpoint, "close"):
+        checkpoint.close()
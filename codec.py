@@ -0,0 +1,209 @@
+# -*- coding: utf8 -*-
+import re, json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class JSONCodec(object):
+    """Encodes requests and decodes responses with the standard json
+    module. Subclasses may replace 'dumps' and 'loads', see 'OrjsonCodec'."""
+    name = "json"
+
+    def dumps(self, obj):
+        "Returns compact JSON of the given object in bytes."
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data):
+        "Returns object decoded from JSON in bytes or string."
+        if isinstance(data, bytes) and not isinstance(data, str):
+            data = data.decode("utf-8")
+        return json.loads(data)
+
+class OrjsonCodec(JSONCodec):
+    """Codec of orjson, parses the response bytes without decoding them to
+    a string first. Ethereum JSON-RPC encodes quantities as hex strings,
+    though note that orjson decodes numbers over 64 bits as floats.
+    Objects orjson can not encode, e.g. integers over 64 bits, are encoded
+    by the json module."""
+    name = "orjson"
+
+    def dumps(self, obj):
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return JSONCodec.dumps(self, obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+def getCodec(name=None):
+    """Returns codec of the given name, 'json' or 'orjson'. Default is
+    orjson if it is installed, else json.
+    Parameters:
+    1. String - (optional) name of the codec."""
+    if name is None:
+        return defaultCodec
+    elif name == "orjson":
+        assert orjson is not None, "orjson is not installed"
+        return OrjsonCodec()
+    elif name == "json":
+        return JSONCodec()
+    raise ValueError("Unknown codec %s" % name)
+
+defaultCodec = JSONCodec() if orjson is None else OrjsonCodec()
+
+class _ItemScanner(object):
+    """Incremental scanner of a JSON-RPC response, splits items of the
+    array at the given path, e.g. ('result', 'transactions'), and the
+    other top level members, e.g. 'error'. Only brackets, commas, colons
+    and strings are scanned, and the scanned bytes are released, so memory
+    is bounded by the largest item. Keys are decoded only in objects on the
+    path, items and other containers are skipped from bracket to bracket
+    and sliced out raw."""
+    _outside = re.compile(b'[{}\\[\\],:"]')
+    _inside = re.compile(b'["\\\\]')
+    # Run of anything but brackets, with whole strings
+    _skipped = re.compile(
+        b'[^"{}\\[\\]]*(?:"[^"\\\\]*(?:\\\\.[^"\\\\]*)*"[^"{}\\[\\]]*)*', re.S)
+
+    def __init__(self, path):
+        self._path = tuple(path)
+        self._buff = bytearray()
+        self._pos = 0
+        self._instring = False
+        # Frames of open containers on the path: [bracket, path, key,
+        # expects key], and depth of the skipped container
+        self._stack = []
+        self._depth = 0
+        self._keystart = None
+        self._itemstart = None
+        self._memberstart = None
+        self._member = None
+        self.members = {}
+        self.found = False
+
+    def _trim(self):
+        starts = [s for s in (self._keystart, self._itemstart, self._memberstart)
+                  if s is not None]
+        keep = min(starts + [self._pos])
+        if keep:
+            del self._buff[:keep]
+            self._pos -= keep
+            if self._keystart is not None:
+                self._keystart -= keep
+            if self._itemstart is not None:
+                self._itemstart -= keep
+            if self._memberstart is not None:
+                self._memberstart -= keep
+
+    def _item(self, end):
+        item = bytes(self._buff[self._itemstart:end]).strip()
+        self._itemstart = end + 1
+        return item
+
+    def _skip(self, buff, pos):
+        # Returns position after the skipped container, or where the data
+        # ends, with the depth left in '_depth'
+        skipped = self._skipped
+        end = len(buff)
+        while self._depth:
+            pos = skipped.match(buff, pos).end()
+            if pos == end or buff[pos] == 34:
+                # The data ends, possibly inside a string
+                break
+            if buff[pos] in (123, 91):
+                self._depth += 1
+            else:
+                self._depth -= 1
+            pos += 1
+        return pos
+
+    def feed(self, data):
+        "Returns list of JSON items completed by the given bytes."
+        buff = self._buff
+        buff.extend(data)
+        stack = self._stack
+        items = []
+        pos = self._pos
+        while True:
+            if self._depth:
+                pos = self._skip(buff, pos)
+                if self._depth:
+                    break
+                continue
+            if self._instring:
+                match = self._inside.search(buff, pos)
+                if match is None:
+                    pos = len(buff)
+                    break
+                pos = match.end()
+                if match.group() == b'\\':
+                    if pos == len(buff):
+                        pos -= 1
+                        break
+                    pos += 1
+                    continue
+                self._instring = False
+                if self._keystart is not None:
+                    frame = stack[-1]
+                    frame[2] = json.loads(bytes(buff[self._keystart:pos]).decode("utf-8"))
+                    frame[3] = False
+                    self._keystart = None
+                continue
+            match = self._outside.search(buff, pos)
+            if match is None:
+                pos = len(buff)
+                break
+            start, pos = match.start(), match.end()
+            symbol = match.group()
+            frame = stack[-1] if stack else None
+            if symbol == b'"':
+                self._instring = True
+                if frame is not None and frame[0] == b'{' and frame[3]:
+                    self._keystart = start
+            elif symbol == b':':
+                if len(stack) == 1 and (not self._path or frame[2] != self._path[0]):
+                    self._member = frame[2]
+                    self._memberstart = pos
+            elif symbol in (b'{', b'['):
+                if frame is None:
+                    path = ()
+                elif frame[0] == b'{':
+                    path = frame[1] + (frame[2],)
+                else:
+                    # Items of arrays are not addressed by the path
+                    path = frame[1] + (None,)
+                if path != self._path[:len(path)]:
+                    # Containers off the path, e.g. the items, are skipped
+                    self._depth = 1
+                    continue
+                stack.append([symbol, path, None, symbol == b'{'])
+                if symbol == b'[' and path == self._path:
+                    self.found = True
+                    self._itemstart = pos
+            else:
+                if symbol == b',' and frame[0] == b'{':
+                    frame[3] = True
+                if len(stack) == 1 and self._memberstart is not None:
+                    self.members[self._member] = json.loads(
+                        bytes(buff[self._memberstart:start]).decode("utf-8"))
+                    self._memberstart = None
+                if frame[0] == b'[' and frame[1] == self._path:
+                    item = self._item(start)
+                    if item:
+                        items.append(item)
+                    elif symbol == b',':
+                        raise ValueError("Invalid JSON array")
+                if symbol != b',':
+                    if frame[0] == b'[' and frame[1] == self._path:
+                        self._itemstart = None
+                    stack.pop()
+        self._pos = pos
+        self._trim()
+        return items
+
+    @property
+    def done(self):
+        "Returns True if the whole response is scanned."
+        return not self._stack and not self._buff.strip()
@@ -0,0 +1,343 @@
+# -*- coding: utf8 -*-
+"""Decoding of event logs. Events are compiled once from signatures or ABI
+JSON into decoders of topics and data, and indexed by their topic, see
+'EventRegistry'."""
+import re, json
+from binascii import unhexlify
+from .hextools import eventTopic, _isstring
+from .abi import parseType, _splitTypes, _readerOf, _readItems
+
+_signatureRe = re.compile(r"^\s*(?:event\s+)?([A-Za-z_$][A-Za-z0-9_$]*)\s*\((.*)\)\s*(anonymous)?\s*;?\s*$",
+                          re.DOTALL)
+
+def _toBytes(value):
+    # Hexnumbers of JSON-RPC logs, or bytes of 'Log' objects
+    if isinstance(value, bytes) and not (isinstance(value, str) and value[:2] == "0x"):
+        return value
+    return unhexlify(value[2:])
+
+def _parseParam(param):
+    # Returns (type, indexed, name) of e.g. 'address indexed from'
+    param = param.strip()
+    if param.startswith("("):
+        depth = 0
+        for end, char in enumerate(param):
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            if not depth:
+                break
+        end += 1
+        while end < len(param) and param[end] == "[":
+            end = param.index("]", end) + 1
+        typename, rest = param[:end], param[end:].split()
+    else:
+        words = param.split()
+        typename, rest = words[0], words[1:]
+    indexed = "indexed" in rest
+    rest = [word for word in rest if word != "indexed"]
+    return typename, indexed, rest[-1] if rest else None
+
+def _abiTypeName(entry):
+    # Returns type name of ABI JSON input, tuples are spelled out
+    typename = entry["type"]
+    if typename.startswith("tuple"):
+        components = ",".join(_abiTypeName(c) for c in entry["components"])
+        return "(%s)%s" % (components, typename[len("tuple"):])
+    return typename
+
+def _readTopic(abitype):
+    # Indexed dynamic values are logged as their hash, kept as bytes
+    if abitype.dynamic or abitype.kind in ("array", "tuple"):
+        return lambda view, pos: bytes(view[pos:pos+32])
+    return _readerOf(abitype)
+
+def _hexReaderOf(abitype):
+    """Returns function(hexnumber, pos) reading value of the static
+    elementary type from the word at pos of the Hexnumber, or None for other
+    types. Values are the same as 'abi.Decoder' returns."""
+    kind = abitype.kind
+    if kind == "uint":
+        return lambda data, pos: int(data[pos:pos+64], 16)
+    elif kind == "int":
+        sign, full = 1 << 255, 1 << 256
+        def _read(data, pos):
+            value = int(data[pos:pos+64], 16)
+            return value - full if value >= sign else value
+        return _read
+    elif kind == "address":
+        return lambda data, pos: "0x" + data[pos+24:pos+64].lower()
+    elif kind == "bool":
+        return lambda data, pos: int(data[pos:pos+64], 16) != 0
+    elif kind == "bytes":
+        size = abitype.size * 2
+        return lambda data, pos: unhexlify(data[pos:pos+size])
+    return None
+
+class EventLog(object):
+    """Decoded log. Arguments are in 'args' by their names, unnamed ones
+    are named 'arg0', 'arg1' etc. by their position, and are available by
+    index of the log, e.g. log["value"].
+    Attributes:
+    - event: Event - the decoded event.
+    - args: Object - decoded arguments.
+    - log: Object|Log - the original log."""
+    __slots__ = ("event", "args", "log")
+
+    def __init__(self, event, args, log):
+        self.event = event
+        self.args = args
+        self.log = log
+
+    def __getitem__(self, name):
+        return self.args[name]
+
+    def __repr__(self):
+        return "<EventLog %s %r>" % (self.event.name, self.args)
+
+    @property
+    def name(self):
+        "Returns name of the event."
+        return self.event.name
+
+class Event(object):
+    """Compiled decoder of logs of a single event.
+    Without any 'indexed' keyword the first arguments are taken as indexed
+    as many as the log has topics, so e.g. ERC-20 and ERC-721 'Transfer'
+    logs are both decoded by 'Transfer(address,address,uint256)'.
+    Attributes:
+    - name: String - name of the event.
+    - signature: String - canonical signature, e.g. 'Transfer(address,address,uint256)'.
+    - topic: Hexnumber - topic of the signature, None for anonymous events.
+    - names: List - names of the arguments.
+    - types: List of ABIType - types of the arguments.
+    - indexed: List - True for indexed arguments, None if not given.
+    Parameters:
+    1. String - name of the event.
+    2. List - arguments as (type name, indexed, name) triples.
+    3. Boolean - (optional) True for anonymous events, which have no topic."""
+    def __init__(self, name, inputs, anonymous=False):
+        self.name = name
+        self.types = [parseType(typename) for typename, indexed, argname in inputs]
+        self.names = [argname or "arg%d" % i for i, (t, x, argname) in enumerate(inputs)]
+        marked = [bool(indexed) for typename, indexed, argname in inputs]
+        self.indexed = marked if any(marked) or anonymous else None
+        self.signature = "%s(%s)" % (name, ",".join(t.canonical for t in self.types))
+        self.anonymous = anonymous
+        self.topic = None if anonymous else eventTopic(self.signature)
+        self._decoders = {}
+
+    def __repr__(self):
+        return "Event(%s)" % self.signature
+
+    @classmethod
+    def fromSignature(cls, signature):
+        """Returns Event of the signature, e.g.
+        'Transfer(address indexed from, address indexed to, uint256 value)'.
+        Names of arguments are optional. Tuples are given by their types
+        only, e.g. '(address,uint256)[] items'.
+        Parameters:
+        1. String - signature of the event."""
+        match = _signatureRe.match(signature)
+        if match is None:
+            raise ValueError("Invalid event signature %r" % signature)
+        name, params, anonymous = match.groups()
+        inputs = [_parseParam(param) for param in _splitTypes(params)]
+        return cls(name, inputs, bool(anonymous))
+
+    @classmethod
+    def fromABI(cls, entry):
+        """Returns Event of the ABI JSON entry of type 'event'.
+        Parameters:
+        1. Object - the entry, with 'name', 'inputs' and 'anonymous'."""
+        assert entry.get("type", "event") == "event", "Not an event entry: %r" % entry.get("type")
+        inputs = [(_abiTypeName(i), i.get("indexed", False), i.get("name"))
+                  for i in entry.get("inputs", [])]
+        return cls(entry["name"], inputs, entry.get("anonymous", False))
+
+    def _compile(self, count):
+        # Returns decoder of logs with 'count' topics, None if they don't fit
+        indexed = self.indexed
+        first = 0 if self.anonymous else 1
+        if indexed is None:
+            if not first <= count <= first + len(self.types):
+                return None
+            indexed = [i < count - first for i in range(len(self.types))]
+        elif sum(indexed) + first != count:
+            return None
+        topics, datas = [], []
+        for position, (abitype, isindexed) in enumerate(zip(self.types, indexed)):
+            if isindexed:
+                topics.append((position, _readTopic(abitype)))
+            else:
+                datas.append((position, abitype))
+        readers = [(_readerOf(t), t.dynamic, t.words * 32) for p, t in datas]
+        positions = [p for p, t in datas]
+        words = sum(t.words for p, t in datas) * 32
+        names, size = self.names, len(self.types)
+        # Static elementary arguments of Hexnumber logs are read straight
+        # from the join of topics and data, see '_hexReaderOf'
+        hexreaders = [(p, _hexReaderOf(self.types[p]), 66*k + 2)
+                      for k, (p, r) in enumerate(topics)]
+        hexreaders += [(p, _hexReaderOf(t), 66*len(topics) + 2 + 64*i)
+                       for i, (p, t) in enumerate(datas)]
+        if any(read is None for p, read, pos in hexreaders):
+            hexreaders = None
+        else:
+            hexreaders = [(read, pos) for p, read, pos in sorted(hexreaders)]
+        topicslen, datalen = 66 * len(topics), 2 + words * 2
+        def _decode(topiclist, data):
+            if hexreaders is not None and data[:2] == "0x":
+                joined = "".join(topiclist[first:]) + data
+                if len(joined) - len(data) != topicslen or len(data) < datalen:
+                    raise ValueError("Log does not fit %s" % self)
+                return dict(zip(names, [read(joined, pos) for read, pos in hexreaders]))
+            values = [None] * size
+            if topics:
+                view = memoryview(b"".join(_toBytes(t) for t in topiclist[first:]))
+                if len(view) != 32 * len(topics):
+                    raise ValueError("Topics of the log are not 32 bytes words")
+                pos = 0
+                for position, read in topics:
+                    values[position] = read(view, pos)
+                    pos += 32
+            if readers:
+                view = memoryview(_toBytes(data))
+                if len(view) < words:
+                    raise ValueError("Data is shorter than types require")
+                for position, value in zip(positions, _readItems(readers, view, 0)):
+                    values[position] = value
+            return dict(zip(names, values))
+        return _decode
+
+    def decoder(self, count):
+        """Returns function(topics, data) decoding arguments of logs with
+        the given number of topics, or None if the event has no such logs.
+        Parameters:
+        1. Number - number of topics of the log."""
+        try:
+            return self._decoders[count]
+        except KeyError:
+            decoder = self._decoders[count] = self._compile(count)
+            return decoder
+
+    def decode(self, log):
+        """Returns EventLog of the given log, raises ValueError if the log
+        does not fit the event.
+        Parameters:
+        1. Object|Log - log of 'eth_getLogs' or 'eth_getFilterChanges'."""
+        if isinstance(log, dict):
+            topics, data = log["topics"], log["data"]
+        else:
+            topics, data = log.topics, log.data
+        decoder = self.decoder(len(topics))
+        if decoder is None:
+            raise ValueError("Log with %d topics does not fit %s" % (len(topics), self))
+        return EventLog(self, decoder(topics, data), log)
+
+class EventRegistry(object):
+    """Decodes logs of many events. Topics of the events are indexed, so
+    every log is matched by a single dict lookup, e.g.:
+        events = EventRegistry([
+            "Transfer(address indexed from, address indexed to, uint256 value)",
+            ])
+        events.addABI(open("token.abi").read())
+        for log in events.decodeLogs(r.eth_getLogs(query)):
+            if isinstance(log, EventLog):
+                print log.name, log["value"]
+    Logs of unknown topics, and logs that do not fit the event, e.g. with
+    other number of topics, are returned untouched. Anonymous events are
+    not matched by topic and are decoded only by 'Event.decode'.
+    Logs may be JSON-RPC objects or 'Log' objects.
+    Parameters:
+    1. List - (optional) event signatures, ABI JSON entries or Events."""
+    def __init__(self, events=()):
+        self._index = {}
+        self.events = []
+        for event in events:
+            self.add(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def add(self, event):
+        """Registers the event and returns its Event. Events with the same
+        topic but other indexed arguments are tried in order of adding.
+        Parameters:
+        1. String|Object|Event - signature, ABI JSON entry or Event."""
+        if _isstring(event):
+            event = Event.fromSignature(event)
+        elif isinstance(event, dict):
+            event = Event.fromABI(event)
+        assert isinstance(event, Event), "Unsupported event %r" % type(event)
+        self.events.append(event)
+        if event.topic is not None:
+            topic = event.topic.lower()
+            for key in (topic, unhexlify(topic[2:])):
+                self._index.setdefault(key, []).append(event)
+        return event
+
+    def addABI(self, abi):
+        """Registers all events of the contract ABI and returns their list.
+        Parameters:
+        1. String|List - ABI JSON, or the decoded list of entries."""
+        if _isstring(abi):
+            abi = json.loads(abi)
+        return [self.add(entry) for entry in abi if entry.get("type") == "event"]
+
+    def get(self, topic):
+        """Returns list of Events of the topic, empty if unknown.
+        Parameters:
+        1. Hexnumber|bytes - topic of the event."""
+        events = self._index.get(topic)
+        if events is None and _isstring(topic) and not isinstance(topic, bytes):
+            events = self._index.get(topic.lower())
+        return list(events or ())
+
+    def decode(self, log):
+        """Returns EventLog of the log, or the log itself if its event is
+        unknown or the log does not fit it.
+        Parameters:
+        1. Object|Log - log of 'eth_getLogs' or 'eth_getFilterChanges'."""
+        return self.decodeLogs([log])[0]
+
+    def decodeLogs(self, logs):
+        """Returns list of EventLog of the logs in order of the logs, see
+        'decode'. Logs that do not fit their events, e.g. malformed data,
+        are returned untouched too.
+        Parameters:
+        1. Iterable - logs of 'eth_getLogs' or 'eth_getFilterChanges'."""
+        index = self._index
+        # Decoders by (topic, number of topics), None if no event fits
+        decoders = {}
+        decoded = []
+        append = decoded.append
+        for log in logs:
+            if isinstance(log, dict):
+                topics, data = log.get("topics"), log.get("data")
+            else:
+                topics, data = log.topics, log.data
+            if not topics:
+                append(log)
+                continue
+            key = (topics[0], len(topics))
+            try:
+                event, decoder = decoders[key]
+            except KeyError:
+                event, decoder = self._decoderOf(key)
+                decoders[key] = event, decoder
+            if decoder is None:
+                append(log)
+                continue
+            try:
+                append(EventLog(event, decoder(topics, data), log))
+            except (ValueError, UnicodeDecodeError):
+                append(log)
+        return decoded
+
+    def _decoderOf(self, key):
+        topic, count = key
+        events = self.get(topic)
+        for event in events:
+            decoder = event.decoder(count)
+            if decoder is not None:
+                return event, decoder
+        return None, None
@@ -0,0 +1,289 @@
+# -*- coding: utf8 -*-
+import itertools
+import pycurl
+try:
+    # Python3
+    from io import BytesIO
+except ImportError:
+    # Python 2
+    from StringIO import StringIO as BytesIO
+from .request import EthConnectionError, EthError, _parseResponse
+from .transport import HTTPTransport, EthTimeoutError, _curlError
+from .metrics import _timer
+
+# Seconds to wait for a call of a client without timeout
+_defaultTimeout = 60.0
+
+class _Fanout(object):
+    def __init__(self, client, concurrency, timeout=None):
+        assert concurrency > 0, "Concurrency must be positive"
+        if timeout is None:
+            timeout = getattr(client, "_timeout", None) or _defaultTimeout
+        self._client = client
+        self._concurrency = concurrency
+        self._timeout = timeout
+        self._active = {}
+        self._ids = itertools.count(1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def free(self):
+        "Returns number of calls that may be submitted without waiting."
+        return self._concurrency - len(self._active)
+
+    @property
+    def pending(self):
+        "Returns number of calls in flight."
+        return len(self._active)
+
+    def _start(self, method, params):
+        request = self._client._requestData.copy()
+        request.update({"method": method, "params": params, "id": next(self._ids)})
+        metrics = self._client._metrics
+        if metrics is not None:
+            metrics.before(request)
+        start = _timer()
+        postfields = self._client._codec.dumps(request)
+        return request, postfields, start, _timer()
+
+    def _result(self, call, body, response=None):
+        request, postfields, start, encoded = call
+        metrics = self._client._metrics
+        received = _timer()
+        if isinstance(body, EthConnectionError):
+            if metrics is not None:
+                durations = {"encode": encoded - start, "network": received - encoded}
+                metrics.record(request, None, durations, len(postfields), 0)
+            return body
+        invalid = None
+        if response is None:
+            try:
+                response = self._client._codec.loads(body)
+            except ValueError:
+                invalid = EthError("Invalid response: %s" % body[:200])
+        if metrics is not None:
+            # Network phase includes waiting for the poll
+            durations = {
+                "encode": encoded - start,
+                "network": received - encoded,
+                "decode": _timer() - received,
+                }
+            metrics.record(request, response, durations, len(postfields), len(body))
+        if invalid is not None:
+            return invalid
+        try:
+            return _parseResponse(response)
+        except EthError as exc:
+            return exc
+        except (AttributeError, TypeError):
+            return EthError("Invalid response: %s" % body[:200])
+
+    def run(self, calls, ordered=True, failfast=True):
+        """Generator of results of the given (method, params) pairs, see
+        'BaseRequest.fanout'. In ordered mode the calls are submitted at most
+        'concurrency' ahead of the last yielded one, so buffered results stay
+        bounded."""
+        def _value(value):
+            if failfast and isinstance(value, Exception):
+                raise value
+            return value
+        calls = iter(calls)
+        buffered = {}
+        submitted = nextindex = 0
+        exhausted = False
+        while True:
+            while not exhausted and self.free and (
+                    not ordered or submitted - nextindex < self._concurrency):
+                try:
+                    method, params = next(calls)
+                except StopIteration:
+                    exhausted = True
+                    break
+                self.submit(method, params, tag=submitted)
+                submitted += 1
+            if exhausted and not self._active and not buffered:
+                return
+            for index, value in self.poll():
+                if ordered:
+                    buffered[index] = value
+                else:
+                    yield index, _value(value)
+            while nextindex in buffered:
+                yield _value(buffered.pop(nextindex))
+                nextindex += 1
+
+class CurlFanout(_Fanout):
+    """Executes JSON-RPC calls of the given client concurrently on top of
+    pycurl.CurlMulti. Up to 'concurrency' easy handles are created once and
+    reused with their connections and response buffers for every call.
+    Parameters:
+    1. BaseRequest - client of HTTP transport which options are used for
+    the connections.
+    2. Number - (optional) maximum number of calls in flight.
+    3. Number - (optional) seconds to wait for a call, default is the
+    timeout of the client or 60 seconds. Calls timed out fail with
+    EthConnectionError."""
+    def __init__(self, client, concurrency=8, timeout=None):
+        assert isinstance(client._transport, HTTPTransport), \
+            "CurlFanout supports HTTP transport only, see 'openFanout'"
+        super(CurlFanout, self).__init__(client, concurrency, timeout)
+        self._multi = pycurl.CurlMulti()
+        self._free = []
+
+    def close(self):
+        "Aborts calls in flight and closes all connections."
+        for handle in list(self._active):
+            self._multi.remove_handle(handle)
+            self._free.append(handle)
+        self._active.clear()
+        for handle in self._free:
+            handle.close()
+        self._free = []
+        self._multi.close()
+
+    def _getHandle(self):
+        if self._free:
+            return self._free.pop()
+        handle = self._client._transport._setupCurl(pycurl.Curl())
+        handle.setopt(pycurl.TIMEOUT_MS, int(self._timeout * 1000))
+        return handle
+
+    def submit(self, method, params=[], tag=None):
+        """Starts the call without waiting for the result, which is returned
+        by 'poll' paired with the given tag."""
+        assert self.free, "No free connections, poll the results first"
+        call = self._start(method, params)
+        handle = self._getHandle()
+        buff = BytesIO()
+        handle.setopt(pycurl.POSTFIELDS, call[1])
+        handle.setopt(pycurl.WRITEDATA, buff)
+        self._active[handle] = (tag, buff, call)
+        self._multi.add_handle(handle)
+
+    def _finish(self, handle, failed, code=None):
+        self._multi.remove_handle(handle)
+        tag, buff, call = self._active.pop(handle)
+        self._free.append(handle)
+        if failed:
+            body = _curlError(self._client._host, self._client._port, code)
+        else:
+            body = buff.getvalue()
+        return tag, self._result(call, body)
+
+    def _collect(self):
+        while self._multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+            pass
+        done = []
+        while True:
+            queued, ok, failed = self._multi.info_read()
+            done.extend(self._finish(handle, False) for handle in ok)
+            done.extend(self._finish(handle, True, code) for handle, code, _ in failed)
+            if not queued:
+                return done
+
+    def poll(self, timeout=1.0):
+        """Waits up to 'timeout' seconds for any call in flight to complete
+        and returns list of (tag, result) pairs of completed calls. Failed
+        calls have EthError or EthConnectionError instance in place of the
+        result."""
+        done = self._collect()
+        if not done and self._active:
+            self._multi.select(timeout)
+            done = self._collect()
+        return done
+
+class PipelineFanout(_Fanout):
+    """Executes JSON-RPC calls of the given client concurrently over a
+    channel of its transport, see 'Transport.open'. Over IPC up to
+    'concurrency' calls are written to a single connection without waiting
+    for the responses, which are matched by id. Has the same interface as
+    'CurlFanout'.
+    Parameters:
+    1. BaseRequest - client which transport is used.
+    2. Number - (optional) maximum number of calls in flight.
+    3. Number - (optional) seconds to wait for a response, default is the
+    timeout of the client or 60 seconds. Calls not answered in time fail
+    with EthConnectionError, their late responses are dropped."""
+    def __init__(self, client, concurrency=8, timeout=None):
+        super(PipelineFanout, self).__init__(client, concurrency, timeout)
+        self._channel = client._transport.open()
+        self._failed = None
+
+    def close(self):
+        "Aborts calls in flight and closes the channel."
+        self._active.clear()
+        self._channel.close()
+
+    def submit(self, method, params=[], tag=None):
+        """Starts the call without waiting for the result, which is returned
+        by 'poll' paired with the given tag."""
+        assert self.free, "No free connections, poll the results first"
+        call = self._start(method, params)
+        self._active[call[0]["id"]] = (tag, call)
+        try:
+            self._channel.write(call[1])
+        except EthConnectionError as exc:
+            self._failed = exc
+
+    def _failAll(self, exc):
+        done = [(tag, self._result(call, exc)) for tag, call in self._active.values()]
+        self._active.clear()
+        return done
+
+    def poll(self, timeout=1.0):
+        """Waits up to 'timeout' seconds for any call in flight to complete
+        and returns list of (tag, result) pairs of completed calls. Failed
+        calls have EthError or EthConnectionError instance in place of the
+        result."""
+        if self._failed is not None:
+            # Channel is broken, calls in flight are lost
+            exc, self._failed = self._failed, None
+            return self._failAll(exc)
+        if not self._active:
+            return []
+        # Waits no longer than until the first call times out
+        first = min(call[3] for tag, call in self._active.values())
+        timeout = max(0, min(timeout, first + self._timeout - _timer()))
+        try:
+            bodies = self._channel.read(timeout)
+        except EthConnectionError as exc:
+            return self._failAll(exc)
+        done = []
+        for body in bodies:
+            try:
+                response = self._client._codec.loads(body)
+                key = response.get("id")
+            except (ValueError, AttributeError):
+                continue
+            if key not in self._active:
+                continue
+            tag, call = self._active.pop(key)
+            done.append((tag, self._result(call, body, response)))
+        return done + self._expire()
+
+    def _expire(self):
+        # Call is timed out since it was written to the channel
+        deadline = _timer() - self._timeout
+        expired = [key for key, (tag, call) in self._active.items() if call[3] < deadline]
+        done = []
+        for key in expired:
+            tag, call = self._active.pop(key)
+            exc = EthTimeoutError(self._client._host,
+                                  reason="No response in %s seconds" % self._timeout)
+            done.append((tag, self._result(call, exc)))
+        return done
+
+def openFanout(client, concurrency=8, timeout=None):
+    """Returns CurlFanout of clients of HTTP transport, else PipelineFanout.
+    Parameters:
+    1. BaseRequest - client which calls are made.
+    2. Number - (optional) maximum number of calls in flight.
+    3. Number - (optional) seconds to wait for a call, see 'PipelineFanout'."""
+    if isinstance(client._transport, HTTPTransport):
+        return CurlFanout(client, concurrency, timeout)
+    return PipelineFanout(client, concurrency, timeout)
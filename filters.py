@@ -0,0 +1,175 @@
+# -*- coding: utf8 -*-
+import threading
+from .request import EthError, EthConnectionError
+
+class _Filter(object):
+    __slots__ = ("kind", "data", "filterId", "callback", "queue")
+
+    def __init__(self, kind, data, callback, queue):
+        self.kind = kind
+        self.data = data
+        self.filterId = None
+        self.callback = callback
+        self.queue = queue
+
+class FilterManager(object):
+    """Polls many installed filters with a single batch request per tick and
+    dispatches their changes, e.g.:
+        with FilterManager(r) as fm:
+            fm.add("blocks", callback=onBlocks)
+            fm.add("logs", {"address": token}, queue=logsQueue)
+            fm.start()
+            ...
+    Polling interval is divided by 'backoff' after a tick with changes down
+    to 'mininterval', and multiplied by it after an idle tick up to
+    'maxinterval'. Filters expired by the node are installed again.
+    Failures of the node or of single filters do not stop background
+    polling, the interval is raised as after an idle tick and the last
+    failure is kept in 'error' until a poll succeeds.
+    Parameters:
+    1. Request - client of the node.
+    2. Number - (optional) minimal polling interval in seconds.
+    3. Number - (optional) maximal polling interval in seconds.
+    4. Number - (optional) factor of interval changes."""
+    kinds = ("logs", "blocks", "pending")
+
+    def __init__(self, client, mininterval=0.5, maxinterval=8.0, backoff=2.0):
+        assert 0 < mininterval <= maxinterval, "Invalid polling intervals"
+        assert backoff >= 1, "Backoff must be at least 1"
+        self._client = client
+        self._filters = {}
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.mininterval = mininterval
+        self.maxinterval = maxinterval
+        self.backoff = backoff
+        self.interval = mininterval
+        self.error = None
+        self.exception = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _install(self, flt):
+        if flt.kind == "logs":
+            flt.filterId = self._client.eth_newFilter(flt.data)
+        elif flt.kind == "blocks":
+            flt.filterId = self._client.eth_newBlockFilter
+        else:
+            flt.filterId = self._client.eth_newPendingTransactionFilter
+
+    def add(self, kind, data=None, callback=None, queue=None):
+        """Installs filter and returns its handle for 'remove'. Every poll
+        with changes calls callback with the list of changes and puts every
+        change to the queue.
+        Parameters:
+        1. String - 'logs', 'blocks' or 'pending'.
+        2. Object - filter options of 'eth_newFilter' for 'logs' filters.
+        3. Function - (optional) callback of the list of changes.
+        4. Queue - (optional) queue of changes."""
+        assert kind in self.kinds, "Unknown filter kind %r" % kind
+        assert kind != "logs" or isinstance(data, dict), "Given Data must be a type of dict"
+        flt = _Filter(kind, data, callback, queue)
+        self._install(flt)
+        with self._lock:
+            self._filters[id(flt)] = flt
+        return id(flt)
+
+    def remove(self, handle):
+        "Uninstalls filter of the given handle."
+        with self._lock:
+            flt = self._filters.pop(handle)
+        try:
+            self._client.eth_uninstallFilter(flt.filterId)
+        except (EthError, EthConnectionError):
+            # Filters of an unreachable node expire there
+            pass
+
+    def poll(self):
+        """Polls all filters in a single batch request, dispatches changes and
+        adapts the interval. Returns number of changes. Raises
+        EthConnectionError if the node is unreachable, or the first EthError
+        of filters once changes of the other filters are dispatched."""
+        with self._lock:
+            filters = list(self._filters.values())
+        if not filters:
+            return 0
+        batch = self._client.batch()
+        results = [batch.eth_getFilterChanges(flt.filterId) for flt in filters]
+        try:
+            batch.execute()
+        except EthConnectionError:
+            self.interval = min(self.maxinterval, self.interval * self.backoff)
+            raise
+        except EthError:
+            pass
+        count = 0
+        errors = []
+        for flt, result in zip(filters, results):
+            try:
+                changes = result.result
+            except EthError as exc:
+                if "not found" not in exc.message:
+                    errors.append(exc)
+                    continue
+                try:
+                    self._install(flt)
+                except (EthError, EthConnectionError) as exc:
+                    errors.append(exc)
+                continue
+            if not changes:
+                continue
+            count += len(changes)
+            if flt.callback is not None:
+                flt.callback(changes)
+            if flt.queue is not None:
+                for change in changes:
+                    flt.queue.put(change)
+        if count:
+            self.interval = max(self.mininterval, self.interval / self.backoff)
+        else:
+            self.interval = min(self.maxinterval, self.interval * self.backoff)
+        if errors:
+            raise errors[0]
+        return count
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self.poll()
+                    self.error = None
+                except (EthError, EthConnectionError) as exc:
+                    # Transient, the next poll is after the raised interval
+                    self.error = exc
+                self._stopped.wait(self.interval)
+        except Exception as exc:
+            self.exception = exc
+
+    def start(self):
+        "Starts polling in the background thread."
+        assert self._thread is None, "Polling is already started"
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, uninstall=True):
+        """Stops background polling and uninstalls all filters. Raises the
+        exception that stopped polling, if any."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        if uninstall:
+            with self._lock:
+                handles = list(self._filters)
+            for handle in handles:
+                self.remove(handle)
+        exc, self.exception = self.exception, None
+        if exc is not None:
+            raise exc
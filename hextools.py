@@ -1,7 +1,12 @@
 # -*- coding: utf8 -*-
 import sys
-from binascii import unhexlify
-import json
+from binascii import hexlify, unhexlify
+import json, collections
+from .keccak import keccak256 as _keccak256
+from .cache import LRUCache
+
+_signatures = LRUCache(maxsize=4096)
+_precomputed = {}
 
 def _push(data, floated=False):
     def _zeroes(part, padn):
@@ -147,6 +152,53 @@ def encodeData(data):
     else:
         raise ValueError("Unsupported data format")
 
+def sha3(data):
+    """Returns Keccak-256 of the given data computed locally, equals to
+    'web3_sha3' result.
+    Parameters:
+    1. Hexnumber|String - the data, Hexnumber is hashed as bytes it encodes,
+    see 'toHex'."""
+    if _isstring(data) and not isinstance(data, bytes):
+        try:
+            data = unhexlify(data[2:]) if data[:2] == "0x" else data.encode("utf8")
+        except (TypeError, ValueError):
+            data = data.encode("utf8")
+    return "0x" + hexlify(_keccak256(data)).decode("ascii")
+
+def _signatureHash(signature):
+    hashed = _precomputed.get(signature)
+    if hashed is None:
+        hashed = _signatures.get(signature)
+        if hashed is None:
+            hashed = sha3(signature)
+            _signatures.put(signature, hashed)
+    return hashed
+
+def methodID(signature):
+    """Returns 4 bytes function ID of the given signature computed locally,
+    same as 'getMethodID(r.web3_sha3(toHex(signature)))'.
+    Parameters:
+    1. String - function signature, e.g. 'transfer(address,uint256)'."""
+    return _signatureHash(signature)[:10]
+
+def eventTopic(signature):
+    """Returns 32 bytes topic of the given event signature computed locally.
+    Parameters:
+    1. String - event signature, e.g. 'Transfer(address,address,uint256)'."""
+    return _signatureHash(signature)
+
+def loadSignatures(path):
+    """Loads precomputed hashes of signatures used by 'methodID' and
+    'eventTopic'. Loaded hashes are not evicted from the cache.
+    Parameters:
+    1. String - path of JSON file with object of {signature: 32 bytes hash}."""
+    with open(path) as f:
+        table = json.load(f)
+    for signature, hashed in table.items():
+        assert _checkForHex(hashed) and len(hashed) == 66, \
+            "Hash of %s must be 32 bytes Hexnumber" % signature
+    _precomputed.update(table)
+
 def getMethodID(signature):
     """Returns 4 bytes of sha3 function signature as function ID to give in 'getData'"""
     assert _checkForHex(signature), "Given signature not in hex format"
@@ -171,8 +223,7 @@ def getData(params, data=None):
     def _paramsMapper(param):
         isstring = _isstring(param)
         if isinstance(param, list):
-            param.insert(0, len(param))
-            return [1, param]
+            return [1, [len(param)] + param]
         elif isstring:
             isHex = _checkForHex(param)
             if isHex or param.isdigit():
@@ -210,6 +261,7 @@ def decodeArgData(data, types=()):
     To decode data make sure that the given list of types have the same
     sequence as contract returns, otherwise function returns exception.
     To decode automatically simple results see 'decodeData'.
+    To decode many results of the same types see 'abi.Decoder'.
     Parameters:
     1. Hexnumber - result that contract returns
     2. Equal sequence of Solidity types placed to the Python tuple.
@@ -298,62 +350,97 @@ def toUnicode(word):
     assert word is not None or not _checkForHex(word), _exc
     return unhexlify(word[2:])
 
+def _scanData(data, raw):
+    # Classifies words walking backwards, same as 'decodeData' always did.
+    # Items are word indexes, or strings as pairs of [first, last] runs of
+    # words in reversed order, and whether the last word of the first run is
+    # cleaned of zero bytes. Positions of string offsets are kept in a deque
+    # with a set for lookups.
+    items = []
+    runs = None
+    strlen = 0
+    positions = collections.deque()
+    members = set()
+    zero = b"\x00"
+    for i in range(len(raw)//32 - 1, -1, -1):
+        word = raw[32*i:32*i+32]
+        zerohead, zerotail = word[:1] == zero, word[31:] == zero
+        if zerotail and not zerohead:
+            # last line of string, or bytes10 string before the previous one
+            if runs is not None:
+                items.append((runs, cleaned))
+            runs, cleaned = [[i, i]], True
+            strlen = 32 - word.count(zero)
+        elif not zerohead:
+            # if multiply lines in string
+            if runs is None:
+                runs, cleaned = [[i, i]], False
+            elif runs[-1][0] == i + 1:
+                runs[-1][0] = i
+            else:
+                runs.append([i, i])
+            strlen += 32
+        else:
+            value = int(data[2+64*i:66+64*i], 16)
+            if runs is not None and value == strlen:
+                # line that contains length of string
+                items.append((runs, cleaned))
+                runs, strlen = None, 0
+                positions.appendleft(i)
+                members.add(i)
+            elif value % 32 or value // 32 not in members:
+                if runs is not None:
+                    items.append((runs, cleaned))
+                    runs, strlen = None, 0
+                items.append(i)
+            elif positions:
+                # line contains start byte of string
+                members.discard(positions.pop())
+    # String reaching the first word is dropped, as it always was
+    return items
+
+def _joinRuns(buff, runs, cleaned, size, clean):
+    parts = [buff[size*first:size*last+size] for first, last in reversed(runs)]
+    if cleaned:
+        parts[-1] = parts[-1][:-size] + clean(parts[-1][-size:])
+    return parts
+
+def _iterDecoded(data, raw):
+    zero = b"\x00"
+    for item in reversed(_scanData(data, raw)):
+        if isinstance(item, tuple):
+            runs, cleaned = item
+            string = b"".join(_joinRuns(raw, runs, cleaned, 32,
+                                        lambda word: word.replace(zero, b"")))
+            try:
+                string = string.decode("utf8")
+            except UnicodeDecodeError:
+                string = "0x" + "".join(_joinRuns(data[2:], runs, cleaned, 64,
+                                                  lambda word: "".join(_breakline(word))))
+            yield string
+        elif 32 - raw[32*item:32*item+32].count(zero) < 18:
+            yield int(data[2+64*item:66+64*item], 16)
+        else:
+            yield "0x" + "".join(_breakline(data[2+64*item:66+64*item]))
+
+def iterDecodeData(data):
+    """Returns iterator of values of 'decodeData'. It is not incremental:
+    kind of a word depends on the words after it, so the whole result is
+    converted to bytes and scanned before the first value. Only building of
+    values, e.g. decoding of strings, is deferred until they are reached.
+    Parameters:
+    1. Hexnumber - result that contract returns"""
+    _assertNotString(data)
+    assert data is not None or _checkForHex(data), _exc
+    assert not (len(data)-2) % 64, "Unknown length of bytes"
+    if data == u"0x":
+        return iter([hex(0)])
+    return _iterDecoded(data, unhexlify(data[2:]))
+
 def decodeData(data):
     """Returns list of fully decoded Data received from active
     contract on blockchain.
     To decode more complex results see 'decodeArgData'.
     Parameters:
     1. Hexnumber - result that contract returns"""
-    _assertNotString(data)
-    assert data is not None or _checkForHex(data), _exc
-    assert not (len(data)-2) % 64, "Unknown length of bytes"
-    if data == u"0x": return [hex(0)]
-    def _decode(line):
-        if isinstance(line, tuple):
-            try:
-                return toUnicode(line[0]).decode("utf8")
-            except UnicodeDecodeError:
-                return line[0]
-        else:
-            return decodeWord(line)
-    data = data[2:]
-    counter = len(data) + 64
-    lines = _breakline(data, s=64, clean=False)
-    decoded = []
-    strline = ""
-    empty = u"00"
-    linepos = []
-    lenlines = len(lines)
-    for i in range(lenlines-1, -1, -1):
-        l = lines[i]
-        hexline = "0x" + l
-        zerohead, zerotail = l.startswith(empty), l.endswith(empty)
-        # check for last line of string
-        if zerotail and not zerohead and not strline:
-            l = "".join(_breakline(l))
-            strline = l + strline
-        # check for bytes10 string
-        elif zerotail and not zerohead and strline:
-            decoded.append(("0x" + strline,))
-            strline = ""
-            l = "".join(_breakline(l))
-            strline = l + strline
-        # if multiply lines in string
-        elif not zerotail and not zerohead:
-            strline = l + strline
-        # check for line that contains length of string
-        elif zerohead and int(hexline, 0) == len(strline)//2 and strline:
-            decoded.append(("0x" + strline,))
-            strline = ""
-            linepos.insert(0, float(i))
-        # if not string or bytes10 types just append
-        elif int(hexline, 0)/32.0 not in linepos:
-            if strline:
-                decoded.append(("0x" + strline,))
-                strline = ""
-            decoded.extend(["0x" + l])
-        # if line contains start byte of string
-        else:
-            if linepos:
-                linepos.pop()
-    return list(map(_decode, reversed(decoded)))
+    return list(iterDecodeData(data))
@@ -0,0 +1,80 @@
+# -*- coding: utf8 -*-
+"""Keccak-256 as used by Ethereum (original Keccak padding, not the
+standardized SHA3-256). Uses pycryptodome or pysha3 when installed, else
+falls back to the pure Python implementation."""
+import struct
+
+def _roundConstants():
+    def _rc(t):
+        if t % 255 == 0:
+            return 1
+        r = 1
+        for i in range(t % 255):
+            r <<= 1
+            if r & 0x100:
+                r ^= 0x171
+        return r & 1
+    constants = []
+    for i in range(24):
+        rc = 0
+        for j in range(7):
+            rc |= _rc(j + 7*i) << (2**j - 1)
+        constants.append(rc)
+    return constants
+
+def _rotations():
+    rotations = [0] * 25
+    x, y = 1, 0
+    for t in range(24):
+        rotations[x + 5*y] = ((t + 1) * (t + 2) // 2) % 64
+        x, y = y, (2*x + 3*y) % 5
+    return rotations
+
+_RC = _roundConstants()
+_ROT = _rotations()
+# Destination lane of every source lane after rho and pi steps
+_PI = [y + 5*((2*x + 3*y) % 5) for y in range(5) for x in range(5)]
+_MASK = (1 << 64) - 1
+_RATE = 136
+
+def _keccakf(a):
+    for rc in _RC:
+        c = [a[x] ^ a[x+5] ^ a[x+10] ^ a[x+15] ^ a[x+20] for x in range(5)]
+        d = [c[x-1] ^ ((c[(x+1) % 5] << 1 | c[(x+1) % 5] >> 63) & _MASK) for x in range(5)]
+        b = [0] * 25
+        for i in range(25):
+            lane, rot = a[i] ^ d[i % 5], _ROT[i]
+            b[_PI[i]] = (lane << rot | lane >> (64 - rot)) & _MASK if rot else lane
+        a = [b[i] ^ (~b[i - i % 5 + (i+1) % 5] & b[i - i % 5 + (i+2) % 5]) for i in range(25)]
+        a[0] ^= rc
+    return a
+
+def _keccak256(data):
+    data = bytearray(data)
+    padlen = _RATE - len(data) % _RATE
+    data += b"\x00" * padlen
+    data[len(data) - padlen] ^= 0x01
+    data[-1] ^= 0x80
+    state = [0] * 25
+    for offset in range(0, len(data), _RATE):
+        lanes = struct.unpack_from("<17Q", bytes(data[offset:offset+_RATE]))
+        for i in range(17):
+            state[i] ^= lanes[i]
+        state = _keccakf(state)
+    return struct.pack("<4Q", *state[:4])
+
+try:
+    from Crypto.Hash import keccak as _cryptodome
+
+    def keccak256(data):
+        "Returns 32 bytes Keccak-256 digest of the given bytes."
+        return _cryptodome.new(digest_bits=256, data=bytes(data)).digest()
+except ImportError:
+    try:
+        import sha3 as _pysha3
+
+        def keccak256(data):
+            "Returns 32 bytes Keccak-256 digest of the given bytes."
+            return _pysha3.keccak_256(bytes(data)).digest()
+    except ImportError:
+        keccak256 = _keccak256
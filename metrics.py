@@ -0,0 +1,168 @@
+# -*- coding: utf8 -*-
+import threading, time, bisect
+
+try:
+    _timer = time.perf_counter
+except AttributeError:
+    # Python 2
+    _timer = time.time
+
+_phases = ("encode", "network", "decode")
+
+class _Histogram(object):
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+class _MethodStats(object):
+    __slots__ = ("calls", "errors", "sent", "received", "phases")
+
+    def __init__(self, size):
+        self.calls = 0
+        self.errors = 0
+        self.sent = 0
+        self.received = 0
+        self.phases = dict((phase, _Histogram(size)) for phase in _phases)
+
+def _calls(requestData, response):
+    "Returns list of (method, failed) pairs of calls of the request."
+    if not isinstance(requestData, list):
+        failed = not isinstance(response, dict) or "error" in response
+        return [(requestData.get("method", ""), failed)]
+    responses = {}
+    if isinstance(response, list):
+        # Batch rejected as a whole has a single error object
+        responses = dict((r.get("id"), r) for r in response if isinstance(r, dict))
+    calls = []
+    for request in requestData:
+        reply = responses.get(request.get("id"))
+        calls.append((request.get("method", ""), reply is None or "error" in reply))
+    return calls
+
+class Metrics(object):
+    """Per method instrumentation of the client calls, e.g.:
+        metrics = Metrics()
+        r = Request(host, port, metrics=metrics)
+        ...
+        print(metrics.prometheus())
+    Records number of calls and errors, bytes of requests and responses, and
+    latency histograms of the encode, network and decode phases. Calls of
+    batches are recorded by their methods, each with durations of the batch
+    and equal share of its bytes. Calls failed to connect, returned error,
+    or invalid JSON are counted as errors.
+    Hooks added by 'addHook' are called before every call with the request
+    data, and after it with the request data, response (None on connection
+    errors and invalid responses) and dict of phase durations in seconds.
+    Parameters:
+    1. Sequence - (optional) upper bounds of histogram buckets in seconds."""
+    buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+               0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=None):
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._methods = {}
+        self._before = []
+        self._after = []
+
+    def addHook(self, before=None, after=None):
+        """Adds callbacks before(requestData) and
+        after(requestData, response, durations)."""
+        if before is not None:
+            self._before.append(before)
+        if after is not None:
+            self._after.append(after)
+
+    def before(self, requestData):
+        for hook in self._before:
+            hook(requestData)
+
+    def record(self, requestData, response, durations, sent, received):
+        """Records the call.
+        Parameters:
+        1. Object|Array - request data, or batch of them.
+        2. Object|Array - response, None if the call failed to connect or
+        the response is invalid.
+        3. Object - durations of phases in seconds, e.g. {"network": 0.01}.
+        4. Number - bytes of the request.
+        5. Number - bytes of the response."""
+        calls = _calls(requestData, response)
+        count = len(calls)
+        buckets = [bisect.bisect_left(self.buckets, d) for d in durations.values()]
+        with self._lock:
+            for i, (method, failed) in enumerate(calls):
+                stats = self._methods.get(method)
+                if stats is None:
+                    stats = self._methods[method] = _MethodStats(len(self.buckets) + 1)
+                stats.calls += 1
+                stats.errors += 1 if failed else 0
+                # Remainders of the shares go to the first call
+                stats.sent += sent // count + (sent % count if i == 0 else 0)
+                stats.received += received // count + (received % count if i == 0 else 0)
+                for (phase, duration), bucket in zip(durations.items(), buckets):
+                    histogram = stats.phases[phase]
+                    histogram.counts[bucket] += 1
+                    histogram.sum += duration
+                    histogram.count += 1
+        for hook in self._after:
+            hook(requestData, response, durations)
+
+    def reset(self):
+        "Removes all recorded data."
+        with self._lock:
+            self._methods.clear()
+
+    def snapshot(self):
+        """Returns dict of recorded data by method:
+        {method: {"calls", "errors", "sent", "received",
+                  "encode"|"network"|"decode": {"count", "sum", "buckets"}}}
+        where buckets are cumulative counts by upper bounds."""
+        snapshot = {}
+        with self._lock:
+            for method, stats in self._methods.items():
+                item = {"calls": stats.calls, "errors": stats.errors,
+                        "sent": stats.sent, "received": stats.received}
+                for phase, histogram in stats.phases.items():
+                    cumulative, total = [], 0
+                    for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                        total += count
+                        cumulative.append((bound, total))
+                    item[phase] = {"count": histogram.count, "sum": histogram.sum,
+                                   "buckets": cumulative}
+                snapshot[method] = item
+        return snapshot
+
+    def prometheus(self, prefix="pyethtools_rpc"):
+        "Returns recorded data in Prometheus text exposition format."
+        snapshot = self.snapshot()
+        lines = []
+        counters = (
+            ("calls_total", "calls", "JSON-RPC calls."),
+            ("errors_total", "errors", "JSON-RPC calls failed to connect or returned error."),
+            ("request_bytes_total", "sent", "Bytes of JSON-RPC requests."),
+            ("response_bytes_total", "received", "Bytes of JSON-RPC responses."),
+            )
+        for name, key, text in counters:
+            lines.append("# HELP %s_%s %s" % (prefix, name, text))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+            for method in sorted(snapshot):
+                lines.append('%s_%s{method="%s"} %s' % (prefix, name, method, snapshot[method][key]))
+        name = "%s_duration_seconds" % prefix
+        lines.append("# HELP %s Duration of JSON-RPC call phases." % name)
+        lines.append("# TYPE %s histogram" % name)
+        for method in sorted(snapshot):
+            for phase in _phases:
+                histogram = snapshot[method][phase]
+                if not histogram["count"]:
+                    continue
+                labels = 'method="%s",phase="%s"' % (method, phase)
+                for bound, count in histogram["buckets"]:
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, le, count))
+                lines.append("%s_sum{%s} %r" % (name, labels, histogram["sum"]))
+                lines.append("%s_count{%s} %d" % (name, labels, histogram["count"]))
+        return "\n".join(lines) + "\n"
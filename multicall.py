@@ -0,0 +1,164 @@
+# -*- coding: utf8 -*-
+from binascii import hexlify
+from .request import BatchResult, EthError
+from .abi import Encoder, Decoder
+
+# Multicall3, deployed at the same address on most chains
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Runtime code injected by the state override of 'eth_call'. It accepts
+# 'aggregate3((address,bool,bytes)[])' calldata of Multicall3 and returns
+# the same '(bool,bytes)[]', except failed calls never revert the whole
+# call, 'allowFailure' is ignored. Assembled from, stack top is on right:
+#   PUSH1 4 CALLDATALOAD PUSH1 4 ADD            [arr]
+#   DUP1 CALLDATALOAD SWAP1 PUSH1 32 ADD        [n heads]
+#   PUSH1 32 PUSH1 0 MSTORE                     mem[0] = 32
+#   DUP2 PUSH1 32 MSTORE                        mem[32] = n
+#   PUSH1 0 DUP3 PUSH1 5 SHL PUSH1 64 ADD       [n heads i=0 out=64+32n]
+#   loop: JUMPDEST
+#   DUP4 DUP3 EQ PUSH2 end JUMPI
+#   DUP2 PUSH1 5 SHL DUP4 ADD CALLDATALOAD DUP4 ADD
+#                                               [.. out t], t = tuple i
+#   DUP1 CALLDATALOAD SWAP1                     [.. out target t]
+#   DUP1 PUSH1 64 ADD CALLDATALOAD ADD          [.. out target d]
+#   DUP1 CALLDATALOAD                           [.. out target d len]
+#   DUP1 DUP3 PUSH1 32 ADD DUP6 PUSH1 96 ADD CALLDATACOPY
+#                                               mem[out+96] = calldata
+#   PUSH1 0 PUSH1 0 DUP3 DUP7 PUSH1 96 ADD PUSH1 0 DUP8 GAS CALL
+#   SWAP3 POP POP POP                           [.. out success]
+#   DUP2 MSTORE                                 mem[out] = success
+#   PUSH1 64 DUP2 PUSH1 32 ADD MSTORE           mem[out+32] = 64
+#   RETURNDATASIZE                              [.. out rs]
+#   DUP1 DUP3 PUSH1 64 ADD MSTORE               mem[out+64] = rs
+#   DUP1 PUSH1 0 DUP4 PUSH1 96 ADD RETURNDATACOPY
+#                                               mem[out+96] = returndata
+#   PUSH1 0 DUP2 DUP4 ADD PUSH1 96 ADD MSTORE   zero padding
+#   PUSH1 64 DUP3 SUB DUP4 PUSH1 5 SHL PUSH1 64 ADD MSTORE
+#                                               mem[64+32i] = out-64
+#   PUSH1 31 ADD PUSH1 31 NOT AND ADD PUSH1 96 ADD
+#                                               [n heads i out]
+#   SWAP1 PUSH1 1 ADD SWAP1 PUSH2 loop JUMP
+#   end: JUMPDEST PUSH1 0 RETURN                return mem[0:out]
+_aggregatorCode = (
+    "0x60043560040180359060200160206000528160205260008260051b6040015b8382"
+    "14610097578160051b83013583018035908060400135018035808260200185606001"
+    "376000600082866060016000875af1925050508152604081602001523d8082604001"
+    "52806000836060013e600081830160600152604082038360051b60400152601f0160"
+    "1f191601606001906001019061001e565b6000f3")
+
+_aggregate3 = Encoder("aggregate3((address,bool,bytes)[])")
+_results = Decoder("(bool,bytes)[]")
+
+class MulticallResult(BatchResult):
+    """Placeholder of a single call result in the Multicall, see
+    BatchResult. After execution 'success' is False if the call reverted,
+    then 'result' raises EthExecutionError with the revert data. 'data'
+    is the returned Hexnumber."""
+    def __init__(self, formatter=None):
+        super(MulticallResult, self).__init__(None, formatter)
+        self.success = None
+        self.data = None
+
+    def _setReturn(self, success, data):
+        self.success = success
+        self.data = "0x" + hexlify(data).decode("ascii")
+        if success:
+            self._set({"result": self.data})
+        else:
+            self._set({"error": {"code": 3, "message": "execution reverted", "data": self.data}})
+
+    def _setError(self, exc):
+        self.success = False
+        self._exc, self._done = exc, True
+
+class Multicall(object):
+    """Aggregates many 'eth_call' reads into calls of the aggregator
+    contract, every call of the node executes 'size' reads, e.g.:
+        balanceOf = Encoder("balanceOf(address)")
+        with Multicall(r) as m:
+            balances = [m.call(token, balanceOf.encode([holder]), "uint256")
+                        for token in tokens]
+        balances = [b.result[0] for b in balances if b.success]
+    Aggregator calls of a single execution are sent in one JSON-RPC batch.
+    By default the aggregator code is injected at 'address' by the state
+    override of 'eth_call', so no deployed contract is needed. With
+    'override' False the contract deployed at 'address', e.g. Multicall3,
+    is called.
+    Parameters:
+    1. Request - client of the node.
+    2. DATA, 20 Bytes - (optional) address of the aggregator.
+    3. Boolean - (optional) inject the aggregator code by state override.
+    4. Number - (optional) maximum number of reads in a single call.
+    5. QUANTITY|TAG - (optional) block of the reads.
+    6. QUANTITY - (optional) gas of a single aggregator call."""
+    def __init__(self, client, address=MULTICALL3, override=True, size=500,
+                 block="latest", gas=None):
+        assert size > 0, "Size must be positive"
+        self._client = client
+        self._calls = []
+        self._decoders = {}
+        self.address = address
+        self.overrides = {address: {"code": _aggregatorCode}} if override else None
+        self.size = size
+        self.block = block
+        self.gas = gas
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, *exc):
+        if exctype is None:
+            self.execute()
+
+    def _decoder(self, types):
+        key = repr(types)
+        decoder = self._decoders.get(key)
+        if decoder is None:
+            decoder = self._decoders[key] = Decoder(types)
+        return decoder
+
+    def call(self, target, data, types=None):
+        """Collects the read and returns its MulticallResult. Result is the
+        returned Hexnumber, or list of values decoded by 'abi.Decoder' if
+        types are given.
+        Parameters:
+        1. DATA, 20 Bytes - address of the called contract.
+        2. DATA - methodID with encoded arguments, see 'abi.Encoder'.
+        3. Tuple|String - (optional) types of 'hextools.decodeArgData' or
+        Solidity types, see 'abi.Decoder'."""
+        formatter = None if types is None else self._decoder(types).decode
+        result = MulticallResult(formatter)
+        self._calls.append((target, data, result))
+        return result
+
+    def execute(self):
+        """Sends collected reads and returns list of their results in order
+        of the reads, None for failed reads, see their MulticallResult."""
+        calls, self._calls = self._calls, []
+        chunks = [calls[i:i+self.size] for i in range(0, len(calls), self.size)]
+        batch = self._client.batch()
+        aggregated = []
+        for chunk in chunks:
+            tx = {"to": self.address,
+                  "data": _aggregate3.encode([[(t, True, d) for t, d, r in chunk]])}
+            if self.gas is not None:
+                tx["gas"] = hex(self.gas) if isinstance(self.gas, int) else self.gas
+            aggregated.append(batch.eth_call(tx, block=self.block, overrides=self.overrides))
+        try:
+            batch.execute()
+        except EthError:
+            # Errors of aggregator calls are set to their reads below
+            pass
+        for chunk, call in zip(chunks, aggregated):
+            try:
+                returned = _results.decode(call.result)[0]
+            except Exception as exc:
+                for t, d, r in chunk:
+                    r._setError(exc)
+                continue
+            for (t, d, r), (success, data) in zip(chunk, returned):
+                r._setReturn(success, data)
+        return [r._result if r._exc is None else None for t, d, r in calls]
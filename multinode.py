@@ -0,0 +1,243 @@
+# -*- coding: utf8 -*-
+import threading, time
+from .request import BaseRequest, Request, PersonalRequest, EthConnectionError
+from .fanout import _Fanout, openFanout
+from .metrics import _timer
+
+# Calls that change the node state or depend on the state of the node they
+# were sent to, so they are always sent to the primary node
+_pinned = set([
+    "eth_sendTransaction", "eth_sendRawTransaction", "eth_sign",
+    "eth_newFilter", "eth_newBlockFilter", "eth_newPendingTransactionFilter",
+    "eth_uninstallFilter", "eth_getFilterChanges", "eth_getFilterLogs",
+])
+
+def _isPinned(method):
+    return method in _pinned or method.startswith("personal_")
+
+class _Endpoint(object):
+    def __init__(self, client):
+        self.client = client
+        self.latency = 0.0
+        self.errors = 0.0
+        self.failures = 0
+        self.downuntil = 0.0
+        self.block = None
+        self.lagging = False
+
+    def score(self, default):
+        # Nodes without a successful call yet are scored by the given
+        # pessimistic latency, so a node that never answered is not ranked
+        # first again once its cooldown ends
+        return (self.latency or default) * (1 + 10 * self.errors)
+
+class _RoutedFanout(_Fanout):
+    """Fanout of MultiBaseRequest with the interface of 'CurlFanout'. Calls
+    are submitted to fanouts of the fastest healthy nodes, calls failed by
+    EthConnectionError are submitted again to the next node up to 'retries'
+    times."""
+    def __init__(self, client, concurrency=8):
+        super(_RoutedFanout, self).__init__(client, concurrency)
+        self._fans = {}
+        client._checkLag()
+
+    def close(self):
+        "Aborts calls in flight and closes fanouts of all nodes."
+        for fan in self._fans.values():
+            fan.close()
+        self._fans.clear()
+        self._active.clear()
+
+    def _route(self, key):
+        method, params, tag, tried = self._active[key]
+        client = self._client
+        if _isPinned(method):
+            candidates = [client._primary]
+        else:
+            candidates = client._candidates()[:client._retries + 1]
+        for endpoint in candidates:
+            if endpoint not in tried:
+                break
+        else:
+            return False
+        tried.append(endpoint)
+        fan = self._fans.get(endpoint)
+        if fan is None:
+            fan = self._fans[endpoint] = openFanout(endpoint.client, self._concurrency)
+        fan.submit(method, params, tag=(key, endpoint, _timer()))
+        return True
+
+    def submit(self, method, params=[], tag=None):
+        """Starts the call without waiting for the result, which is returned
+        by 'poll' paired with the given tag."""
+        assert self.free, "No free connections, poll the results first"
+        key = next(self._ids)
+        self._active[key] = (method, params, tag, [])
+        self._route(key)
+
+    def poll(self, timeout=1.0):
+        """Waits up to 'timeout' seconds for any call in flight to complete
+        and returns list of (tag, result) pairs of completed calls, see
+        'CurlFanout.poll'."""
+        fans = [fan for fan in self._fans.values() if fan.pending]
+        done = []
+        for fan in fans:
+            for (key, endpoint, start), result in fan.poll(timeout / len(fans)):
+                if isinstance(result, EthConnectionError):
+                    self._client._record(endpoint)
+                    if self._route(key):
+                        continue
+                else:
+                    self._client._record(endpoint, _timer() - start)
+                method, params, tag, tried = self._active.pop(key)
+                done.append((tag, result))
+        return done
+
+class MultiBaseRequest(BaseRequest):
+    """Base of clients of several nodes. Reads are sent to the fastest
+    healthy node by latency and error rate averages (EWMA) and fail over to
+    the next node on connection errors up to 'retries' times. Failed node is
+    skipped for 'cooldown' seconds, doubled on every consecutive failure.
+    Nodes whose block number lags behind the others by more than 'maxlag'
+    blocks are skipped too, block numbers are checked every 'lagcheck'
+    seconds. Transactions, signing, filters and 'personal_*' calls are always
+    sent to the primary node. Calls of 'fanout', 'iterBlocks' and of
+    'LogScanner' are routed one by one the same way, streamed calls, e.g.
+    'iterLogs', fail over only until the first item is received.
+    Parameters:
+    1. List - pairs of (host, port) of the nodes.
+    2. Number - (optional) index of the primary node in the list.
+    3. Number - (optional) maximum number of failovers of a single call.
+    4. Number - (optional) maximum allowed lag in blocks.
+    5. Number - (optional) seconds between block numbers checks, 0 disables them.
+    6. Number - (optional) seconds to skip failed node.
+    7. Number - (optional) weight of the last call in EWMA.
+    Other parameters are of 'BaseRequest'."""
+    def __init__(self, endpoints, primary=0, retries=2, maxlag=3, lagcheck=15.0,
+                 cooldown=1.0, alpha=0.2, timeout=None, connecttimeout=None,
+                 cache=None, coalesce=None, metrics=None, codec=None):
+        assert endpoints, "No endpoints given"
+        host, port = endpoints[primary]
+        super(MultiBaseRequest, self).__init__(
+            host, port, timeout, connecttimeout, cache, coalesce, codec=codec)
+        # Calls are recorded by the clients of the nodes
+        self._endpoints = [
+            _Endpoint(BaseRequest(h, p, timeout, connecttimeout, metrics=metrics,
+                                  codec=codec))
+            for h, p in endpoints]
+        self._primary = self._endpoints[primary]
+        self._retries = retries
+        self._maxlag = maxlag
+        self._lagcheck = lagcheck
+        self._cooldown = cooldown
+        self._alpha = alpha
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def close(self):
+        "Closes kept alive connections to all nodes."
+        super(MultiBaseRequest, self).close()
+        for endpoint in self._endpoints:
+            endpoint.client.close()
+
+    def endpoints(self):
+        "Returns list of dicts with state of every node."
+        return [{
+            "host": e.client._host, "port": e.client._port,
+            "latency": e.latency, "errors": e.errors, "block": e.block,
+            "lagging": e.lagging, "down": e.downuntil > time.time(),
+            "primary": e is self._primary,
+            } for e in self._endpoints]
+
+    def _record(self, endpoint, latency=None):
+        alpha = self._alpha
+        with self._lock:
+            if latency is None:
+                endpoint.errors = alpha + (1 - alpha) * endpoint.errors
+                endpoint.downuntil = time.time() + self._cooldown * 2**endpoint.failures
+                endpoint.failures = min(endpoint.failures + 1, 10)
+            else:
+                if endpoint.latency:
+                    latency = alpha * latency + (1 - alpha) * endpoint.latency
+                endpoint.latency = latency
+                endpoint.errors *= 1 - alpha
+                endpoint.failures = 0
+                endpoint.downuntil = 0.0
+
+    def _openFanout(self, concurrency):
+        return _RoutedFanout(self, concurrency)
+
+    def _streamItems(self, data, path):
+        self._checkLag()
+        error = None
+        for endpoint in self._candidates()[:self._retries + 1]:
+            started = False
+            try:
+                for item in endpoint.client._streamItems(data, path):
+                    started = True
+                    yield item
+                return
+            except EthConnectionError as exc:
+                self._record(endpoint)
+                if started:
+                    raise
+                error = exc
+        raise error
+
+    def _send(self, endpoint, requestData):
+        start = time.time()
+        try:
+            response = endpoint.client._getRequestResult(requestData)
+        except EthConnectionError:
+            self._record(endpoint)
+            raise
+        self._record(endpoint, time.time() - start)
+        return response
+
+    def _checkLag(self):
+        with self._lock:
+            if not self._lagcheck or time.time() - self._checked < self._lagcheck:
+                return
+            self._checked = time.time()
+        request = {"jsonrpc": "2.0", "method": "eth_blockNumber", "params": [], "id": 1}
+        for endpoint in self._endpoints:
+            try:
+                endpoint.block = int(self._send(endpoint, request)["result"], 0)
+            except (EthConnectionError, KeyError, TypeError, ValueError):
+                endpoint.block = None
+        head = max([e.block for e in self._endpoints if e.block is not None] or [0])
+        for endpoint in self._endpoints:
+            endpoint.lagging = endpoint.block is not None and \
+                head - endpoint.block > self._maxlag
+
+    def _candidates(self):
+        now = time.time()
+        # Unmeasured nodes are scored as the slowest measured one
+        default = max(e.latency for e in self._endpoints) or 1.0
+        endpoints = sorted(self._endpoints, key=lambda e: e.score(default))
+        healthy = [e for e in endpoints if e.downuntil <= now and not e.lagging]
+        # Failed and lagging nodes are the last resort
+        rest = sorted([e for e in endpoints if e not in healthy],
+                      key=lambda e: (e.lagging, e.downuntil))
+        return healthy + rest
+
+    def _getRequestResult(self, requestData):
+        requests = requestData if isinstance(requestData, list) else [requestData]
+        if any(_isPinned(r.get("method", "")) for r in requests):
+            return self._send(self._primary, requestData)
+        self._checkLag()
+        error = None
+        for endpoint in self._candidates()[:self._retries + 1]:
+            try:
+                return self._send(endpoint, requestData)
+            except EthConnectionError as exc:
+                error = exc
+        raise error
+
+class MultiRequest(MultiBaseRequest, Request):
+    """'Request' of several nodes with latency aware routing and failover,
+    see 'MultiBaseRequest', e.g.:
+        r = MultiRequest([("http://node1", 8545), ("http://node2", 8545)])"""
+
+class MultiPersonalRequest(MultiBaseRequest, PersonalRequest):
+    "'PersonalRequest' of several nodes, calls are sent to the primary node."
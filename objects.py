@@ -0,0 +1,288 @@
+# -*- coding: utf8 -*-
+from binascii import hexlify, unhexlify
+
+# Kinds of fields, values are converted on the first access and encoded
+# back to JSON-RPC format by 'toDict'
+_RAW, _QUANTITY, _DATA, _DATALIST = range(4)
+
+try:
+    _strings = (str, unicode)
+except NameError:
+    # Python 3
+    _strings = (str,)
+try:
+    from sys import intern
+except ImportError:
+    # Python 2
+    pass
+
+# Raw values repeated among many objects, e.g. addresses, small quantities
+# and hashes of blocks, are shared instead of kept in copies
+_shared = set(["blockHash", "parentHash"])
+_sharedlen = 42
+
+def _toData(value):
+    return unhexlify(value[2:])
+
+def _decode(kind, value):
+    if kind == _QUANTITY:
+        return int(value, 16)
+    elif kind == _DATA:
+        return _toData(value)
+    return [_toData(item) if isinstance(item, _strings) else item for item in value]
+
+def _encode(kind, value):
+    if kind == _QUANTITY:
+        return hex(value).rstrip("L")
+    elif kind == _DATA:
+        return "0x" + hexlify(value).decode("ascii")
+    return ["0x" + hexlify(item).decode("ascii") if isinstance(item, bytes) else item
+            for item in value]
+
+class _Field(object):
+    "Descriptor converting the raw value kept in the slot on the first access."
+    __slots__ = ("slot", "kind")
+
+    def __init__(self, slot, kind):
+        self.slot = slot
+        self.kind = kind
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        slot = self.slot
+        try:
+            value = slot.__get__(obj, objtype)
+        except AttributeError:
+            return None
+        if value is None or self.kind == _RAW:
+            return value
+        if isinstance(value, _strings) or self.kind == _DATALIST and value and \
+                isinstance(value[0], _strings):
+            value = _decode(self.kind, value)
+            slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+def _fields(cls):
+    # Replaces slots of raw values with converting descriptors
+    slots = {}
+    for key, name, kind in cls._fields:
+        slot = "_" + name
+        field = _Field(cls.__dict__[slot], kind)
+        setattr(cls, name, field)
+        slots[key] = slot
+    cls._slots = slots
+    return cls
+
+class _Record(object):
+    """Base of compact result objects. Fields of the JSON-RPC object are
+    kept raw in slots and converted on the first access: quantities to int,
+    hashes, addresses and other data to bytes. Missing fields are None.
+    Unknown fields are kept raw in 'extra'. Short raw values and block
+    hashes are interned, so objects of the same block or sender share them.
+    Parameters:
+    1. Object - JSON-RPC object."""
+    __slots__ = ("extra",)
+    _fields = ()
+    _slots = {}
+
+    def __init__(self, data):
+        slots = self._slots
+        extra = None
+        for key, value in data.items():
+            slot = slots.get(key)
+            if slot is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+            else:
+                if value.__class__ is str and (len(value) <= _sharedlen or key in _shared):
+                    value = intern(value)
+                setattr(self, slot, value)
+        self.extra = extra
+
+    def __repr__(self):
+        number = getattr(self, "number", None)
+        if number is None:
+            number = getattr(self, "hash", None) or getattr(self, "transactionHash", None)
+        if isinstance(number, bytes):
+            number = "0x" + hexlify(number).decode("ascii")
+        return "<%s %s>" % (type(self).__name__, number)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.toDict() == other.toDict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.toDict()
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+    def toDict(self):
+        "Returns JSON-RPC object of the fields, same as the node returned."
+        result = {}
+        for key, name, kind in self._fields:
+            try:
+                value = getattr(self, "_" + name)
+            except AttributeError:
+                continue
+            if value is None or kind == _RAW or isinstance(value, _strings):
+                pass
+            elif kind == _DATALIST and value and not isinstance(value[0], bytes):
+                value = [item.toDict() if isinstance(item, _Record) else item
+                         for item in value]
+            else:
+                value = _encode(kind, value)
+            result[key] = value
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+@_fields
+class Log(_Record):
+    "Log entry, see '_Record'."
+    _fields = (
+        ("address", "address", _DATA),
+        ("topics", "topics", _DATALIST),
+        ("data", "data", _DATA),
+        ("blockNumber", "blockNumber", _QUANTITY),
+        ("blockHash", "blockHash", _DATA),
+        ("transactionHash", "transactionHash", _DATA),
+        ("transactionIndex", "transactionIndex", _QUANTITY),
+        ("logIndex", "logIndex", _QUANTITY),
+        ("removed", "removed", _RAW),
+        )
+    __slots__ = tuple("_" + name for key, name, kind in _fields)
+
+@_fields
+class Transaction(_Record):
+    "Transaction, see '_Record'. Field 'from' is named 'from_'."
+    _fields = (
+        ("hash", "hash", _DATA),
+        ("blockHash", "blockHash", _DATA),
+        ("blockNumber", "blockNumber", _QUANTITY),
+        ("transactionIndex", "transactionIndex", _QUANTITY),
+        ("from", "from_", _DATA),
+        ("to", "to", _DATA),
+        ("value", "value", _QUANTITY),
+        ("gas", "gas", _QUANTITY),
+        ("gasPrice", "gasPrice", _QUANTITY),
+        ("maxFeePerGas", "maxFeePerGas", _QUANTITY),
+        ("maxPriorityFeePerGas", "maxPriorityFeePerGas", _QUANTITY),
+        ("maxFeePerBlobGas", "maxFeePerBlobGas", _QUANTITY),
+        ("nonce", "nonce", _QUANTITY),
+        ("input", "input", _DATA),
+        ("type", "type", _QUANTITY),
+        ("chainId", "chainId", _QUANTITY),
+        ("v", "v", _QUANTITY),
+        ("r", "r", _QUANTITY),
+        ("s", "s", _QUANTITY),
+        ("yParity", "yParity", _QUANTITY),
+        ("accessList", "accessList", _RAW),
+        ("blobVersionedHashes", "blobVersionedHashes", _DATALIST),
+        )
+    __slots__ = tuple("_" + name for key, name, kind in _fields)
+
+class _ObjectList(object):
+    "Descriptor of a list of objects or hashes converted on the first access."
+    __slots__ = ("slot", "type")
+
+    def __init__(self, slot, objtype):
+        self.slot = slot
+        self.type = objtype
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            value = self.slot.__get__(obj, objtype)
+        except AttributeError:
+            return None
+        if value and not isinstance(value[0], (bytes, _Record)):
+            value = [self.type(item) if isinstance(item, dict) else _toData(item)
+                     for item in value]
+            self.slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+@_fields
+class Receipt(_Record):
+    "Receipt of the transaction, 'logs' are 'Log' objects, see '_Record'."
+    _fields = (
+        ("transactionHash", "transactionHash", _DATA),
+        ("transactionIndex", "transactionIndex", _QUANTITY),
+        ("blockHash", "blockHash", _DATA),
+        ("blockNumber", "blockNumber", _QUANTITY),
+        ("from", "from_", _DATA),
+        ("to", "to", _DATA),
+        ("cumulativeGasUsed", "cumulativeGasUsed", _QUANTITY),
+        ("effectiveGasPrice", "effectiveGasPrice", _QUANTITY),
+        ("gasUsed", "gasUsed", _QUANTITY),
+        ("blobGasUsed", "blobGasUsed", _QUANTITY),
+        ("blobGasPrice", "blobGasPrice", _QUANTITY),
+        ("contractAddress", "contractAddress", _DATA),
+        ("logs", "logs", _DATALIST),
+        ("logsBloom", "logsBloom", _DATA),
+        ("type", "type", _QUANTITY),
+        ("status", "status", _QUANTITY),
+        ("root", "root", _DATA),
+        )
+    __slots__ = tuple("_" + name for key, name, kind in _fields)
+
+Receipt.logs = _ObjectList(Receipt.__dict__["_logs"], Log)
+
+@_fields
+class Block(_Record):
+    """Block, 'transactions' are 'Transaction' objects, or bytes hashes if
+    the block is requested without full transactions, see '_Record'."""
+    _fields = (
+        ("number", "number", _QUANTITY),
+        ("hash", "hash", _DATA),
+        ("parentHash", "parentHash", _DATA),
+        ("nonce", "nonce", _DATA),
+        ("sha3Uncles", "sha3Uncles", _DATA),
+        ("logsBloom", "logsBloom", _DATA),
+        ("transactionsRoot", "transactionsRoot", _DATA),
+        ("stateRoot", "stateRoot", _DATA),
+        ("receiptsRoot", "receiptsRoot", _DATA),
+        ("miner", "miner", _DATA),
+        ("mixHash", "mixHash", _DATA),
+        ("difficulty", "difficulty", _QUANTITY),
+        ("totalDifficulty", "totalDifficulty", _QUANTITY),
+        ("extraData", "extraData", _DATA),
+        ("size", "size", _QUANTITY),
+        ("gasLimit", "gasLimit", _QUANTITY),
+        ("gasUsed", "gasUsed", _QUANTITY),
+        ("timestamp", "timestamp", _QUANTITY),
+        ("baseFeePerGas", "baseFeePerGas", _QUANTITY),
+        ("withdrawalsRoot", "withdrawalsRoot", _DATA),
+        ("withdrawals", "withdrawals", _RAW),
+        ("blobGasUsed", "blobGasUsed", _QUANTITY),
+        ("excessBlobGas", "excessBlobGas", _QUANTITY),
+        ("parentBeaconBlockRoot", "parentBeaconBlockRoot", _DATA),
+        ("transactions", "transactions", _DATALIST),
+        ("uncles", "uncles", _DATALIST),
+        )
+    __slots__ = tuple("_" + name for key, name, kind in _fields)
+
+Block.transactions = _ObjectList(Block.__dict__["_transactions"], Transaction)
+
+def _toObjects(objtype):
+    "Returns formatter of results to objects of the given type."
+    def _formatter(result):
+        if isinstance(result, dict):
+            return objtype(result)
+        elif isinstance(result, list):
+            return [objtype(item) if isinstance(item, dict) else item for item in result]
+        return result
+    return _formatter
@@ -0,0 +1,235 @@
+# -*- coding: utf8 -*-
+import threading, time, collections
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+try:
+    from concurrent.futures import Future, TimeoutError
+except ImportError:
+    # Python 2 without the futures package
+    Future = None
+from .request import EthError, EthConnectionError
+from .filters import FilterManager
+from .objects import Receipt
+
+class _Pending(object):
+    __slots__ = ("future", "deadline")
+
+    def __init__(self, future, deadline):
+        self.future = future
+        self.deadline = deadline
+
+class ReceiptWaiter(object):
+    """Waits for receipts of many transactions. Receipts of all pending
+    hashes are checked in a single batch request when the block filter
+    reports new blocks, instead of polling every hash, e.g.:
+        with ReceiptWaiter(r, confirmations=3, timeout=600) as w:
+            futures = [w.add(txhash) for txhash in hashes]
+            for txhash, receipt in w.iterReceipts():
+                ...
+    A receipt is confirmed when its block and the blocks after it count
+    'confirmations', receipts not confirmed yet are checked again on the
+    next blocks, so receipts moved by a chain reorganization are followed.
+    Receipts are kept by the RequestCache of the client only below its
+    depth, which must not be less than 'confirmations'.
+    Futures of hashes not confirmed within 'timeout' seconds after 'add'
+    raise TimeoutError. Failures of the node are retried on the next polls,
+    after 'retries' failed polls in a row futures of all pending hashes
+    raise the last failure, the same as if polling stopped by an error.
+    Parameters:
+    1. Request - client of the node.
+    2. Number - (optional) number of blocks confirming the receipt.
+    3. Number - (optional) timeout of a hash in seconds.
+    4. Number - (optional) minimal polling interval in seconds.
+    5. Number - (optional) maximal polling interval in seconds.
+    6. Number - (optional) maximum number of receipts in a single POST.
+    7. Number - (optional) number of failed polls in a row failing futures."""
+    def __init__(self, client, confirmations=1, timeout=None, mininterval=0.5,
+                 maxinterval=8.0, batchsize=500, retries=5):
+        assert Future is not None, "Python 2 requires the futures package"
+        assert confirmations > 0, "Number of confirmations must be positive"
+        assert retries > 0, "Number of retries must be positive"
+        assert client._cache is None or client._cache._depth >= confirmations, \
+            "Depth of the client cache is less than confirmations"
+        self._client = client
+        self._manager = FilterManager(client, mininterval, maxinterval)
+        self._filter = None
+        self._pending = collections.OrderedDict()
+        self._confirmed = queue.Queue()
+        self._lock = threading.Lock()
+        # Hashes added or blocks reported since the last check
+        self._changed = False
+        self._stopped = threading.Event()
+        self._thread = None
+        self.confirmations = confirmations
+        self.timeout = timeout
+        self.batchsize = batchsize
+        self.retries = retries
+        self.failures = 0
+        self.error = None
+        self.exception = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, txhash):
+        """Returns Future of the confirmed receipt of the transaction.
+        Parameters:
+        1. DATA, 32 Bytes - hash of a transaction."""
+        deadline = None if self.timeout is None else time.time() + self.timeout
+        with self._lock:
+            pending = self._pending.get(txhash)
+            if pending is None:
+                pending = self._pending[txhash] = _Pending(Future(), deadline)
+                self._changed = True
+            return pending.future
+
+    def _onBlocks(self, changes):
+        self._changed = True
+
+    def _resolve(self, txhash, receipt=None, exc=None):
+        with self._lock:
+            pending = self._pending.pop(txhash, None)
+            if pending is None:
+                return
+            self._confirmed.put((txhash, receipt))
+        if exc is None:
+            pending.future.set_result(receipt)
+        else:
+            pending.future.set_exception(exc)
+
+    def _fail(self, exc):
+        with self._lock:
+            hashes = list(self._pending)
+        for txhash in hashes:
+            self._resolve(txhash, exc=exc)
+
+    def _check(self):
+        with self._lock:
+            hashes = [h for h, p in self._pending.items() if not p.future.cancelled()]
+            for txhash in [h for h, p in self._pending.items() if p.future.cancelled()]:
+                del self._pending[txhash]
+        if not hashes:
+            return 0
+        batch = self._client.batch(self.batchsize)
+        head = batch.eth_blockNumber
+        receipts = [batch.eth_getTransactionReceipt(h) for h in hashes]
+        try:
+            batch.execute()
+        except EthError:
+            pass
+        head = head.result
+        count = 0
+        for txhash, call in zip(hashes, receipts):
+            try:
+                receipt = call.result
+            except EthError as exc:
+                self._resolve(txhash, exc=exc)
+                continue
+            if receipt is None:
+                continue
+            if isinstance(receipt, Receipt):
+                number = receipt.blockNumber
+            else:
+                number = int(receipt["blockNumber"], 16)
+            if head - number + 1 >= self.confirmations:
+                self._resolve(txhash, receipt)
+                count += 1
+        return count
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [h for h, p in self._pending.items()
+                       if p.deadline is not None and p.deadline <= now]
+        for txhash in expired:
+            self._resolve(txhash, exc=TimeoutError(
+                "Transaction %s is not confirmed in %s seconds" % (txhash, self.timeout)))
+
+    def poll(self):
+        """Polls the block filter, checks receipts of pending hashes if new
+        blocks arrived and expires timed out hashes. Returns number of
+        confirmed receipts. Failures of the node are kept in 'error'."""
+        count = 0
+        try:
+            if self._filter is None:
+                self._filter = self._manager.add("blocks", callback=self._onBlocks)
+            self._manager.poll()
+            if self._changed:
+                self._changed = False
+                count = self._check()
+            self.failures, self.error = 0, None
+        except (EthError, EthConnectionError) as exc:
+            # Receipts are checked again once the node answers
+            self._changed = True
+            self.failures += 1
+            self.error = exc
+            if self.failures >= self.retries:
+                self.failures = 0
+                self._fail(exc)
+        self._expire()
+        return count
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self.poll()
+                self._stopped.wait(self._manager.interval)
+        except Exception as exc:
+            self.exception = exc
+            self._fail(exc)
+
+    def start(self):
+        "Starts polling in the background thread."
+        assert self._thread is None, "Polling is already started"
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops background polling and uninstalls the block filter. Raises
+        the exception that stopped polling, if any."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        self._filter = None
+        self._manager.stop()
+        exc, self.exception = self.exception, None
+        if exc is not None:
+            raise exc
+
+    def iterReceipts(self):
+        """Generator of (txhash, receipt) pairs in order of confirmation,
+        receipt is None if the hash timed out or failed, see its future.
+        Ends when no hash is pending. Polls the node unless polling is
+        started in the background."""
+        while True:
+            try:
+                yield self._confirmed.get_nowait()
+                continue
+            except queue.Empty:
+                pass
+            with self._lock:
+                if not self._pending and self._confirmed.empty():
+                    return
+            if self._thread is None:
+                if not self.poll() and self._confirmed.empty():
+                    time.sleep(self._manager.interval)
+                continue
+            if self.exception is not None:
+                raise self.exception
+            try:
+                yield self._confirmed.get(timeout=self._manager.interval)
+            except queue.Empty:
+                pass
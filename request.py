@@ -1,65 +1,372 @@
 # -*- coding: utf8 -*-
-import sys
-import pycurl, json
-try:
-    # Python3
-    from io import BytesIO
-except ImportError:
-    # Python 2
-    from StringIO import StringIO as BytesIO
-
-class EthConnectionError(Exception):
-    def __init__(self, *args):
-        super(EthConnectionError, self).__init__(
-            "Failed to connect to %s port %s: Connection refused" % args
-            )
+import sys, types, itertools
+import json
+from . import hextools
+from .transport import EthConnectionError, EthTimeoutError, _toTransport
+from .codec import defaultCodec, _ItemScanner
+from .objects import Block, Transaction, Receipt, Log, _toObjects, _toData
+from .checkpoint import _toCheckpoint, _closeCheckpoint
+from .metrics import _timer
+
+class EthError(Exception):
+    """Error object returned by the node in place of the call result.
+    Attributes:
+    - code: Number - JSON-RPC error code.
+    - message: String - error message.
+    - data: (optional) additional data, e.g. revert data of 'eth_call'."""
+    def __init__(self, message, code=None, data=None):
+        super(EthError, self).__init__(message)
+        self.message = message
+        self.code = code
+        self.data = data
+
+    def __str__(self):
+        return "EthError %s: %s" % (self.code, self.message)
+
+class EthParseError(EthError):
+    "Invalid JSON was received by the node."
+
+class EthInvalidRequest(EthError):
+    "The JSON sent is not a valid request object."
+
+class EthMethodNotFound(EthError):
+    "The method does not exist or is not available."
+
+class EthInvalidParams(EthError):
+    "Invalid method parameters."
+
+class EthInternalError(EthError):
+    "Internal JSON-RPC error of the node."
+
+class EthServerError(EthError):
+    "Implementation defined error of the node, e.g. invalid transaction."
+
+class EthExecutionError(EthError):
+    "Execution of the call is reverted, revert data is in 'data'."
+
+_errorTypes = {
+    -32700: EthParseError,
+    -32600: EthInvalidRequest,
+    -32601: EthMethodNotFound,
+    -32602: EthInvalidParams,
+    -32603: EthInternalError,
+    3: EthExecutionError,
+}
+
+def _toEthError(error):
+    code = error.get("code")
+    if code in _errorTypes:
+        errtype = _errorTypes[code]
+    elif isinstance(code, int) and -32099 <= code <= -32000:
+        errtype = EthServerError
+    else:
+        errtype = EthError
+    return errtype(error.get("message", ""), code, error.get("data"))
+
+def _parseResponse(response):
+    if "result" in response:
+        return response["result"]
+    elif "error" in response:
+        raise _toEthError(response["error"])
+    raise EthError("Invalid response: %s" % json.dumps(response))
+
+def _formatResponse(response, formatter=None, onerror=None):
+    try:
+        result = _parseResponse(response)
+    except EthError as exc:
+        if onerror is None:
+            raise
+        return onerror(exc)
+    return result if formatter is None else formatter(result)
 
 class BaseRequest(object):
-    def __init__(self, host, port):
+    def __init__(self, host, port, timeout=None, connecttimeout=None, cache=None,
+                 coalesce=None, metrics=None, transport=None, codec=None,
+                 objects=False):
+        """Parameters:
+        1. String - node host, e.g. 'http://localhost', or path of the IPC
+        socket, e.g. 'ipc:///home/user/.ethereum/geth.ipc'. Paths ending
+        with '.ipc' need no 'ipc://' prefix.
+        2. Number - node port, ignored for IPC.
+        3. Number - (optional) total timeout of a single call in seconds.
+        4. Number - (optional) timeout of connection phase in seconds.
+        5. RequestCache - (optional) cache of immutable results.
+        6. Coalescer - (optional) shares calls in flight among threads.
+        7. Metrics - (optional) instrumentation of the calls.
+        8. Transport - (optional) transport used instead of the one of the
+        address, e.g. 'CallableTransport', see 'transport' module.
+        9. JSONCodec - (optional) JSON codec, default is orjson if it is
+        installed, see 'codec' module.
+        10. Boolean - (optional) if true blocks, transactions, receipts and
+        logs are returned as compact objects converting fields lazily, see
+        'objects' module, else as dicts.
+        Connections to the node are kept alive between the calls in a pool,
+        one per concurrent thread, so the client may be shared by threads.
+        Use 'close' or the 'with' statement to release them."""
         self._ipcaddr = "%s:%s" % (host, port)
         self._host = host
         self._port = port
+        self._timeout = timeout
+        self._connecttimeout = connecttimeout
+        self._cache = cache
+        self._coalesce = coalesce
+        self._metrics = metrics
+        if transport is None:
+            transport = _toTransport(host, port, timeout, connecttimeout)
+        self._transport = transport
+        self._codec = defaultCodec if codec is None else codec
+        self._objects = objects
         self._requestData = {"jsonrpc":"2.0","method":"","params":[],"id":0}
 
-    def _executeCurl(self, postfields):
-        self._buff = BytesIO()
-        curl = pycurl.Curl()
-        curl.setopt(curl.URL, self._ipcaddr)
-        # Content-Type header to application/json
-        curl.setopt(pycurl.HTTPHEADER, ['Accept: application/json'])
-        # Sets request method to POST
-        curl.setopt(curl.POST, 1)
-        curl.setopt(curl.POSTFIELDS, postfields)
-        curl.setopt(curl.WRITEDATA, self._buff)
-        try:
-            curl.perform()
-        except pycurl.error:
-            raise EthConnectionError(self._host, self._port)
-        finally:
-            curl.close()
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        "Closes kept alive connections to the node."
+        self._transport.close()
+
+    def _execute(self, postfields):
+        return self._transport.send(postfields)
 
     def _getRequestResult(self, requestData):
-        decoder = json.JSONDecoder()
-        postfields = json.dumps(requestData)
-        self._executeCurl(postfields)
-        body = self._buff.getvalue().decode('utf-8')
-        self._buff.close()
-        # Body is a string in some encoding.
-        # In Python 2, we can print it without knowing what the encoding is.
-        res = decoder.raw_decode(body)[0]
+        if self._metrics is not None:
+            return self._getMeasuredResult(requestData)
+        codec = self._codec
+        # Response is parsed from bytes without decoding it to a string
+        return codec.loads(self._execute(codec.dumps(requestData)))
+
+    def _getMeasuredResult(self, requestData):
+        metrics = self._metrics
+        metrics.before(requestData)
+        start = _timer()
+        postfields = self._codec.dumps(requestData)
+        encoded = _timer()
+        try:
+            body = self._execute(postfields)
+        except EthConnectionError:
+            durations = {"encode": encoded - start, "network": _timer() - encoded}
+            metrics.record(requestData, None, durations, len(postfields), 0)
+            raise
+        received = _timer()
+        res = None
+        try:
+            res = self._codec.loads(body)
+        finally:
+            # Response that is not valid JSON is recorded as failed
+            durations = {
+                "encode": encoded - start,
+                "network": received - encoded,
+                "decode": _timer() - received,
+                }
+            metrics.record(requestData, res, durations, len(postfields), len(body))
         return res
 
-    def _setRequest(self, data):
+    def _getResponse(self, request):
+        cache = self._cache
+        if cache is not None:
+            response = cache.get(request)
+            if response is not None:
+                return response
+        if self._coalesce is not None:
+            response = self._coalesce.call(request, self._getRequestResult)
+        else:
+            response = self._getRequestResult(request)
+        if cache is not None:
+            cache.put(request, response)
+        return response
+
+    def _setRequest(self, data, formatter=None, onerror=None):
         request = self._requestData.copy()
         request.update(data)
-        try:
-            return self._getRequestResult(request)['result']
-        except KeyError:
-            return "EthError: %s" % self._getRequestResult(request)['error']['message']
+        return _formatResponse(self._getResponse(request), formatter, onerror)
+
+    def _streamItems(self, data, path):
+        """Generator of items of the array at the given path of the response,
+        e.g. ('result', 'transactions'), decoded one by one while the body
+        is received, so memory does not grow with the response size."""
+        request = self._requestData.copy()
+        request.update(data)
+        loads = self._codec.loads
+        scanner = _ItemScanner(path)
+        for chunk in self._transport.stream(self._codec.dumps(request)):
+            items = scanner.feed(chunk)
+            if items:
+                # Items completed by the chunk are decoded in one call
+                for item in loads(b"[" + b",".join(items) + b"]"):
+                    yield item
+        if not scanner.done:
+            raise EthError("Invalid response of %s" % request["method"])
+        if "error" in scanner.members:
+            raise _toEthError(scanner.members["error"])
+
+    def _typed(self, objtype):
+        return _toObjects(objtype) if self._objects else None
 
     def _setData(self, method, params=[], _id=1):
         return {"method": method, "params": params, "id": _id}
 
+    def _setLocal(self, result):
+        return result
+
+    def batch(self, size=500):
+        """Returns BatchRequest that collects calls of this client and sends
+        them as JSON-RPC batches, see 'BatchRequest'.
+        Parameters:
+        1. Number - (optional) maximum number of calls in a single POST."""
+        return BatchRequest(self, size=size)
+
+    def _openFanout(self, concurrency):
+        "Returns fanout of this client, see 'fanout.openFanout'."
+        from .fanout import openFanout
+        return openFanout(self, concurrency)
+
+    def fanout(self, calls, concurrency=8, ordered=True, failfast=True):
+        """Generator that executes calls concurrently over 'concurrency'
+        connections to the node, see 'CurlFanout'.
+        Parameters:
+        1. Iterable - pairs of (method, params), consumed lazily.
+        2. Number - (optional) maximum number of calls in flight.
+        3. Boolean - (optional) if true yields results in order of the calls,
+        else yields pairs of (index, result) as calls complete.
+        4. Boolean - (optional) if true raises the first failed call error,
+        else yields the exception instance in place of the result.
+        Calls over HTTP are made by 'CurlFanout', over other transports by
+        'PipelineFanout'."""
+        fan = self._openFanout(concurrency)
+        try:
+            for item in fan.run(calls, ordered=ordered, failfast=failfast):
+                yield item
+        finally:
+            fan.close()
+
+class BatchResult(object):
+    """Placeholder of a single call result in the BatchRequest.
+    The value is available in 'result' after the batch is executed."""
+    def __init__(self, request, formatter=None, onerror=None):
+        self._request = request
+        self._formatter = formatter
+        self._onerror = onerror
+        self._done = False
+        self._result = None
+        self._exc = None
+
+    @property
+    def done(self):
+        "Returns True if the batch containing the call is executed."
+        return self._done
+
+    @property
+    def result(self):
+        """Returns formatted result of the call, or raises the exception
+        raised by formatting it."""
+        assert self._done, "Batch is not executed yet"
+        if self._exc is not None:
+            raise self._exc
+        return self._result
+
+    def _set(self, response):
+        if response is None:
+            response = {"error": {"message": "Missing response for id %s" % self._request["id"]}}
+        try:
+            self._result = _formatResponse(response, self._formatter, self._onerror)
+        except Exception as exc:
+            self._exc = exc
+        self._done = True
+
+class BatchRequest(object):
+    """Collects calls of the given client and sends them in JSON-RPC batches
+    of 'size' calls per POST. Every method of the client is available and
+    returns BatchResult instead of the value, e.g.:
+        with r.batch() as b:
+            balances = [b.eth_getBalance(a) for a in accounts]
+        balances = [x.result for x in balances]
+    Calls get unique ids and responses are matched by id, so nodes that
+    reorder batch responses are supported."""
+    def __init__(self, client, size=500):
+        assert size > 0, "Batch size must be positive"
+        self._client = client
+        self._size = size
+        self._calls = []
+        self._ids = itertools.count(1)
+        self._objects = client._objects
+
+    def __getattr__(self, name):
+        # Binds methods and properties of the client class to the batch
+        for klass in type(self._client).__mro__:
+            if name in klass.__dict__:
+                attr = klass.__dict__[name]
+                break
+        else:
+            raise AttributeError(name)
+        if isinstance(attr, property):
+            return attr.fget(self)
+        elif isinstance(attr, types.FunctionType):
+            return types.MethodType(attr, self)
+        return attr
+
+    def __len__(self):
+        return len(self._calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, *exc):
+        if exctype is None:
+            self.execute()
+
+    def _setLocal(self, result):
+        call = BatchResult(None)
+        call._result, call._done = result, True
+        return call
+
+    def _setRequest(self, data, formatter=None, onerror=None):
+        request = self._client._requestData.copy()
+        request.update(data)
+        request["id"] = next(self._ids)
+        call = BatchResult(request, formatter, onerror)
+        cache = self._client._cache
+        response = None if cache is None else cache.get(request)
+        if response is not None:
+            call._set(response)
+        self._calls.append(call)
+        return call
+
+    def execute(self):
+        """Sends collected calls and returns list of their results in order
+        of the calls. Every BatchResult is filled before the exception of
+        the first failed call is raised."""
+        calls, self._calls = self._calls, []
+        pending = [call for call in calls if not call._done]
+        for i in range(0, len(pending), self._size):
+            chunk = pending[i:i+self._size]
+            responses = self._client._getRequestResult([c._request for c in chunk])
+            if isinstance(responses, dict):
+                # Node rejected the whole batch with a single error object
+                responses = [dict(responses, id=c._request["id"]) for c in chunk]
+            byid = dict((r.get("id"), r) for r in responses)
+            cache = self._client._cache
+            for call in chunk:
+                response = byid.get(call._request["id"])
+                if cache is not None and response is not None:
+                    cache.put(call._request, response)
+                call._set(response)
+        return [call.result for call in calls]
+
+def _toInt(result):
+    return int(result, 0)
+
+def _toSyncing(result):
+    if result:
+        bases = [0 for i in range(len(result))]
+        return dict(zip(result.keys(), list(map(int, result.values(), bases))))
+    return result
+
+def _toFalse(error):
+    return False
+
 class PersonalRequest(BaseRequest):
     def personal_unlockAccount(self, address, password):
         """Given account to unlock. Returns True, or False.
@@ -68,8 +375,7 @@ class PersonalRequest(BaseRequest):
         2. String, - account password"""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [address, password])
-        unlocked = self._setRequest(data)
-        return False if isinstance(unlocked, str) else unlocked
+        return self._setRequest(data, onerror=_toFalse)
 
     def personal_lockAccount(self, address):
         """Lock given account. Returns True, or False.
@@ -88,10 +394,14 @@ class PersonalRequest(BaseRequest):
         return self._setRequest(data)
 
 class Request(BaseRequest):
-    def web3_sha3(self, string):
+    def web3_sha3(self, string, local=False):
         """Returns Keccak-256 (not the standardized SHA3-256) of the given data.
         Parameters:
-        1. String - the data to convert into a SHA3 hash"""
+        1. String - the data to convert into a SHA3 hash
+        2. Boolean - (optional) if true computes hash without the node call,
+        see 'hextools.sha3'."""
+        if local:
+            return self._setLocal(hextools.sha3(string))
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [string], _id=64)
         return self._setRequest(data)
@@ -108,18 +418,14 @@ class Request(BaseRequest):
         "Returns number of peers currenly connected to the client."
         method = sys._getframe().f_code.co_name
         data = self._setData(method, _id=74)
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     @property
     def eth_syncing(self):
         "Returns an object with data about the sync status or false."
         method = sys._getframe().f_code.co_name
         data = self._setData(method)
-        result = self._setRequest(data)
-        if result:
-            bases = [0 for i in range(len(result))]
-            return dict(zip(result.keys(), list(map(int, result.values(), bases))))
-        return result
+        return self._setRequest(data, _toSyncing)
 
     @property
     def eth_coinbase(self):
@@ -133,14 +439,14 @@ class Request(BaseRequest):
         "Returns the number of hashes per second that the node is mining with."
         method = sys._getframe().f_code.co_name
         data = self._setData(method, _id=71)
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     @property
     def eth_gasPrice(self):
         "Returns the current price per gas in wei."
         method = sys._getframe().f_code.co_name
         data = self._setData(method, _id=73)
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     @property
     def eth_accounts(self):
@@ -154,7 +460,7 @@ class Request(BaseRequest):
         "Returns the number of most recent block."
         method = sys._getframe().f_code.co_name
         data = self._setData(method, _id=83)
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     def eth_getBalance(self, address, block="latest"):
         """Returns the balance of the account of given address.
@@ -164,7 +470,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [address, block])
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     def eth_getStorageAt(self, address, pos, block="latest"):
         """Returns the value from a storage position at a given address.
@@ -185,7 +491,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [address, block])
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     def eth_getBlockTransactionCountByHash(self, blockhash):
         """Returns the number of transactions in a block from a block matching the given block hash.
@@ -202,7 +508,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [block])
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     def eth_getUncleCountByBlockHash(self, blockhash):
         """Returns the number of uncles in a block from a block matching the given block hash.
@@ -219,7 +525,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [block])
-        return int(self._setRequest(data), 0)
+        return self._setRequest(data, _toInt)
 
     def eth_getCode(self, address, block="latest"):
         """Returns code at a given address.
@@ -271,7 +577,7 @@ class Request(BaseRequest):
         data = self._setData(method, [data])
         return self._setRequest(data)
 
-    def eth_call(self, data, method=None, block="latest"):
+    def eth_call(self, data, method=None, block="latest", overrides=None, _formatter=None):
         """Executes a new message call immediately without creating a transaction on the block chain.
         Parameters:
         1. Object - The transaction object:
@@ -288,14 +594,21 @@ class Request(BaseRequest):
             the invoked method signature and encoded parameters. For details see Ethereum Contract ABI
             - nonce: QUANTITY - (optional) Integer of a nonce. This allows
             to overwrite your own pending transactions that use the same nonce.
-        2. QUANTITY|TAG - integer block number, or the string 'latest', 'earliest' or 'pending'"""
+        2. QUANTITY|TAG - integer block number, or the string 'latest', 'earliest' or 'pending'
+        3. Object - (optional) state override set, replaces state of the
+        given accounts for the call only, e.g. {address: {"code": DATA}}.
+        Supported by geth, erigon, nethermind and others."""
         assert isinstance(data, dict), "Given Data must be a type of dict"
+        assert overrides is None or isinstance(overrides, dict), "Overrides must be a type of dict"
         method = sys._getframe().f_code.co_name if method is None else method
         data = self._setData(method, [data])
-        if block is not None:
+        if block is not None or overrides is not None:
+            block = "latest" if block is None else block
             block = hex(block) if isinstance(block, int) else block
             data['params'].append(block)
-        return self._setRequest(data)
+        if overrides is not None:
+            data['params'].append(overrides)
+        return self._setRequest(data, _formatter)
 
     def eth_estimateGas(self, data):
         """Makes a call or transaction, which won't be added to the blockchain
@@ -304,11 +617,7 @@ class Request(BaseRequest):
         See 'eth_call' parameters, expect that all properties are optional."""
         assert isinstance(data, dict), "Given Data must be a type of dict"
         method = sys._getframe().f_code.co_name
-        result = self.eth_call(data, method=method, block=None)
-        try:
-            return int(result, 0)
-        except ValueError:
-            return result
+        return self.eth_call(data, method=method, block=None, _formatter=_toInt)
 
     def eth_getBlockByHash(self, blockhash, fulltx=False):
         """Returns information about a block by hash.
@@ -318,7 +627,7 @@ class Request(BaseRequest):
         if false only the hashes of the transactions."""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [blockhash, fulltx])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Block))
 
     def eth_getBlockByNumber(self, block="latest", fulltx=False):
         """Returns information about a block by block number.
@@ -329,7 +638,71 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [block, fulltx])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Block))
+
+    def iterTransactions(self, block="latest", fulltx=True):
+        """Generator of transactions of the block, parsed one by one while
+        the response is received, so memory stays bounded by the largest
+        transaction however big the block is.
+        Parameters:
+        1. QUANTITY|TAG|DATA - integer block number, the string 'earliest',
+        'latest' or 'pending', or 32 Bytes hash of the block.
+        2. Boolean - If true yields the full transaction objects, if false
+        only the hashes of the transactions."""
+        if isinstance(block, int):
+            data = self._setData("eth_getBlockByNumber", [hex(block), fulltx])
+        elif len(block) == 66:
+            data = self._setData("eth_getBlockByHash", [block, fulltx])
+        else:
+            data = self._setData("eth_getBlockByNumber", [block, fulltx])
+        transactions = self._streamItems(data, ("result", "transactions"))
+        if not self._objects:
+            return transactions
+        return (Transaction(tx) if isinstance(tx, dict) else _toData(tx)
+                for tx in transactions)
+
+    def iterLogs(self, data):
+        """Generator of logs matching the filter object, parsed one by one
+        while the response of 'eth_getLogs' is received, so memory stays
+        bounded by the largest log. To split huge ranges into several calls
+        see 'LogScanner'.
+        Parameters:
+        1. Object - the filter object, see 'eth_newFilter' parameters."""
+        assert isinstance(data, dict), "Given Data must be a type of dict"
+        data = self._setData("eth_getLogs", [data], _id=74)
+        logs = self._streamItems(data, ("result",))
+        return (Log(log) for log in logs) if self._objects else logs
+
+    def iterBlocks(self, start, end=None, fulltx=False, window=64, checkpoint=None):
+        """Generator of blocks from start to end inclusive, in order.
+        Up to 'window' blocks are requested concurrently ahead of the yielded
+        one, so memory stays bounded by the window.
+        Parameters:
+        1. Number - first block number.
+        2. Number - (optional) last block number, default is the current one.
+        3. Boolean - If true yields the full transaction objects, if false
+        only the hashes of the transactions.
+        4. Number - (optional) maximum number of blocks in flight.
+        5. Checkpoint|String - (optional) checkpoint or path of its file. The
+        number of every processed block is saved and the scan resumes after
+        the saved one. The checkpoint is closed when the generator ends."""
+        checkpoint = _toCheckpoint(checkpoint)
+        if checkpoint is not None:
+            saved = checkpoint.load()
+            if saved is not None and saved >= start:
+                start = saved + 1
+        if end is None:
+            end = self.eth_blockNumber
+        numbers = range(start, end + 1)
+        calls = (("eth_getBlockByNumber", [hex(n), fulltx]) for n in numbers)
+        blocks = self.fanout(calls, concurrency=window)
+        try:
+            for number, block in zip(numbers, blocks):
+                yield Block(block) if self._objects and block is not None else block
+                if checkpoint is not None:
+                    checkpoint.save(number)
+        finally:
+            _closeCheckpoint(checkpoint)
 
     def eth_getTransactionByHash(self, txhash):
         """Returns the information about a transaction requested by transaction hash.
@@ -337,7 +710,7 @@ class Request(BaseRequest):
         1. DATA, 32 Bytes - hash of a transaction"""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [txhash])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Transaction))
 
     def eth_getTransactionByBlockHashAndIndex(self, blockhash, index):
         """Returns information about a transaction by block hash and transaction index position.
@@ -346,7 +719,7 @@ class Request(BaseRequest):
         2. QUANTITY - integer of the transaction index position."""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [blockhash, hex(index)])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Transaction))
 
     def eth_getTransactionByBlockNumberAndIndex(self, index, block="latest"):
         """Returns information about a transaction by block number and transaction index position.
@@ -356,7 +729,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [block, hex(index)])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Transaction))
 
     def eth_getTransactionReceipt(self, txhash):
         """Returns the receipt of a transaction by transaction hash.
@@ -365,7 +738,7 @@ class Request(BaseRequest):
         1. DATA, 32 Bytes - hash of a transaction"""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [txhash])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Receipt))
 
     def eth_getUncleByBlockHashAndIndex(self, blockhash, index):
         """Returns information about a uncle of a block by hash and uncle index position.
@@ -374,7 +747,7 @@ class Request(BaseRequest):
         2. QUANTITY - the uncle's index position."""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [blockhash, hex(index)])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Block))
 
     def eth_getUncleByBlockNumberAndIndex(self, index, block="latest"):
         """Returns information about a uncle of a block by number and uncle index position.
@@ -384,7 +757,7 @@ class Request(BaseRequest):
         block = hex(block) if isinstance(block, int) else block
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [block, hex(index)])
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Block))
 
     def eth_compileSolidity(self, code):
         """Returns compiled solidity code.
@@ -395,7 +768,7 @@ class Request(BaseRequest):
         data = self._setData(method, [code])
         return self._setRequest(data)
 
-    def eth_newFilter(self, data, method=None, _id=73):
+    def eth_newFilter(self, data, method=None, _id=73, _formatter=None):
         """Creates a filter object, based on filter options, to notify when
         the state changes (logs). To check if the state has changed, call 'eth_getFilterChanges'.
         A note on specifying topic filters:
@@ -422,7 +795,7 @@ class Request(BaseRequest):
         if method is None:
             method = sys._getframe().f_code.co_name
         data = self._setData(method, [data], _id=_id)
-        return self._setRequest(data)
+        return self._setRequest(data, _formatter)
 
     @property
     def eth_newBlockFilter(self):
@@ -457,7 +830,7 @@ class Request(BaseRequest):
         1. QUANTITY - the filter id."""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [filterId], _id=73)
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Log))
 
     def eth_getFilterLogs(self, filterId):
         """Returns an array of all logs matching filter with given id.
@@ -465,14 +838,14 @@ class Request(BaseRequest):
         1. QUANTITY - The filter id."""
         method = sys._getframe().f_code.co_name
         data = self._setData(method, [filterId], _id=73)
-        return self._setRequest(data)
+        return self._setRequest(data, self._typed(Log))
 
     def eth_getLogs(self, data):
         """Returns an array of all logs matching a given filter object.
         Parameters:
         1. Object - the filter object, see 'eth_newFilter' parameters."""
         method = sys._getframe().f_code.co_name
-        return self.eth_newFilter(data, method=method, _id=74)
+        return self.eth_newFilter(data, method=method, _id=74, _formatter=self._typed(Log))
 
     @property
     def eth_getWork(self):
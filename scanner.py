@@ -0,0 +1,126 @@
+# -*- coding: utf8 -*-
+from .request import EthConnectionError, EthTimeoutError, EthError
+from .checkpoint import _toCheckpoint, _closeCheckpoint
+from .objects import Log
+
+class _Range(object):
+    __slots__ = ("first", "last", "logs")
+
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+        self.logs = None
+
+class LogScanner(object):
+    """Scans logs of a wide block range by 'eth_getLogs' calls over chunks of
+    blocks executed concurrently, e.g.:
+        scanner = LogScanner(r, {"address": token, "topics": [transferTopic]})
+        for log in scanner.scan(startBlock):
+            ...
+    Chunk that fails by a limit of the node on the number of results, on
+    the block range or on the query time, times out, or returns
+    'maxresults' logs, is bisected and both halves are requested again.
+    Other errors, e.g. of the filter or refused connections, are raised at
+    once. Chunk size is halved
+    on bisection and doubled while chunks return less than half of 'target'
+    logs. Logs are yielded in block order.
+    Parameters:
+    1. Request - client of the node.
+    2. Object - filter options of 'eth_getLogs' without fromBlock/toBlock.
+    3. Number - (optional) initial number of blocks in a chunk.
+    4. Number - (optional) maximum number of chunks in flight.
+    5. Number - (optional) desired number of logs in a chunk.
+    6. Number - (optional) chunk of several blocks returning so many logs is
+    treated as truncated by the node and bisected.
+    7. Checkpoint|String - (optional) checkpoint or path of its file. The
+    last block of every processed chunk is saved and the scan resumes after
+    the saved one. The checkpoint is closed when the generator ends.
+    8. Number - (optional) maximum number of blocks in a chunk."""
+    def __init__(self, client, data, chunk=1000, concurrency=4, target=1000,
+                 maxresults=None, checkpoint=None, maxchunk=100000):
+        assert isinstance(data, dict), "Given Data must be a type of dict"
+        assert chunk > 0, "Chunk must be positive"
+        self._client = client
+        self._data = data
+        self._concurrency = concurrency
+        self._target = target
+        self._maxresults = maxresults
+        self._checkpoint = _toCheckpoint(checkpoint)
+        self._maxchunk = maxchunk
+        self.chunk = min(chunk, maxchunk)
+
+    # Parts of error messages of the limits of nodes and providers, e.g.
+    # 'query returned more than 10000 results', 'block range is too wide',
+    # 'Log response size exceeded', 'exceed maximum block range: 5000'
+    _limitErrors = ("more than", "too many", "too large", "too wide", "max results",
+                    "maximum block range", "size exceeded", "query timeout")
+
+    def _submit(self, fan, slot):
+        data = dict(self._data, fromBlock=hex(slot.first), toBlock=hex(slot.last))
+        fan.submit("eth_getLogs", [data], tag=slot)
+
+    def _failed(self, slot, result):
+        if isinstance(result, EthError):
+            message = (result.message or "").lower()
+            if slot.first == slot.last or not any(m in message for m in self._limitErrors):
+                raise result
+            return True
+        elif isinstance(result, EthConnectionError):
+            # Wide ranges may time out, refused connections are raised
+            if slot.first == slot.last or not isinstance(result, EthTimeoutError):
+                raise result
+            return True
+        # Logs of a single block can't be split any further
+        return self._maxresults is not None and slot.first != slot.last and \
+            len(result) >= self._maxresults
+
+    def scan(self, start, end=None):
+        """Generator of logs from start to end block inclusive, in order.
+        Parameters:
+        1. Number - first block number.
+        2. Number - (optional) last block number, default is the current one."""
+        checkpoint = self._checkpoint
+        if checkpoint is not None:
+            saved = checkpoint.load()
+            if saved is not None and saved >= start:
+                start = saved + 1
+        if end is None:
+            end = self._client.eth_blockNumber
+        objects = self._client._objects
+        slots = []
+        waiting = []
+        cursor = start
+        fan = self._client._openFanout(self._concurrency)
+        try:
+            while slots or cursor <= end:
+                while fan.free and (waiting or cursor <= end and
+                                    len(slots) < 2 * self._concurrency):
+                    if waiting:
+                        slot = waiting.pop(0)
+                    else:
+                        slot = _Range(cursor, min(end, cursor + self.chunk - 1))
+                        slots.append(slot)
+                        cursor = slot.last + 1
+                    self._submit(fan, slot)
+                for slot, result in fan.poll():
+                    if not self._failed(slot, result):
+                        slot.logs = result
+                        if len(result) < self._target // 2:
+                            self.chunk = min(self._maxchunk, self.chunk * 2)
+                        continue
+                    middle = (slot.first + slot.last) // 2
+                    halves = [_Range(slot.first, middle), _Range(middle + 1, slot.last)]
+                    index = slots.index(slot)
+                    slots[index:index+1] = halves
+                    waiting.extend(halves)
+                    waiting.sort(key=lambda s: s.first)
+                    self.chunk = max(1, min(self.chunk, middle - slot.first + 1))
+                while slots and slots[0].logs is not None:
+                    slot = slots.pop(0)
+                    for log in slot.logs:
+                        yield Log(log) if objects else log
+                    if checkpoint is not None:
+                        checkpoint.save(slot.last)
+        finally:
+            fan.close()
+            _closeCheckpoint(checkpoint)
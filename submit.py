@@ -0,0 +1,362 @@
+# -*- coding: utf8 -*-
+import threading, collections
+from binascii import hexlify
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+from .request import EthError, EthConnectionError
+from . import hextools
+
+class NonceManager(object):
+    """Local nonces of senders. The first nonce of a sender is its pending
+    transaction count on the node, next ones are counted locally, so
+    transactions are numbered without a node call per transaction.
+    Parameters:
+    1. Request - client of the node."""
+    def __init__(self, client):
+        self._client = client
+        self._nonces = {}
+        self._lock = threading.Lock()
+
+    def load(self, senders):
+        """Fetches pending transaction counts of the senders unknown yet in
+        a single batch.
+        Parameters:
+        1. List - addresses of the senders."""
+        with self._lock:
+            senders = set(s.lower() for s in senders) - set(self._nonces)
+        if not senders:
+            return
+        # Counts are fetched without the lock, so other senders are not
+        # stalled by the node, nonces counted meanwhile are kept
+        with self._client.batch() as b:
+            counts = [(s, b.eth_getTransactionCount(s, "pending")) for s in senders]
+        with self._lock:
+            for sender, count in counts:
+                self._nonces.setdefault(sender, count.result)
+
+    def get(self, sender):
+        """Returns next nonce of the sender, or None if it is unknown yet.
+        Parameters:
+        1. DATA, 20 Bytes - address of the sender."""
+        return self._nonces.get(sender.lower())
+
+    def next(self, sender):
+        """Returns next nonce of the sender and reserves it.
+        Parameters:
+        1. DATA, 20 Bytes - address of the sender."""
+        sender = sender.lower()
+        with self._lock:
+            nonce = self._nonces.get(sender)
+            if nonce is not None:
+                self._nonces[sender] = nonce + 1
+                return nonce
+        count = self._client.eth_getTransactionCount(sender, "pending")
+        with self._lock:
+            nonce = self._nonces.setdefault(sender, count)
+            self._nonces[sender] = nonce + 1
+            return nonce
+
+    def set(self, sender, nonce):
+        """Sets next nonce of the sender.
+        Parameters:
+        1. DATA, 20 Bytes - address of the sender.
+        2. Number - the nonce."""
+        with self._lock:
+            self._nonces[sender.lower()] = nonce
+
+    def reset(self, sender):
+        """Forgets next nonce of the sender, it is fetched from the node by
+        the next 'next'.
+        Parameters:
+        1. DATA, 20 Bytes - address of the sender."""
+        with self._lock:
+            self._nonces.pop(sender.lower(), None)
+
+    def resync(self, sender):
+        """Sets next nonce of the sender to its pending transaction count on
+        the node and returns it.
+        Parameters:
+        1. DATA, 20 Bytes - address of the sender."""
+        sender = sender.lower()
+        nonce = self._client.eth_getTransactionCount(sender, "pending")
+        with self._lock:
+            self._nonces[sender] = nonce
+        return nonce
+
+class TransactionStatus(object):
+    """Status of a transaction submitted to the TransactionPipeline.
+    Attributes:
+    - tx: Object - the submitted transaction.
+    - state: String - 'queued', 'sent' when the node accepted the
+    transaction, or 'failed'.
+    - nonce: Number - nonce the transaction is sent with.
+    - hash: DATA, 32 Bytes - hash of the sent transaction.
+    - error: Exception - reason of the failure.
+    - attempts: Number - number of sends of the transaction."""
+    QUEUED, SENT, FAILED = "queued", "sent", "failed"
+
+    def __init__(self, tx):
+        self.tx = tx
+        self.sender = tx["from"].lower()
+        self.state = self.QUEUED
+        self.nonce = None
+        self.hash = None
+        self.error = None
+        self.attempts = 0
+        self._raw = None
+
+    def __repr__(self):
+        return "<TransactionStatus %s %s nonce=%s>" % (self.state, self.sender, self.nonce)
+
+    @property
+    def done(self):
+        "Returns True if the transaction is sent or failed."
+        return self.state != self.QUEUED
+
+class TransactionPipeline(object):
+    """Submits many transactions in JSON-RPC batches with bounded
+    concurrency. Nonces are counted locally per sender by NonceManager, e.g.:
+        with TransactionPipeline(r, signer=sign) as p:
+            statuses = [p.submit(tx) for tx in payouts]
+        failed = [s for s in statuses if s.state == s.FAILED]
+    Transactions are signed by the 'signer' function and sent by
+    'eth_sendRawTransaction', or without it sent by 'eth_sendTransaction' to
+    be signed by the node. The 'nonce' of the transaction is set to a hex
+    QUANTITY before signing.
+    Transactions rejected with a used nonce, e.g. 'nonce too low', are sent
+    again with a new one up to 'retries' times. After any rejection nonce of
+    the sender is resynced from its pending transaction count, once batches
+    of the sender in flight are done. Nonces missing below nonces the node
+    accepted are listed in 'gaps' as (sender, nonce) pairs, transactions
+    above them are stuck until the gaps are filled. With 'fillGaps' True
+    they are filled with zero value transfers to the sender itself, signed
+    by 'signer' and listed in 'fillers'. Whether the node accepted
+    transactions of a batch failed by EthConnectionError is unknown, they
+    are reported failed with the error, as well as transactions of senders
+    whose nonce can't be fetched.
+    Parameters:
+    1. Request - client of the node.
+    2. Function - (optional) signer(tx) returning the signed raw
+    transaction as hex string or bytes.
+    3. Number - (optional) maximum number of transactions in a batch.
+    4. Number - (optional) maximum number of batches sent concurrently.
+    5. Number - (optional) maximum number of sends of a transaction.
+    6. NonceManager - (optional) nonces shared with other pipelines.
+    7. Boolean - (optional) fill gaps of nonces with zero value transfers."""
+    _usedNonce = ("nonce too low", "nonce too high", "replacement transaction underpriced")
+    _knownTx = ("already known", "known transaction")
+    _feeFields = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas", "chainId")
+
+    def __init__(self, client, signer=None, batchsize=100, concurrency=4, retries=3,
+                 nonces=None, fillGaps=False):
+        assert batchsize > 0, "Batch size must be positive"
+        assert concurrency > 0, "Concurrency must be positive"
+        assert retries > 0, "Number of retries must be positive"
+        self._client = client
+        self._signer = signer
+        self._nonces = NonceManager(client) if nonces is None else nonces
+        self._queued = collections.deque()
+        # Accepted nonces and the last transaction of each sender
+        self._sent = collections.defaultdict(set)
+        self._templates = {}
+        self.batchsize = batchsize
+        self.concurrency = concurrency
+        self.retries = retries
+        self.fillGaps = fillGaps
+        self.gaps = []
+        self.fillers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, *exc):
+        if exctype is None:
+            self.flush()
+
+    def submit(self, tx):
+        """Queues the transaction and returns its TransactionStatus, the
+        transaction is sent by 'flush'.
+        Parameters:
+        1. Object - the transaction object of 'eth_sendTransaction' without
+        'nonce', 'from' is required."""
+        assert isinstance(tx, dict), "Given Data must be a type of dict"
+        assert "from" in tx, "Sender of the transaction is required"
+        status = TransactionStatus(tx)
+        self._queued.append(status)
+        return status
+
+    def send(self, txs):
+        """Sends the transactions and returns list of their
+        TransactionStatus in order of the transactions.
+        Parameters:
+        1. List - transaction objects, see 'submit'."""
+        statuses = [self.submit(tx) for tx in txs]
+        self.flush()
+        return statuses
+
+    def _take(self, blocked):
+        # Takes next batch skipping senders waiting for a resync
+        batch, skipped = [], []
+        queued = self._queued
+        while queued and len(batch) < self.batchsize:
+            status = queued.popleft()
+            if status.sender in blocked:
+                skipped.append(status)
+                continue
+            try:
+                status.nonce = self._nonces.next(status.sender)
+            except (EthError, EthConnectionError) as exc:
+                # Nonce of the sender is unknown, the transaction is not sent
+                status.state, status.error = status.FAILED, exc
+                continue
+            status.attempts += 1
+            self._templates[status.sender] = status.tx
+            batch.append(status)
+        queued.extendleft(reversed(skipped))
+        return batch
+
+    def _payload(self, status):
+        tx = dict(status.tx, nonce=hex(status.nonce))
+        if self._signer is None:
+            return tx
+        raw = self._signer(tx)
+        if isinstance(raw, bytes):
+            raw = "0x" + hexlify(raw).decode("ascii")
+        status._raw = raw
+        return raw
+
+    def _send(self, batch, results):
+        # Runs in a worker thread, outcomes are handled by 'flush' waiting
+        # for them, so they are put whatever happens
+        outcomes = None
+        try:
+            outcomes = self._execute(batch)
+        except Exception as exc:
+            outcomes = [(status, None, exc) for status in batch]
+        finally:
+            if outcomes is None:
+                error = EthError("Sending of the batch is interrupted")
+                outcomes = [(status, None, error) for status in batch]
+            results.put(outcomes)
+
+    def _execute(self, batch):
+        outcomes = []
+        b = self._client.batch(size=len(batch))
+        for status in batch:
+            try:
+                payload = self._payload(status)
+            except Exception as exc:
+                outcomes.append((status, None, exc))
+                continue
+            if self._signer is None:
+                call = b.eth_sendTransaction(payload)
+            else:
+                call = b.eth_sendRawTransaction(payload)
+            outcomes.append((status, call, None))
+        failure = None
+        try:
+            b.execute()
+        except Exception as exc:
+            # Errors of single calls are read from their results
+            failure = exc
+        for i, (status, call, error) in enumerate(outcomes):
+            if call is None:
+                continue
+            elif not call.done:
+                outcomes[i] = (status, None, failure)
+                continue
+            try:
+                outcomes[i] = (status, call.result, None)
+            except Exception as exc:
+                outcomes[i] = (status, None, exc)
+        return outcomes
+
+    def _update(self, status, result, error, retry, blocked):
+        if error is None:
+            status.state, status.hash = status.SENT, result
+            self._sent[status.sender].add(status.nonce)
+            return
+        message = error.message.lower() if isinstance(error, EthError) else ""
+        if status._raw is not None and any(m in message for m in self._knownTx):
+            status.state, status.hash = status.SENT, hextools.sha3(status._raw)
+            self._sent[status.sender].add(status.nonce)
+            return
+        if any(m in message for m in self._usedNonce) and status.attempts < self.retries:
+            status.nonce = status._raw = None
+            retry.append(status)
+        else:
+            status.state, status.error = status.FAILED, error
+        blocked.add(status.sender)
+
+    def _fill(self, sender, nonce):
+        template = self._templates[sender]
+        tx = {"from": template["from"], "to": template["from"], "value": "0x0", "gas": "0x5208"}
+        tx.update((k, template[k]) for k in self._feeFields if k in template)
+        status = TransactionStatus(tx)
+        status.nonce = nonce
+        status.attempts = 1
+        self.fillers.append(status)
+        try:
+            payload = self._payload(status)
+            if self._signer is None:
+                status.hash = self._client.eth_sendTransaction(payload)
+            else:
+                status.hash = self._client.eth_sendRawTransaction(payload)
+            status.state = status.SENT
+        except Exception as exc:
+            status.state, status.error = status.FAILED, exc
+
+    def _resync(self, sender):
+        try:
+            pending = self._nonces.resync(sender)
+        except (EthError, EthConnectionError):
+            # Nonce is fetched again by the next transaction of the sender
+            self._nonces.reset(sender)
+            self._sent[sender] = set()
+            return
+        sent = set(n for n in self._sent[sender] if n >= pending)
+        if sent:
+            for nonce in range(pending, max(sent)):
+                if nonce not in sent:
+                    self.gaps.append((sender, nonce))
+                    if self.fillGaps:
+                        self._fill(sender, nonce)
+            self._nonces.set(sender, max(sent) + 1)
+        self._sent[sender] = sent
+
+    def flush(self):
+        """Sends all queued transactions and returns when every one of them
+        is sent or failed."""
+        queued = self._queued
+        self._nonces.load(set(s.sender for s in queued))
+        results = queue.Queue()
+        inflight = collections.defaultdict(int)
+        blocked = set()
+        running = 0
+        while queued or running:
+            while running < self.concurrency:
+                batch = self._take(blocked)
+                if not batch:
+                    break
+                for status in batch:
+                    inflight[status.sender] += 1
+                thread = threading.Thread(target=self._send, args=(batch, results))
+                thread.daemon = True
+                thread.start()
+                running += 1
+            if not running:
+                break
+            outcomes = results.get()
+            running -= 1
+            retry = []
+            for status, result, error in outcomes:
+                inflight[status.sender] -= 1
+                self._update(status, result, error, retry, blocked)
+            queued.extendleft(reversed(retry))
+            for sender in [s for s in blocked if not inflight[s]]:
+                self._resync(sender)
+                blocked.discard(sender)
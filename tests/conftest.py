@@ -0,0 +1,26 @@
+# -*- coding: utf8 -*-
+import os, sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_root, "benchmarks"))
+
+def _loadPackage():
+    # The repository is the package itself, so it is imported from the
+    # checkout unless PYETHTOOLS_INSTALLED is set, see benchmarks/bench.py
+    if os.environ.get("PYETHTOOLS_INSTALLED") or "pyethtools" in sys.modules:
+        return
+    try:
+        import importlib.util
+    except ImportError:
+        # Python 2
+        import imp
+        imp.load_module("pyethtools", None, _root, ("", "", imp.PKG_DIRECTORY))
+        return
+    spec = importlib.util.spec_from_file_location(
+        "pyethtools", os.path.join(_root, "__init__.py"),
+        submodule_search_locations=[_root])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["pyethtools"] = module
+    spec.loader.exec_module(module)
+
+_loadPackage()
@@ -0,0 +1,61 @@
+# -*- coding: utf8 -*-
+import pytest
+from pyethtools.abi import Encoder, Decoder
+
+def _encode(types, values):
+    return Encoder("f(%s)" % types).encodeBytes(values)[4:]
+
+def test_decoder_roundtrip():
+    data = _encode("uint256,string,uint256[],(address,bytes)",
+                   [7, "hi", [1, 2], ("0x" + "ab" * 20, b"\x01\x02")])
+    assert Decoder("uint256,string,uint256[],(address,bytes)").decode(data) == \
+        [7, "hi", [1, 2], ("0x" + "ab" * 20, b"\x01\x02")]
+
+@pytest.mark.parametrize("types,values", [
+    ("string,uint256[]", ["hi", [1, 2]]),
+    ("(string,uint256[])", [("hi", [1, 2])]),
+    ("uint256[2][]", [[[1, 2], [3, 4]]]),
+    ("(uint256,bytes)[]", [[(1, b"ab"), (2, b"cd")]]),
+])
+def test_truncated_data_raises(types, values):
+    data = _encode(types, values)
+    decoder = Decoder(types)
+    assert decoder.decode(data) == values
+    for size in range(0, len(data), 32):
+        with pytest.raises(ValueError):
+            decoder.decode(data[:size])
+
+def test_parenthesized_types_are_single_tuple():
+    data = _encode("(uint256,string)", [(5, "x")])
+    assert Decoder("(uint256,string)").decode(data) == [(5, "x")]
+    assert Decoder("f((uint256,string))").decode(data) == [(5, "x")]
+    data = _encode("uint256,string", [5, "x"])
+    assert Decoder("f(uint256,string)").decode(data) == [5, "x"]
+    assert Decoder("uint256,string").decode(data) == [5, "x"]
+
+def test_legacy_truncated_string_raises():
+    data = _encode("uint256,string", [5, "x" * 40])
+    with pytest.raises(ValueError):
+        Decoder((int, str)).decode(data[:-32])
+
+def test_hex_bytes_are_sized_as_bytes():
+    data = "0x70a08231" + "11" * 32
+    assert Encoder("f(bytes)").encodeBytes([data]) == \
+        Encoder("f(bytes)").encodeBytes([bytes(bytearray.fromhex(data[2:]))])
+    assert len(Encoder("bytes").encodeBytes([data])) == 32 + 32 + 64
+
+@pytest.mark.parametrize("types,values", [
+    ("uint256,string", [5, "x"]),
+    ("(uint256,string)", [(5, "x")]),
+    ("((uint256,string))", [((5, "x"),)]),
+    ("(uint256,string)[],bool", [[(1, "a"), (2, "b")], True]),
+    ("f(uint256,string)", [5, "x"]),
+])
+def test_types_roundtrip(types, values):
+    encoder = Encoder(types)
+    assert Decoder(types).decode(encoder.encodeBytes(values)[len(encoder._prefix):]) == values
+
+def test_bare_tuple_encodes_single_argument():
+    assert Encoder("(uint256,string)").encodeBytes([(5, "x")]) == \
+        Encoder("f((uint256,string))").encodeBytes([(5, "x")])[4:]
+    assert Encoder("uint256,string").methodID == "0x"
@@ -0,0 +1,69 @@
+# -*- coding: utf8 -*-
+import asyncio
+import pytest
+from stubnode import StubNode
+from pyethtools import AsyncRequest, HTTPTransport, EthConnectionError, EthParseError
+
+@pytest.fixture(scope="module")
+def node():
+    with StubNode(txcount=2) as node:
+        yield node
+
+def _run(coroutine):
+    return asyncio.get_event_loop_policy().new_event_loop().run_until_complete(coroutine)
+
+def test_calls_and_iterBlocks(node):
+    async def main():
+        async with AsyncRequest(node.host, node.port) as r:
+            number = await r.eth_blockNumber
+            blocks = [b async for b in r.iterBlocks(1, 10, window=3)]
+            return number, [int(b["number"], 16) for b in blocks]
+    assert _run(main()) == (0x10d4f, list(range(1, 11)))
+
+def test_no_sync_transport(node):
+    r = AsyncRequest(node.host, node.port)
+    assert not isinstance(r._transport, HTTPTransport)
+    with pytest.raises(NotImplementedError):
+        r._transport.send(b"{}")
+
+def test_sync_only_methods_are_disabled(node):
+    r = AsyncRequest(node.host, node.port)
+    with pytest.raises(TypeError):
+        with r:
+            pass
+    with pytest.raises(NotImplementedError):
+        r.batch()
+    with pytest.raises(NotImplementedError):
+        r.fanout([("eth_blockNumber", [])])
+    with pytest.raises(NotImplementedError):
+        r.iterLogs({"fromBlock": "0x1"})
+
+async def _serve(response):
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        await reader.read(1)
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+@pytest.mark.parametrize("response,error", [
+    (b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 3\r\nConnection: close\r\n\r\nbad",
+     EthConnectionError),
+    (b"HTTP/1.1 200 OK\r\nContent-Length: 7\r\nConnection: close\r\n\r\nnotjson",
+     EthParseError),
+])
+def test_bad_responses_raise(response, error):
+    async def main():
+        server = await _serve(response)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with AsyncRequest("http://127.0.0.1", port) as r:
+                with pytest.raises(error) as exc:
+                    await r.eth_blockNumber
+                return str(exc.value)
+        finally:
+            server.close()
+    message = _run(main())
+    assert "502 Bad Gateway" in message if error is EthConnectionError else "notjson" in message
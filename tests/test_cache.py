@@ -0,0 +1,161 @@
+# -*- coding: utf8 -*-
+import os, threading, time
+import pytest
+from pyethtools import Request, CallableTransport, RequestCache, Coalescer
+
+_hash = "0x" + "ab" * 32
+
+class _Node(object):
+    "Node counting calls, receipts are mined at 'mined' block."
+    def __init__(self, head=1000):
+        self.head = head
+        self.mined = None
+        self.calls = 0
+
+    def handle(self, request):
+        if isinstance(request, list):
+            return [self.handle(r) for r in request]
+        self.calls += 1
+        method = request["method"]
+        if method == "eth_blockNumber":
+            result = hex(self.head)
+        elif method == "eth_getTransactionReceipt":
+            result = None if self.mined is None else {
+                "transactionHash": request["params"][0], "blockHash": "0x" + "cd" * 32,
+                "blockNumber": hex(self.mined)}
+        else:
+            result = "0x1"
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+def _client(node, **params):
+    cache = RequestCache(**params)
+    return Request("stub", 0, cache=cache, transport=CallableTransport(node.handle)), cache
+
+def _twice(node, call):
+    call()
+    calls = node.calls
+    call()
+    return node.calls == calls
+
+def test_tags_are_never_cached():
+    node = _Node()
+    r, cache = _client(node)
+    r.eth_blockNumber
+    for block in ("latest", "pending", "earliest"):
+        assert not _twice(node, lambda: r.eth_getBalance("0x01", block))
+    assert not _twice(node, lambda: r.eth_blockNumber)
+    assert cache.stats()["hits"] == 0
+
+def test_state_calls_are_cached_below_depth():
+    node = _Node(head=1000)
+    r, cache = _client(node, depth=10)
+    # Head is unknown until 'eth_blockNumber' is called
+    assert not _twice(node, lambda: r.eth_getBalance("0x01", 100))
+    assert r.eth_blockNumber == 1000
+    assert cache.head == 1000
+    assert not _twice(node, lambda: r.eth_getBalance("0x01", 991))
+    assert _twice(node, lambda: r.eth_getBalance("0x01", 990))
+    assert _twice(node, lambda: r.eth_getBalance("0x01", 100))
+
+def test_receipts_are_cached_once_final():
+    node = _Node(head=1000)
+    r, cache = _client(node, depth=10)
+    r.eth_blockNumber
+    # Unmined receipts are never stored
+    assert not _twice(node, lambda: r.eth_getTransactionReceipt(_hash))
+    node.mined = 995
+    assert not _twice(node, lambda: r.eth_getTransactionReceipt(_hash))
+    node.head = 1005
+    r.eth_blockNumber
+    assert _twice(node, lambda: r.eth_getTransactionReceipt(_hash))
+
+def test_block_hash_calls_need_no_head():
+    node = _Node()
+    r, cache = _client(node)
+    assert _twice(node, lambda: r.eth_getBlockTransactionCountByHash(_hash))
+
+def test_batch_updates_head_before_results():
+    node = _Node(head=1000)
+    r, cache = _client(node, depth=10)
+    with r.batch() as b:
+        b.eth_blockNumber
+        b.eth_getBalance("0x01", 900)
+        b.eth_getBalance("0x01", 999)
+    assert not _twice(node, lambda: r.eth_getBalance("0x01", 999))
+    calls = node.calls
+    r.eth_getBalance("0x01", 900)
+    assert node.calls == calls
+
+def test_disk_cache_keeps_final_results_only(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    node = _Node(head=1000)
+    r, cache = _client(node, path=path, depth=10)
+    r.eth_blockNumber
+    r.eth_getBalance("0x01", 900)
+    r.eth_getBalance("0x01", 999)
+    cache.close()
+    assert os.path.exists(path)
+    r, cache = _client(node, path=path, depth=10)
+    assert _twice(node, lambda: r.eth_getBalance("0x01", 900))
+    assert not _twice(node, lambda: r.eth_getBalance("0x01", 999))
+    cache.close()
+
+class _SlowNode(object):
+    "Node answering when 'release' is set, counts calls by method."
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def handle(self, request):
+        with self._lock:
+            self.calls[request["method"]] = self.calls.get(request["method"], 0) + 1
+        self.release.wait(5)
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x10"}
+
+def _concurrently(count, call):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def _wait(condition):
+    deadline = time.time() + 5
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+    assert condition()
+
+def test_identical_concurrent_calls_make_one_call():
+    node, coalesce = _SlowNode(), Coalescer()
+    r = Request("stub", 0, coalesce=coalesce, transport=CallableTransport(node.handle))
+    threads, results = _concurrently(8, lambda: r.eth_getBalance("0x01", 5))
+    _wait(lambda: coalesce.shared == 7)
+    node.release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [16] * 8
+    assert node.calls == {"eth_getBalance": 1} and coalesce.calls == 1
+
+def test_state_changing_calls_are_not_coalesced():
+    node, coalesce = _SlowNode(), Coalescer(ttl=10)
+    r = Request("stub", 0, coalesce=coalesce, transport=CallableTransport(node.handle))
+    threads, results = _concurrently(4, lambda: r.eth_sendRawTransaction("0x01"))
+    # Every call reaches the node while the others are in flight
+    _wait(lambda: node.calls.get("eth_sendRawTransaction") == 4)
+    node.release.set()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4
+    assert coalesce.calls == 0 and coalesce.shared == 0
+
+def test_ttl_applies_to_tag_calls_only():
+    node, coalesce = _SlowNode(), Coalescer(ttl=10)
+    node.release.set()
+    r = Request("stub", 0, coalesce=coalesce, transport=CallableTransport(node.handle))
+    for _ in range(3):
+        r.eth_blockNumber
+        r.eth_getBalance("0x01", "latest")
+        r.eth_getBalance("0x01", "pending")
+        r.eth_getBalance("0x01", 5)
+    assert node.calls == {"eth_blockNumber": 1, "eth_getBalance": 2 + 3}
@@ -0,0 +1,58 @@
+# -*- coding: utf8 -*-
+import os
+from pyethtools import Request, CallableTransport, Checkpoint, LogScanner
+
+def _handle(request):
+    if request["method"] == "eth_blockNumber":
+        result = "0x14"
+    else:
+        result = {"number": request["params"][0], "transactions": []}
+    return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+def _read(path):
+    with open(path) as f:
+        return int(f.read())
+
+def test_saves_are_written_every_n_blocks(tmp_path):
+    path = str(tmp_path / "scan.checkpoint")
+    checkpoint = Checkpoint(path, every=3, interval=60)
+    for number in range(1, 6):
+        checkpoint.save(number)
+    assert _read(path) == 3
+    assert checkpoint.load() == 5
+    assert Checkpoint(path).load() == 3
+    checkpoint.close()
+    assert _read(path) == 5
+    assert not os.path.exists(path + ".tmp")
+
+def test_saves_are_written_after_interval(tmp_path):
+    path = str(tmp_path / "scan.checkpoint")
+    checkpoint = Checkpoint(path, every=1000, interval=0)
+    checkpoint.save(7)
+    assert _read(path) == 7
+    # Nothing pending, the file is kept
+    checkpoint.close()
+    assert _read(path) == 7
+
+def test_iterBlocks_writes_the_last_block_on_close(tmp_path):
+    path = str(tmp_path / "scan.checkpoint")
+    r = Request("stub", 0, transport=CallableTransport(_handle))
+    blocks = r.iterBlocks(1, 10, checkpoint=Checkpoint(path, every=100, interval=60))
+    for block in blocks:
+        if block["number"] == "0x4":
+            break
+    blocks.close()
+    # Block 4 was yielded but not processed
+    assert _read(path) == 3
+    numbers = [int(b["number"], 16) for b in r.iterBlocks(1, checkpoint=path)]
+    assert numbers == list(range(4, 21))
+    assert _read(path) == 20
+
+def test_scanner_closes_checkpoint(tmp_path):
+    path = str(tmp_path / "scan.checkpoint")
+    def handle(request):
+        return {"jsonrpc": "2.0", "id": request["id"], "result": []}
+    r = Request("stub", 0, transport=CallableTransport(handle))
+    checkpoint = Checkpoint(path, every=100, interval=60)
+    assert list(LogScanner(r, {}, chunk=10, checkpoint=checkpoint).scan(0, 95)) == []
+    assert _read(path) == 95
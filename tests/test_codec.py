@@ -0,0 +1,82 @@
+# -*- coding: utf8 -*-
+import json
+import pytest
+from pyethtools import Request, CallableTransport, EthError
+from pyethtools.codec import _ItemScanner
+
+class _ChunkedTransport(CallableTransport):
+    "Transport streaming the response in chunks of the given size."
+    def __init__(self, handler, size):
+        CallableTransport.__init__(self, handler)
+        self._size = size
+
+    def stream(self, postfields):
+        body = self.send(postfields)
+        for i in range(0, len(body), self._size):
+            yield body[i:i+self._size]
+
+_transactions = [
+    {"hash": "0x01", "input": "0x", "accessList": [{"address": "0x02", "storageKeys": []}]},
+    {"hash": "0x03", "note": "quote \" backslash \\ brackets ]}[{ comma , colon :"},
+    {"hash": "0x04", "note": u"unicode за \\u escaped", "nested": [[{}], []]},
+    "0x05",
+]
+
+def _client(result=None, error=None, size=1):
+    def handle(request):
+        response = {"jsonrpc": "2.0", "id": request["id"]}
+        if error is not None:
+            response["error"] = error
+        else:
+            response["result"] = result
+        return response
+    return Request("stub", 0, transport=_ChunkedTransport(handle, size))
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 4096])
+def test_transactions_are_split_at_any_chunk_boundary(size):
+    block = {"number": "0x1", "uncles": [{"transactions": ["0xff"]}], "extra": "[\"",
+             "transactions": _transactions, "size": "0x2"}
+    r = _client(block, size=size)
+    assert list(r.iterTransactions(1)) == _transactions
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_logs_are_streamed(size):
+    logs = [{"topics": ["0x%064x" % i], "data": "0x" + "ab" * i} for i in range(20)]
+    r = _client(logs, size=size)
+    assert list(r.iterLogs({"fromBlock": "0x0"})) == logs
+    r = _client([], size=size)
+    assert list(r.iterLogs({"fromBlock": "0x0"})) == []
+
+@pytest.mark.parametrize("size", [1, 4096])
+def test_error_response_raises(size):
+    r = _client(error={"code": -32005, "message": "query returned more than 10000 results",
+                       "data": {"from": "0x0", "to": "0x[1]"}}, size=size)
+    with pytest.raises(EthError) as e:
+        list(r.iterLogs({"fromBlock": "0x0"}))
+    assert e.value.code == -32005 and e.value.data == {"from": "0x0", "to": "0x[1]"}
+
+def test_null_result_yields_nothing():
+    r = _client(None)
+    assert list(r.iterTransactions(1)) == []
+    assert list(r.iterLogs({"fromBlock": "0x0"})) == []
+
+def test_truncated_response_raises():
+    def handle(request):
+        return {"jsonrpc": "2.0", "id": request["id"], "result": []}
+    class Truncated(_ChunkedTransport):
+        def stream(self, postfields):
+            yield b'{"jsonrpc":"2.0","id":74,"result":[{"a":"b'
+    r = Request("stub", 0, transport=Truncated(handle, 1))
+    with pytest.raises(EthError):
+        list(r.iterLogs({"fromBlock": "0x0"}))
+
+def test_scanner_members_and_items():
+    body = json.dumps({"id": 7, "result": {"transactions": [1, {"a": [2]}, "x"]},
+                       "error": None}).encode("utf-8")
+    scanner = _ItemScanner(("result", "transactions"))
+    items = []
+    for i in range(len(body)):
+        items.extend(scanner.feed(body[i:i+1]))
+    assert [json.loads(item) for item in items] == [1, {"a": [2]}, "x"]
+    assert scanner.found and scanner.done
+    assert scanner.members == {"id": 7, "error": None}
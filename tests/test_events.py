@@ -0,0 +1,91 @@
+# -*- coding: utf8 -*-
+import json
+import pytest
+from pyethtools import Event, EventLog, EventRegistry, Log
+from pyethtools.abi import Encoder
+
+_transfer = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+_alice, _bob = "0x" + "aa" * 20, "0x" + "bb" * 20
+
+def _word(value):
+    return "0x%064x" % (value % (1 << 256))
+
+def _address(address):
+    return "0x" + "00" * 12 + address[2:]
+
+def _log(topics, types="", values=()):
+    data = Encoder(types).encode(list(values)) if types else "0x"
+    return {"address": "0x" + "cc" * 20, "topics": topics, "data": data,
+            "blockNumber": "0x1", "logIndex": "0x0"}
+
+def test_erc20_and_erc721_transfers_by_topic_count():
+    registry = EventRegistry(["Transfer(address,address,uint256)"])
+    erc20 = _log([_transfer, _address(_alice), _address(_bob)], "uint256", [10**18])
+    erc721 = _log([_transfer, _address(_alice), _address(_bob), _word(7)])
+    decoded = registry.decodeLogs([erc20, erc721])
+    assert [log.args for log in decoded] == [
+        {"arg0": _alice, "arg1": _bob, "arg2": 10**18},
+        {"arg0": _alice, "arg1": _bob, "arg2": 7}]
+    assert all(log.name == "Transfer" and isinstance(log, EventLog) for log in decoded)
+
+def test_indexed_arguments_fix_topic_count():
+    registry = EventRegistry(
+        ["Transfer(address indexed from, address indexed to, uint256 value)"])
+    erc721 = _log([_transfer, _address(_alice), _address(_bob), _word(7)])
+    assert registry.decode(erc721) is erc721
+    erc20 = _log([_transfer, _address(_alice), _address(_bob)], "uint256", [5])
+    log = registry.decode(erc20)
+    assert (log["from"], log["to"], log["value"]) == (_alice, _bob, 5)
+
+def test_dynamic_data_and_indexed_hashes():
+    event = Event.fromSignature(
+        "Note(string indexed key, int8 delta, string text, (uint256,bytes)[] items)")
+    hashed = "0x" + "dd" * 32
+    log = _log([event.topic, hashed], "int8,string,(uint256,bytes)[]",
+               [-3, u"héllo", [(1, b"\x01"), (2, b"")]])
+    decoded = EventRegistry([event]).decode(log)
+    assert decoded.args == {"key": bytes(bytearray.fromhex("dd" * 32)), "delta": -3,
+                            "text": u"héllo", "items": [(1, b"\x01"), (2, b"")]}
+
+def test_signed_integers():
+    event = Event.fromSignature("Moved(int256 indexed from, int256 to)")
+    log = _log([event.topic, _word(-5)], "int256", [-(1 << 255)])
+    assert event.decode(log).args == {"from": -5, "to": -(1 << 255)}
+    assert event.decode(Log(log)).args == {"from": -5, "to": -(1 << 255)}
+
+def test_bytes_logs_decode_the_same():
+    registry = EventRegistry(["Transfer(address,address,uint256)",
+                              "Note(string text)"])
+    logs = [_log([_transfer, _address(_alice), _address(_bob)], "uint256", [3]),
+            _log([registry.events[1].topic], "string", ["hi"])]
+    assert [l.args for l in registry.decodeLogs([Log(l) for l in logs])] == \
+        [l.args for l in registry.decodeLogs(logs)]
+
+def test_unknown_and_malformed_logs_pass_through():
+    registry = EventRegistry(["Transfer(address,address,uint256)", "Note(string text)"])
+    note = registry.events[1].topic
+    unknown = _log(["0x" + "ee" * 32], "uint256", [1])
+    anonymous = _log([])
+    truncated = _log([_transfer, _address(_alice), _address(_bob)])
+    short = _log([note], "string", ["hello"])
+    short["data"] = short["data"][:-64]
+    topic = _log([_transfer, _address(_alice)[:-2], _address(_bob)], "uint256", [1])
+    logs = [unknown, anonymous, truncated, short, topic]
+    assert registry.decodeLogs(logs) == logs
+    for log in logs[2:]:
+        assert registry.decode(Log(log)).__class__ is Log
+
+def test_abi_entries():
+    abi = json.dumps([
+        {"type": "function", "name": "transfer", "inputs": []},
+        {"type": "event", "name": "Batch", "anonymous": False, "inputs": [
+            {"name": "owner", "type": "address", "indexed": True},
+            {"name": "items", "type": "tuple[]", "indexed": False, "components": [
+                {"name": "id", "type": "uint256"}, {"name": "note", "type": "string"}]}]},
+    ])
+    registry = EventRegistry()
+    events = registry.addABI(abi)
+    assert [e.signature for e in events] == ["Batch(address,(uint256,string)[])"]
+    log = _log([events[0].topic, _address(_alice)], "(uint256,string)[]", [[(1, "a")]])
+    assert registry.decode(log).args == {"owner": _alice, "items": [(1, "a")]}
+    assert registry.get(events[0].topic.upper().replace("0X", "0x")) == events
@@ -0,0 +1,34 @@
+# -*- coding: utf8 -*-
+import time
+import pytest
+from stubnode import StubNode
+from pyethtools import Request, CallableTransport, CurlFanout, PipelineFanout, EthTimeoutError
+
+def _handle(request):
+    # Calls of odd blocks are never answered
+    number = int(request["params"][0], 16)
+    return {"jsonrpc": "2.0", "id": None if number % 2 else request["id"], "result": hex(number)}
+
+def test_pipeline_fails_unanswered_calls_after_timeout():
+    client = Request("stub", 0, transport=CallableTransport(_handle))
+    calls = [("eth_getBlockByNumber", [hex(n), False]) for n in range(6)]
+    start = time.time()
+    with PipelineFanout(client, 4, timeout=0.1) as fan:
+        results = list(fan.run(calls, failfast=False))
+    assert time.time() - start < 5
+    assert results[::2] == ["0x0", "0x2", "0x4"]
+    assert all(isinstance(r, EthTimeoutError) for r in results[1::2])
+
+def test_curl_fails_calls_after_timeout():
+    with StubNode(delay=0.5) as node:
+        client = Request(node.host, node.port)
+        with CurlFanout(client, 2, timeout=0.1) as fan:
+            results = list(fan.run([("eth_blockNumber", [])] * 2, failfast=False))
+        client.close()
+    assert all(isinstance(r, EthTimeoutError) for r in results)
+
+def test_curl_timeout_of_single_call():
+    with StubNode(delay=0.5) as node:
+        with Request(node.host, node.port, timeout=0.1) as client:
+            with pytest.raises(EthTimeoutError):
+                client.eth_blockNumber
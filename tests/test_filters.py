@@ -0,0 +1,79 @@
+# -*- coding: utf8 -*-
+import threading, time
+import pytest
+from pyethtools import Request, CallableTransport, FilterManager, EthError, EthConnectionError
+
+class _Node(object):
+    "Node of block filters answering 'eth_getFilterChanges' with new blocks."
+    def __init__(self):
+        self.down = False
+        self.broken = set()
+        self.blocks = []
+        self.filters = {}
+
+    def handle(self, request):
+        if self.down:
+            raise EthConnectionError("stub", 0)
+        if isinstance(request, list):
+            return [self.handle1(r) for r in request]
+        return self.handle1(request)
+
+    def handle1(self, r):
+        method, params = r["method"], r["params"]
+        if method == "eth_newBlockFilter":
+            fid = hex(len(self.filters) + 1)
+            self.filters[fid] = len(self.blocks)
+            return {"jsonrpc": "2.0", "id": r["id"], "result": fid}
+        if method == "eth_uninstallFilter":
+            return {"jsonrpc": "2.0", "id": r["id"], "result": True}
+        fid = params[0]
+        if fid in self.broken:
+            return {"jsonrpc": "2.0", "id": r["id"],
+                    "error": {"code": -32000, "message": "filter is broken"}}
+        changes = self.blocks[self.filters[fid]:]
+        self.filters[fid] = len(self.blocks)
+        return {"jsonrpc": "2.0", "id": r["id"], "result": changes}
+
+def _manager(node):
+    client = Request("stub", 0, transport=CallableTransport(node.handle))
+    return FilterManager(client, mininterval=0.01, maxinterval=0.04)
+
+def test_poll_raises_connection_error_and_backs_off():
+    node = _Node()
+    fm = _manager(node)
+    fm.add("blocks")
+    node.down = True
+    with pytest.raises(EthConnectionError):
+        fm.poll()
+    assert fm.interval == 0.02
+
+def test_poll_dispatches_other_filters_before_filter_error():
+    node = _Node()
+    fm = _manager(node)
+    seen = []
+    fm.add("blocks", callback=seen.extend)
+    fm.add("blocks")
+    node.broken.add("0x2")
+    node.blocks.append("0x01")
+    with pytest.raises(EthError):
+        fm.poll()
+    assert seen == ["0x01"]
+
+def test_background_polling_survives_failures():
+    node = _Node()
+    fm = _manager(node)
+    seen = []
+    fm.add("blocks", callback=seen.extend)
+    fm.start()
+    try:
+        node.down = True
+        time.sleep(0.1)
+        assert fm._thread.is_alive() and isinstance(fm.error, EthConnectionError)
+        node.down = False
+        node.blocks.append("0x01")
+        deadline = time.time() + 2
+        while not seen and time.time() < deadline:
+            time.sleep(0.01)
+        assert seen == ["0x01"] and fm.error is None
+    finally:
+        fm.stop()
@@ -0,0 +1,28 @@
+# -*- coding: utf8 -*-
+import io, json, os
+import pytest
+from pyethtools import hextools as ht
+
+# Results of 'decodeData' before it was rewritten in linear time, captured
+# from the README example, random words and 'getData' payloads
+with io.open(os.path.join(os.path.dirname(__file__), "fixtures", "decodedata.json"),
+             encoding="utf8") as f:
+    _fixtures = json.load(f)
+
+@pytest.mark.parametrize("case", _fixtures, ids=[c["name"] for c in _fixtures])
+def test_decodeData_fixtures(case):
+    assert ht.decodeData(case["data"]) == case["expected"]
+    assert list(ht.iterDecodeData(case["data"])) == case["expected"]
+
+def test_decodeData_readme():
+    data = [c for c in _fixtures if c["name"] == "readme"][0]["data"]
+    values = ht.decodeData(data)
+    assert values[:7] == [255, "0xca35b7d915458ef5401234568dfe2f44e8fa733c", "123456789",
+                          340282366920938463463374607431768211456, 545, 0, u"заза"]
+    assert values[7].startswith("The Solidity optimizer operates on assembly")
+    assert values[7].endswith("combine them into an expression class")
+    assert len(values) == 8
+
+def test_iterDecodeData_validates_eagerly():
+    with pytest.raises(AssertionError):
+        ht.iterDecodeData("0x" + "00" * 31)
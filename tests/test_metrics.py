@@ -0,0 +1,117 @@
+# -*- coding: utf8 -*-
+import pytest
+from pyethtools import Request, CallableTransport, Metrics, EthError
+from pyethtools.transport import Transport
+
+def _handle(request):
+    if isinstance(request, list):
+        return [_handle(r) for r in request]
+    if request["method"] == "eth_getCode":
+        return {"jsonrpc": "2.0", "id": request["id"],
+                "error": {"code": -32000, "message": "missing trie node"}}
+    return {"jsonrpc": "2.0", "id": request["id"], "result": "0x10"}
+
+def _client(metrics, handler=_handle):
+    return Request("stub", 0, metrics=metrics, transport=CallableTransport(handler))
+
+def test_record_and_snapshot():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.record({"method": "eth_call"}, {"result": "0x"}, {"network": 0.05}, 10, 20)
+    metrics.record({"method": "eth_call"}, {"error": {}}, {"network": 0.5}, 10, 30)
+    metrics.record({"method": "eth_call"}, None, {"network": 5.0, "encode": 0.0}, 10, 0)
+    stats = metrics.snapshot()["eth_call"]
+    assert (stats["calls"], stats["errors"], stats["sent"], stats["received"]) == (3, 2, 30, 50)
+    assert stats["network"]["count"] == 3 and stats["network"]["sum"] == pytest.approx(5.55)
+    assert stats["network"]["buckets"] == [(0.1, 1), (1.0, 2), (float("inf"), 3)]
+    assert stats["encode"]["count"] == 1 and stats["decode"]["count"] == 0
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+def test_calls_and_errors_are_recorded_by_method():
+    metrics = Metrics()
+    r = _client(metrics)
+    r.eth_blockNumber
+    with pytest.raises(EthError):
+        r.eth_getCode("0x01", "latest")
+    snapshot = metrics.snapshot()
+    assert snapshot["eth_blockNumber"]["calls"] == 1
+    assert snapshot["eth_blockNumber"]["errors"] == 0
+    assert snapshot["eth_getCode"]["errors"] == 1
+    for phase in ("encode", "network", "decode"):
+        assert snapshot["eth_blockNumber"][phase]["count"] == 1
+
+def test_batch_calls_are_recorded_by_method():
+    metrics = Metrics()
+    r = _client(metrics)
+    with pytest.raises(EthError):
+        with r.batch() as b:
+            b.eth_blockNumber
+            b.eth_getBalance("0x01")
+            b.eth_getBalance("0x02")
+            b.eth_getCode("0x01")
+    snapshot = metrics.snapshot()
+    assert "batch" not in snapshot
+    assert dict((m, (s["calls"], s["errors"])) for m, s in snapshot.items()) == {
+        "eth_blockNumber": (1, 0), "eth_getBalance": (2, 0), "eth_getCode": (1, 1)}
+    assert all(s["network"]["count"] == s["calls"] for s in snapshot.values())
+    sent = sum(s["sent"] for s in snapshot.values())
+    received = sum(s["received"] for s in snapshot.values())
+    assert sent > 0 and received > 0
+
+def test_batch_rejected_as_whole_counts_errors():
+    metrics = Metrics()
+    r = _client(metrics, lambda request: {"jsonrpc": "2.0", "id": None,
+                                          "error": {"code": -32600, "message": "too big"}})
+    with pytest.raises(EthError):
+        with r.batch() as b:
+            b.eth_blockNumber
+            b.eth_getBalance("0x01")
+    snapshot = metrics.snapshot()
+    assert snapshot["eth_blockNumber"]["errors"] == 1
+    assert snapshot["eth_getBalance"]["errors"] == 1
+
+class _Garbage(Transport):
+    def send(self, postfields):
+        return b"<html>Bad gateway</html>"
+
+def test_invalid_response_is_counted_as_error():
+    metrics = Metrics()
+    r = Request("stub", 0, metrics=metrics, transport=_Garbage())
+    with pytest.raises(ValueError):
+        r.eth_blockNumber
+    stats = metrics.snapshot()["eth_blockNumber"]
+    assert stats["calls"] == 1 and stats["errors"] == 1
+    assert stats["received"] == len(b"<html>Bad gateway</html>")
+
+def test_hooks_are_called():
+    metrics = Metrics()
+    seen = []
+    metrics.addHook(before=lambda data: seen.append(("before", data["method"])),
+                    after=lambda data, response, durations: seen.append(
+                        ("after", data["method"], response["result"], sorted(durations))))
+    _client(metrics).eth_blockNumber
+    assert seen == [("before", "eth_blockNumber"),
+                    ("after", "eth_blockNumber", "0x10", ["decode", "encode", "network"])]
+
+def test_prometheus_text():
+    metrics = Metrics(buckets=(0.1, 1.0))
+    metrics.record({"method": "eth_call"}, {"result": "0x"}, {"network": 0.05}, 10, 20)
+    metrics.record({"method": "eth_blockNumber"}, None, {"network": 2.0}, 5, 0)
+    text = metrics.prometheus(prefix="rpc")
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert "# TYPE rpc_calls_total counter" in lines
+    assert 'rpc_calls_total{method="eth_blockNumber"} 1' in lines
+    assert 'rpc_calls_total{method="eth_call"} 1' in lines
+    assert 'rpc_errors_total{method="eth_blockNumber"} 1' in lines
+    assert 'rpc_errors_total{method="eth_call"} 0' in lines
+    assert 'rpc_request_bytes_total{method="eth_call"} 10' in lines
+    assert 'rpc_response_bytes_total{method="eth_call"} 20' in lines
+    assert "# TYPE rpc_duration_seconds histogram" in lines
+    assert 'rpc_duration_seconds_bucket{method="eth_call",phase="network",le="0.1"} 1' in lines
+    assert 'rpc_duration_seconds_bucket{method="eth_blockNumber",phase="network",le="1.0"} 0' in lines
+    assert 'rpc_duration_seconds_bucket{method="eth_blockNumber",phase="network",le="+Inf"} 1' in lines
+    assert 'rpc_duration_seconds_count{method="eth_call",phase="network"} 1' in lines
+    assert 'rpc_duration_seconds_sum{method="eth_call",phase="network"} 0.05' in lines
+    # Phases without records are omitted
+    assert not any('phase="decode"' in line for line in lines)
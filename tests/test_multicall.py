@@ -0,0 +1,98 @@
+# -*- coding: utf8 -*-
+from pyethtools import Request, CallableTransport, Multicall
+from pyethtools.abi import Encoder
+from pyethtools.multicall import MULTICALL3, _aggregatorCode
+
+_holder = "0x" + "11" * 20
+_tokens = ["0x%040x" % t for t in (0xaa, 0xbb, 0xcc)]
+
+# aggregate3 of balanceOf(holder) of the three tokens, encoded by eth_abi
+_calldata = "0x" + (
+    "82ad56cb"
+    "0000000000000000000000000000000000000000000000000000000000000020"
+    "0000000000000000000000000000000000000000000000000000000000000003"
+    "0000000000000000000000000000000000000000000000000000000000000060"
+    "0000000000000000000000000000000000000000000000000000000000000120"
+    "00000000000000000000000000000000000000000000000000000000000001e0"
+    "00000000000000000000000000000000000000000000000000000000000000aa"
+    "0000000000000000000000000000000000000000000000000000000000000001"
+    "0000000000000000000000000000000000000000000000000000000000000060"
+    "0000000000000000000000000000000000000000000000000000000000000024"
+    "70a0823100000000000000000000000011111111111111111111111111111111"
+    "1111111100000000000000000000000000000000000000000000000000000000"
+    "00000000000000000000000000000000000000000000000000000000000000bb"
+    "0000000000000000000000000000000000000000000000000000000000000001"
+    "0000000000000000000000000000000000000000000000000000000000000060"
+    "0000000000000000000000000000000000000000000000000000000000000024"
+    "70a0823100000000000000000000000011111111111111111111111111111111"
+    "1111111100000000000000000000000000000000000000000000000000000000"
+    "00000000000000000000000000000000000000000000000000000000000000cc"
+    "0000000000000000000000000000000000000000000000000000000000000001"
+    "0000000000000000000000000000000000000000000000000000000000000060"
+    "0000000000000000000000000000000000000000000000000000000000000024"
+    "70a0823100000000000000000000000011111111111111111111111111111111"
+    "1111111100000000000000000000000000000000000000000000000000000000"
+    )
+
+# Result of '_aggregatorCode' run by an EVM on '_calldata': the first token
+# returns 5 * 10**18, the second reverts with Error("nope"), the third
+# returns ("tok", 7)
+_result = "0x" + (
+    "0000000000000000000000000000000000000000000000000000000000000020"
+    "0000000000000000000000000000000000000000000000000000000000000003"
+    "0000000000000000000000000000000000000000000000000000000000000060"
+    "00000000000000000000000000000000000000000000000000000000000000e0"
+    "00000000000000000000000000000000000000000000000000000000000001c0"
+    "0000000000000000000000000000000000000000000000000000000000000001"
+    "0000000000000000000000000000000000000000000000000000000000000040"
+    "0000000000000000000000000000000000000000000000000000000000000020"
+    "0000000000000000000000000000000000000000000000004563918244f40000"
+    "0000000000000000000000000000000000000000000000000000000000000000"
+    "0000000000000000000000000000000000000000000000000000000000000040"
+    "0000000000000000000000000000000000000000000000000000000000000064"
+    "08c379a000000000000000000000000000000000000000000000000000000000"
+    "0000002000000000000000000000000000000000000000000000000000000000"
+    "000000046e6f7065000000000000000000000000000000000000000000000000"
+    "0000000000000000000000000000000000000000000000000000000000000000"
+    "0000000000000000000000000000000000000000000000000000000000000001"
+    "0000000000000000000000000000000000000000000000000000000000000040"
+    "0000000000000000000000000000000000000000000000000000000000000080"
+    "0000000000000000000000000000000000000000000000000000000000000040"
+    "0000000000000000000000000000000000000000000000000000000000000007"
+    "0000000000000000000000000000000000000000000000000000000000000003"
+    "746f6b0000000000000000000000000000000000000000000000000000000000"
+    )
+
+def test_multicall_payload_and_results():
+    requests = []
+    def handle(request):
+        requests.append(request)
+        return [{"jsonrpc": "2.0", "id": call["id"], "result": _result} for call in request]
+    r = Request("stub", 0, transport=CallableTransport(handle))
+    balanceOf = Encoder("balanceOf(address)")
+    with Multicall(r) as m:
+        results = [m.call(_tokens[0], balanceOf.encode([_holder]), "uint256"),
+                   m.call(_tokens[1], balanceOf.encode([_holder]), "uint256"),
+                   m.call(_tokens[2], balanceOf.encode([_holder]), "string,uint256")]
+    batch, = requests
+    assert [call["method"] for call in batch] == ["eth_call"]
+    tx, block, overrides = batch[0]["params"]
+    assert tx == {"to": MULTICALL3, "data": _calldata} and block == "latest"
+    assert overrides == {MULTICALL3: {"code": _aggregatorCode}}
+    assert [res.success for res in results] == [True, False, True]
+    assert results[0].result == [5 * 10**18]
+    assert results[1].data[:10] == "0x08c379a0"
+    assert results[2].result == ["tok", 7]
+
+def test_multicall_splits_reads_by_size():
+    requests = []
+    def handle(request):
+        requests.append(request)
+        return [{"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": "down"}}
+                for call in request]
+    r = Request("stub", 0, transport=CallableTransport(handle))
+    m = Multicall(r, size=2, override=False)
+    for token in _tokens:
+        m.call(token, "0x18160ddd")
+    assert m.execute() == [None, None, None]
+    assert len(requests[0]) == 2 and len(requests[0][0]["params"]) == 2
@@ -0,0 +1,64 @@
+# -*- coding: utf8 -*-
+import time
+import pytest
+from stubnode import StubNode
+from pyethtools import MultiRequest, LogScanner, EthConnectionError
+
+@pytest.fixture(scope="module")
+def nodes():
+    live, slow, dead = StubNode(txcount=2), StubNode(txcount=2, delay=0.02), StubNode()
+    dead.close()
+    yield live, slow, dead
+    live.close()
+    slow.close()
+
+def _client(*nodes, **params):
+    params.setdefault("lagcheck", 0)
+    params.setdefault("cooldown", 0.01)
+    return MultiRequest([(n.host, n.port) for n in nodes], **params)
+
+def _state(r, node):
+    return [e for e in r.endpoints() if e["port"] == node.port][0]
+
+def test_failover_and_dead_node_ranked_last(nodes):
+    live, slow, dead = nodes
+    with _client(dead, slow, live) as r:
+        assert r.eth_blockNumber == 0x10d4f
+        for _ in range(5):
+            r.eth_blockNumber
+        time.sleep(0.05)
+        # Cooldown of the dead node is over, it is still ranked last
+        assert r._candidates()[-1].client._port == dead.port
+        assert _state(r, dead)["latency"] == 0.0 and _state(r, dead)["errors"] > 0
+
+def test_all_nodes_down_raises(nodes):
+    live, slow, dead = nodes
+    with _client(dead, dead) as r:
+        with pytest.raises(EthConnectionError):
+            r.eth_blockNumber
+
+def test_fanout_is_routed_with_failover(nodes):
+    live, slow, dead = nodes
+    with _client(dead, live) as r:
+        calls = [("eth_getBlockByNumber", [hex(n), False]) for n in range(1, 21)]
+        blocks = list(r.fanout(calls, concurrency=4))
+        assert [int(b["number"], 16) for b in blocks] == list(range(1, 21))
+        assert _state(r, dead)["errors"] > 0 and _state(r, live)["latency"] > 0
+
+def test_iterBlocks_is_routed(nodes):
+    live, slow, dead = nodes
+    with _client(dead, live) as r:
+        numbers = [int(b["number"], 16) for b in r.iterBlocks(5, 15, window=4)]
+        assert numbers == list(range(5, 16))
+
+def test_LogScanner_is_routed(nodes):
+    live, slow, dead = nodes
+    with _client(dead, live) as r:
+        assert list(LogScanner(r, {"address": "0x01"}, chunk=10).scan(1, 100)) == []
+        assert _state(r, live)["latency"] > 0
+
+def test_iterLogs_fails_over(nodes):
+    live, slow, dead = nodes
+    with _client(dead, live) as r:
+        assert list(r.iterLogs({"fromBlock": "0x1", "toBlock": "0x2"})) == []
+        assert _state(r, dead)["errors"] > 0
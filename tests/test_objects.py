@@ -0,0 +1,106 @@
+# -*- coding: utf8 -*-
+import copy, pickle
+import pytest
+from pyethtools import Block, Transaction, Receipt, Log, Request, CallableTransport
+
+_hash = "0x" + "ab" * 32
+
+_tx = {
+    "hash": "0x" + "01" * 32, "blockHash": _hash, "blockNumber": "0x10d4f",
+    "transactionIndex": "0x0", "from": "0x" + "aa" * 20, "to": None,
+    "value": "0xde0b6b3a7640000", "gas": "0x5208", "gasPrice": "0x4a817c800",
+    "nonce": "0x0", "input": "0x", "type": "0x3", "v": "0x1", "r": "0x" + "11" * 32,
+    "s": "0x" + "22" * 32, "accessList": [{"address": "0x" + "bb" * 20, "storageKeys": []}],
+    "blobVersionedHashes": ["0x01" + "33" * 31],
+    "sourceHash": "0x" + "44" * 32,
+}
+
+_log = {
+    "address": "0x" + "cc" * 20, "topics": ["0x" + "dd" * 32, "0x" + "ee" * 32],
+    "data": "0x" + "ff" * 64, "blockNumber": "0x10d4f", "blockHash": _hash,
+    "transactionHash": _tx["hash"], "transactionIndex": "0x0", "logIndex": "0x1",
+    "removed": False,
+}
+
+_receipt = {
+    "transactionHash": _tx["hash"], "transactionIndex": "0x0", "blockHash": _hash,
+    "blockNumber": "0x10d4f", "from": _tx["from"], "to": None,
+    "contractAddress": "0x" + "12" * 20, "cumulativeGasUsed": "0x5208",
+    "gasUsed": "0x5208", "effectiveGasPrice": "0x4a817c800", "logs": [_log],
+    "logsBloom": "0x" + "00" * 256, "type": "0x2", "status": "0x1",
+}
+
+def _block(transactions):
+    return {"number": "0x10d4f", "hash": _hash, "parentHash": "0x" + "cd" * 32,
+            "miner": "0x" + "aa" * 20, "extraData": "0x", "gasLimit": "0x1c9c380",
+            "timestamp": "0x5f5e100", "baseFeePerGas": "0x7", "withdrawals": [],
+            "transactions": transactions, "uncles": []}
+
+def test_fields_are_converted_on_first_access():
+    tx = Transaction(_tx)
+    assert tx._value == "0xde0b6b3a7640000"
+    assert tx.value == 10**18
+    assert tx._value == 10**18
+    assert tx.from_ == b"\xaa" * 20 and tx.input == b""
+    assert tx.to is None and tx.maxFeePerGas is None
+    assert tx.accessList == _tx["accessList"]
+    assert tx.blobVersionedHashes == [b"\x01" + b"\x33" * 31]
+    assert tx.extra == {"sourceHash": _tx["sourceHash"]}
+
+def test_nested_objects():
+    receipt = Receipt(_receipt)
+    assert isinstance(receipt.logs[0], Log)
+    assert receipt.logs[0].topics == [b"\xdd" * 32, b"\xee" * 32]
+    assert receipt.logs[0].removed is False
+    block = Block(_block([_tx]))
+    assert isinstance(block.transactions[0], Transaction)
+    assert block.transactions[0].gas == 21000
+    hashes = Block(_block([_tx["hash"]]))
+    assert hashes.transactions == [b"\x01" * 32] and hashes.uncles == []
+
+@pytest.mark.parametrize("objtype,data", [
+    (Transaction, _tx), (Log, _log), (Receipt, _receipt),
+    (Block, _block([_tx])), (Block, _block([_tx["hash"]])),
+])
+def test_toDict_roundtrip(objtype, data):
+    assert objtype(data).toDict() == data
+    obj = objtype(data)
+    # Converted fields are encoded back to the node format
+    for key, name, kind in objtype._fields:
+        getattr(obj, name)
+    if isinstance(obj, (Block, Receipt)):
+        for item in obj.transactions if isinstance(obj, Block) else obj.logs:
+            if not isinstance(item, bytes):
+                for key, name, kind in type(item)._fields:
+                    getattr(item, name)
+    assert obj.toDict() == data
+    assert obj == objtype(data)
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickling(protocol):
+    block = Block(_block([_tx]))
+    block.number
+    copied = pickle.loads(pickle.dumps(block, protocol))
+    assert copied == block and copied is not block
+    assert copied.number == 0x10d4f and copied.transactions[0].value == 10**18
+    receipt = pickle.loads(pickle.dumps(Receipt(_receipt), protocol))
+    assert receipt.logs[0].data == b"\xff" * 64
+    assert copy.deepcopy(Log(_log)) == Log(_log)
+
+def test_records_have_no_dict():
+    with pytest.raises(AttributeError):
+        Log(_log).__dict__
+    with pytest.raises(AttributeError):
+        Log(_log).unknown = 1
+
+def test_client_returns_objects():
+    def handle(request):
+        method = request["method"]
+        result = {"eth_getTransactionByHash": _tx, "eth_getTransactionReceipt": _receipt,
+                  "eth_getLogs": [_log]}.get(method, _block([_tx]))
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+    r = Request("stub", 0, transport=CallableTransport(handle), objects=True)
+    assert r.eth_getBlockByNumber(1, True).transactions[0].nonce == 0
+    assert isinstance(r.eth_getTransactionByHash(_tx["hash"]), Transaction)
+    assert r.eth_getTransactionReceipt(_tx["hash"]).status == 1
+    assert [log.logIndex for log in r.eth_getLogs({})] == [1]
@@ -0,0 +1,109 @@
+# -*- coding: utf8 -*-
+import pytest
+from pyethtools import (Request, CallableTransport, ReceiptWaiter, RequestCache,
+                        EthConnectionError)
+
+class _Node(object):
+    "Node mining transactions into blocks of a single block filter."
+    def __init__(self):
+        self.down = False
+        self.head = 100
+        self.reported = 100
+        self.mined = {}
+
+    def mine(self, txhash=None):
+        self.head += 1
+        if txhash is not None:
+            self.mined[txhash] = self.head
+
+    def handle(self, request):
+        if self.down:
+            raise EthConnectionError("stub", 0)
+        if isinstance(request, list):
+            return [self.handle1(r) for r in request]
+        return self.handle1(request)
+
+    def handle1(self, r):
+        method, params = r["method"], r["params"]
+        result = None
+        if method == "eth_newBlockFilter":
+            result = "0x1"
+        elif method == "eth_uninstallFilter":
+            result = True
+        elif method == "eth_getFilterChanges":
+            result = ["0x%064x" % n for n in range(self.reported + 1, self.head + 1)]
+            self.reported = self.head
+        elif method == "eth_blockNumber":
+            result = hex(self.head)
+        elif method == "eth_getTransactionReceipt" and params[0] in self.mined:
+            number = self.mined[params[0]]
+            result = {"transactionHash": params[0], "blockNumber": hex(number),
+                      "blockHash": "0x%064x" % number}
+        return {"jsonrpc": "2.0", "id": r["id"], "result": result}
+
+def _waiter(node, cache=None, **params):
+    client = Request("stub", 0, cache=cache, transport=CallableTransport(node.handle))
+    return ReceiptWaiter(client, mininterval=0.01, maxinterval=0.02, **params)
+
+def test_receipt_is_confirmed_after_transient_failure():
+    node = _Node()
+    w = _waiter(node, retries=3)
+    future = w.add("0x01")
+    w.poll()
+    node.down = True
+    w.poll()
+    assert isinstance(w.error, EthConnectionError) and not future.done()
+    node.down = False
+    node.mine("0x01")
+    assert w.poll() == 1
+    assert future.result()["blockNumber"] == hex(101) and w.error is None
+
+def test_futures_fail_after_retries():
+    node = _Node()
+    w = _waiter(node, retries=2)
+    future = w.add("0x01")
+    node.down = True
+    w.poll()
+    assert not future.done()
+    w.poll()
+    with pytest.raises(EthConnectionError):
+        future.result(timeout=0)
+    assert list(w.iterReceipts()) == [("0x01", None)]
+
+def test_background_polling_fails_futures_after_retries():
+    node = _Node()
+    node.down = True
+    w = _waiter(node, retries=2)
+    future = w.add("0x01")
+    w.start()
+    try:
+        with pytest.raises(EthConnectionError):
+            future.result(timeout=2)
+    finally:
+        w.stop()
+
+@pytest.mark.parametrize("cache", [None, RequestCache()])
+def test_receipt_moved_by_reorganization_is_followed(cache):
+    node = _Node()
+    w = _waiter(node, cache=cache, confirmations=3)
+    future = w.add("0x01")
+    node.mine("0x01")
+    node.mine()
+    w.poll()
+    # Two confirmations of block 101 are not enough
+    assert not future.done()
+    # Reorganization replaces block 101 and moves the transaction to 104
+    node.head = 104
+    node.mined["0x01"] = 104
+    w.poll()
+    assert not future.done()
+    node.mine()
+    w.poll()
+    assert not future.done()
+    node.mine()
+    assert w.poll() == 1
+    assert future.result()["blockNumber"] == hex(104)
+
+def test_cache_shallower_than_confirmations_is_refused():
+    with pytest.raises(AssertionError):
+        _waiter(_Node(), cache=RequestCache(depth=2), confirmations=3)
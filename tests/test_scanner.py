@@ -0,0 +1,56 @@
+# -*- coding: utf8 -*-
+import pytest
+from pyethtools import (Request, CallableTransport, LogScanner, EthError,
+                        EthConnectionError, EthTimeoutError)
+
+def _client(message, limit):
+    """Client of a node failing 'eth_getLogs' of more than 'limit' blocks
+    with the error message, or raising the given exception."""
+    calls = []
+    def handle(request):
+        if isinstance(request, list):
+            return [handle(r) for r in request]
+        first, last = [int(request["params"][0][k], 16) for k in ("fromBlock", "toBlock")]
+        calls.append((first, last))
+        if last - first + 1 > limit and isinstance(message, Exception):
+            raise message
+        if last - first + 1 > limit:
+            return {"jsonrpc": "2.0", "id": request["id"],
+                    "error": {"code": -32005, "message": message}}
+        logs = [{"blockNumber": hex(n), "logIndex": "0x0"} for n in range(first, last + 1)]
+        return {"jsonrpc": "2.0", "id": request["id"], "result": logs}
+    return Request("stub", 0, transport=CallableTransport(handle)), calls
+
+@pytest.mark.parametrize("message", [
+    "query returned more than 10000 results",
+    "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range",
+    "block range is too wide",
+    "exceed maximum block range: 5000",
+])
+def test_limit_errors_are_bisected(message):
+    client, calls = _client(message, 4)
+    logs = list(LogScanner(client, {}, chunk=16, concurrency=2).scan(0, 31))
+    assert [int(log["blockNumber"], 16) for log in logs] == list(range(32))
+    assert len(calls) > 2
+
+@pytest.mark.parametrize("message", ["unauthorized", "invalid topic", "rate limit reached"])
+def test_other_errors_are_raised_at_once(message):
+    client, calls = _client(message, 4)
+    scanner = LogScanner(client, {}, chunk=16, concurrency=1)
+    with pytest.raises(EthError) as e:
+        list(scanner.scan(0, 15))
+    assert e.value.message == message
+    assert calls == [(0, 15)]
+
+def test_timed_out_ranges_are_bisected():
+    client, calls = _client(EthTimeoutError("stub", 0), 4)
+    logs = list(LogScanner(client, {}, chunk=16, concurrency=1).scan(0, 15))
+    assert [int(log["blockNumber"], 16) for log in logs] == list(range(16))
+    assert calls[:3] == [(0, 15), (0, 7), (0, 3)]
+
+def test_refused_connection_is_raised_at_once():
+    client, calls = _client(EthConnectionError("stub", 0), 4)
+    with pytest.raises(EthConnectionError) as e:
+        list(LogScanner(client, {}, chunk=16, concurrency=1).scan(0, 15))
+    assert not isinstance(e.value, EthTimeoutError)
+    assert calls == [(0, 15)]
@@ -0,0 +1,142 @@
+# -*- coding: utf8 -*-
+import threading
+import pytest
+from pyethtools import (Request, CallableTransport, NonceManager, TransactionPipeline,
+                        EthConnectionError)
+
+_sender = "0x" + "aa" * 20
+
+class _Node(object):
+    """Node accepting transactions of any nonce not used yet, transactions
+    above the pending count wait in the pool until the gap is filled."""
+    def __init__(self, count=0):
+        self.count = count
+        self.pool = set()
+        self.accepted = []
+        self.down = False
+        # Number of calls of 'eth_sendTransaction' until the node goes down
+        self.downAfter = None
+
+    def handle(self, request):
+        if self.down:
+            raise EthConnectionError("stub", 0)
+        if isinstance(request, list):
+            if any(r["method"] == "eth_sendTransaction" for r in request) and \
+                    self.downAfter is not None:
+                if self.downAfter == 0:
+                    raise EthConnectionError("stub", 0)
+                self.downAfter -= 1
+            return [self.handle1(r) for r in request]
+        return self.handle1(request)
+
+    def _error(self, r, message):
+        return {"jsonrpc": "2.0", "id": r["id"], "error": {"code": -32000, "message": message}}
+
+    def handle1(self, r):
+        method, params = r["method"], r["params"]
+        if method == "eth_getTransactionCount":
+            result = hex(self.count)
+        elif method == "eth_sendTransaction":
+            tx = params[0]
+            nonce = int(tx["nonce"], 16)
+            if tx.get("value") == "0xbad":
+                return self._error(r, "insufficient funds for gas * price + value")
+            if nonce < self.count or nonce in self.pool:
+                return self._error(r, "nonce too low")
+            self.pool.add(nonce)
+            while self.count in self.pool:
+                self.pool.discard(self.count)
+                self.count += 1
+            self.accepted.append(nonce)
+            result = "0x%064x" % nonce
+        else:
+            result = None
+        return {"jsonrpc": "2.0", "id": r["id"], "result": result}
+
+def _pipeline(node, **params):
+    client = Request("stub", 0, transport=CallableTransport(node.handle))
+    return TransactionPipeline(client, **params)
+
+def _txs(count, **fields):
+    return [dict({"from": _sender, "to": "0x" + "bb" * 20, "value": hex(i + 1)}, **fields)
+            for i in range(count)]
+
+def test_nonces_are_contiguous():
+    node = _Node(count=7)
+    p = _pipeline(node, batchsize=3, concurrency=3)
+    statuses = p.send(_txs(20))
+    assert [s.state for s in statuses] == ["sent"] * 20
+    assert sorted(s.nonce for s in statuses) == list(range(7, 27))
+    assert node.count == 27 and not node.pool and not p.gaps
+
+def test_nonce_too_low_resyncs():
+    node = _Node(count=5)
+    p = _pipeline(node, batchsize=10, concurrency=1)
+    # Nonces counted locally are behind the node, e.g. sent by another client
+    p._nonces.set(_sender, 3)
+    statuses = p.send(_txs(4))
+    assert [s.state for s in statuses] == ["sent"] * 4
+    assert sorted(s.nonce for s in statuses) == [5, 6, 7, 8]
+    assert [s.attempts for s in statuses] == [2, 2, 1, 1]
+    assert node.count == 9 and not p.gaps
+
+def test_gaps_are_reported_without_filling():
+    node = _Node()
+    p = _pipeline(node, batchsize=10, concurrency=1)
+    txs = _txs(3)
+    txs[1]["value"] = "0xbad"
+    statuses = p.send(txs)
+    assert [s.state for s in statuses] == ["sent", "failed", "sent"]
+    assert p.gaps == [(_sender, 1)] and p.fillers == []
+    # Transaction above the gap waits in the pool of the node
+    assert node.count == 1 and node.pool == set([2])
+    assert p._nonces.get(_sender) == 3
+
+def test_gaps_are_filled():
+    node = _Node()
+    p = _pipeline(node, batchsize=10, concurrency=1, fillGaps=True)
+    txs = _txs(3)
+    txs[1]["value"] = "0xbad"
+    p.send(txs)
+    assert p.gaps == [(_sender, 1)]
+    assert [(f.state, f.nonce, f.tx["to"], f.tx["value"]) for f in p.fillers] == \
+        [("sent", 1, _sender, "0x0")]
+    assert node.count == 3 and not node.pool
+
+def test_connection_failure_mid_batch():
+    node = _Node()
+    node.downAfter = 1
+    p = _pipeline(node, batchsize=2, concurrency=1)
+    statuses = p.send(_txs(4))
+    assert [s.state for s in statuses] == ["sent", "sent", "failed", "failed"]
+    assert all(isinstance(s.error, EthConnectionError) for s in statuses[2:])
+    # Nonces of the failed batch are resynced from the node
+    node.downAfter = None
+    statuses = p.send(_txs(1))
+    assert statuses[0].state == "sent" and statuses[0].nonce == 2
+
+def test_unknown_nonce_fails_transactions():
+    node = _Node()
+    nonces = NonceManager(Request("stub", 0, transport=CallableTransport(node.handle)))
+    nonces.load = lambda senders: None
+    p = _pipeline(node, nonces=nonces)
+    node.down = True
+    statuses = p.send(_txs(2))
+    assert [s.state for s in statuses] == ["failed", "failed"]
+    assert all(isinstance(s.error, EthConnectionError) for s in statuses)
+    assert not p._queued
+
+def test_unexpected_worker_error_does_not_hang():
+    node = _Node()
+    p = _pipeline(node, batchsize=2, concurrency=2)
+    def execute(batch):
+        raise RuntimeError("broken client")
+    p._execute = execute
+    done = []
+    thread = threading.Thread(target=lambda: done.append(p.send(_txs(3))))
+    thread.daemon = True
+    thread.start()
+    thread.join(5)
+    assert done, "flush is hung"
+    assert [s.state for s in done[0]] == ["failed"] * 3
+    assert all(isinstance(s.error, RuntimeError) for s in done[0])
@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+import json, socket, threading
+import pytest
+from pyethtools import Request, PipelineFanout, IPCTransport
+from pyethtools.transport import _JSONFramer, _IPCConnection
+
+_documents = [
+    {"jsonrpc": "2.0", "id": 1, "result": "0x1"},
+    [{"id": 2, "result": {"a": [1, {"b": "}]"}]}}, {"id": 3, "result": None}],
+    {"id": 4, "result": "quote \" and \\ backslash {["},
+    {"id": 5, "result": u"utf8 заза"},
+]
+_stream = b"".join(json.dumps(d, ensure_ascii=False).encode("utf8") + b"\n " for d in _documents)
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64, len(_stream)])
+def test_framer_splits_any_chunking(chunk):
+    framer = _JSONFramer()
+    documents = []
+    for i in range(0, len(_stream), chunk):
+        documents.extend(framer.feed(_stream[i:i+chunk]))
+    assert [json.loads(d.decode("utf8")) for d in documents] == _documents
+
+def test_framer_reports_ends_without_keeping():
+    framer = _JSONFramer(keep=False)
+    ends = []
+    for i in range(0, len(_stream), 5):
+        ends.extend(framer.feed(_stream[i:i+5]))
+    assert ends == [None] * len(_documents) and not framer._buff
+
+def test_framer_rejects_garbage():
+    with pytest.raises(ValueError):
+        _JSONFramer().feed(b'  x{"id": 1}')
+
+class _PairTransport(IPCTransport):
+    "IPC transport connected to the node stand-in by socket.socketpair()."
+    def __init__(self, node):
+        super(_PairTransport, self).__init__("socketpair", timeout=5)
+        self._node = node
+
+    def _connect(self):
+        return _IPCConnection(self._node.connect(), self._timeout)
+
+class _Node(object):
+    """Node stand-in answering batches in reverse order and writing the
+    responses in chunks of 3 bytes."""
+    def __init__(self):
+        self._threads = []
+
+    def connect(self):
+        client, server = socket.socketpair()
+        thread = threading.Thread(target=self._serve, args=(server,))
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+        return client
+
+    def _serve(self, sock):
+        framer = _JSONFramer()
+        pending = []
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                sock.close()
+                return
+            for document in framer.feed(data):
+                pending.append(json.loads(document.decode("utf8")))
+            if len(pending) < 3 and pending[0]["method"] == "eth_getBalance":
+                continue
+            out = b"".join(json.dumps({"jsonrpc": "2.0", "id": r["id"],
+                                       "result": r["params"] or "0x10"}).encode("utf8") + b"\n"
+                           for r in reversed(pending))
+            pending = []
+            for i in range(0, len(out), 3):
+                sock.sendall(out[i:i+3])
+
+def test_ipc_send_and_stream_over_socketpair():
+    r = Request("socketpair", None, transport=_PairTransport(_Node()))
+    assert r.eth_blockNumber == 0x10
+    assert list(r.iterLogs({"fromBlock": "0x1"})) == [{"fromBlock": "0x1"}]
+    assert r.eth_blockNumber == 0x10
+    r.close()
+
+def test_pipelined_responses_matched_by_id():
+    r = Request("socketpair", None, transport=_PairTransport(_Node()))
+    calls = [("eth_getBalance", ["0x%02x" % i]) for i in range(3)]
+    with PipelineFanout(r, 3) as fan:
+        assert list(fan.run(calls)) == [["0x00"], ["0x01"], ["0x02"]]
@@ -0,0 +1,437 @@
+# -*- coding: utf8 -*-
+import re, select, socket, json, collections
+import pycurl
+try:
+    # Python3
+    from io import BytesIO
+except ImportError:
+    # Python 2
+    from StringIO import StringIO as BytesIO
+
+class EthConnectionError(Exception):
+    def __init__(self, *args, **kwargs):
+        reason = kwargs.get("reason", "Connection refused")
+        if len(args) == 1:
+            message = "Failed to connect to %s: %s" % (args[0], reason)
+        else:
+            message = "Failed to connect to %s port %s: %s" % (args[0], args[1], reason)
+        super(EthConnectionError, self).__init__(message)
+
+class EthTimeoutError(EthConnectionError):
+    """The node did not respond within the timeout, e.g. to a call too
+    heavy for it."""
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("reason", "Timed out")
+        super(EthTimeoutError, self).__init__(*args, **kwargs)
+
+def _curlError(host, port, code):
+    "Returns EthConnectionError of the failed curl transfer."
+    if code == pycurl.E_OPERATION_TIMEDOUT:
+        return EthTimeoutError(host, port)
+    return EthConnectionError(host, port)
+
+class Transport(object):
+    """Base of transports delivering JSON-RPC request bodies to the node.
+    Subclasses implement 'send', and may implement 'open' for pipelined
+    calls and 'close'."""
+    def send(self, postfields):
+        """Returns body of the node response in bytes.
+        Raises EthConnectionError if the node is unreachable.
+        Parameters:
+        1. String|Bytes - JSON encoded request or batch of them."""
+        raise NotImplementedError
+
+    def stream(self, postfields):
+        """Generator of chunks of the response body in bytes as they are
+        received. Base transport yields the whole body at once."""
+        yield self.send(postfields)
+
+    def open(self):
+        """Returns channel of pipelined calls with 'write(postfields)',
+        'read(timeout)' returning list of response bodies available within
+        the timeout, and 'close()'. Base channel sends calls one by one."""
+        return _SerialChannel(self)
+
+    def close(self):
+        "Releases connections to the node."
+
+class _SerialChannel(object):
+    def __init__(self, transport):
+        self._transport = transport
+        self._bodies = collections.deque()
+
+    def write(self, postfields):
+        self._bodies.append(self._transport.send(postfields))
+
+    def read(self, timeout=None):
+        bodies = list(self._bodies)
+        self._bodies.clear()
+        return bodies
+
+    def close(self):
+        self._bodies.clear()
+
+class HTTPTransport(Transport):
+    """HTTP transport on top of pycurl. Connections are kept alive between
+    the calls in a pool, one per concurrent thread.
+    Parameters:
+    1. String - node host, e.g. 'http://localhost'.
+    2. Number - node port.
+    3. Number - (optional) total timeout of a single call in seconds.
+    4. Number - (optional) timeout of connection phase in seconds."""
+    _headers = [
+        'Accept: application/json',
+        'Content-Type: application/json',
+        'Connection: keep-alive',
+        # Disables "Expect: 100-continue" round trip on large POST bodies
+        'Expect:',
+        ]
+
+    def __init__(self, host, port, timeout=None, connecttimeout=None):
+        self._url = "%s:%s" % (host, port)
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+        self._connecttimeout = connecttimeout
+        # Free (curl, buffer) pairs, list.pop and list.append are atomic
+        self._pool = []
+
+    def close(self):
+        while self._pool:
+            self._pool.pop()[0].close()
+
+    def _setupCurl(self, curl):
+        curl.setopt(pycurl.URL, self._url)
+        curl.setopt(pycurl.HTTPHEADER, self._headers)
+        # Sets request method to POST
+        curl.setopt(pycurl.POST, 1)
+        curl.setopt(pycurl.TCP_KEEPALIVE, 1)
+        curl.setopt(pycurl.TCP_NODELAY, 1)
+        curl.setopt(pycurl.NOSIGNAL, 1)
+        if self._timeout is not None:
+            curl.setopt(pycurl.TIMEOUT_MS, int(self._timeout * 1000))
+        if self._connecttimeout is not None:
+            curl.setopt(pycurl.CONNECTTIMEOUT_MS, int(self._connecttimeout * 1000))
+        return curl
+
+    def _acquireCurl(self):
+        try:
+            return self._pool.pop()
+        except IndexError:
+            buff = BytesIO()
+            curl = self._setupCurl(pycurl.Curl())
+            curl.setopt(pycurl.WRITEDATA, buff)
+            return curl, buff
+
+    def send(self, postfields):
+        curl, buff = self._acquireCurl()
+        buff.seek(0)
+        buff.truncate(0)
+        curl.setopt(pycurl.POSTFIELDS, postfields)
+        try:
+            curl.perform()
+        except pycurl.error as exc:
+            # Connection state is unknown, next call reconnects
+            curl.close()
+            raise _curlError(self._host, self._port, exc.args[0])
+        body = buff.getvalue()
+        self._pool.append((curl, buff))
+        return body
+
+    def stream(self, postfields):
+        curl, buff = self._acquireCurl()
+        chunks = collections.deque()
+        curl.setopt(pycurl.POSTFIELDS, postfields)
+        curl.setopt(pycurl.WRITEFUNCTION, chunks.append)
+        # Multi interface returns control between received chunks
+        multi = pycurl.CurlMulti()
+        multi.add_handle(curl)
+        finished = False
+        try:
+            while True:
+                while multi.perform()[0] == pycurl.E_CALL_MULTI_PERFORM:
+                    pass
+                queued, ok, failed = multi.info_read()
+                while chunks:
+                    yield chunks.popleft()
+                if failed:
+                    raise _curlError(self._host, self._port, failed[0][1])
+                if ok:
+                    break
+                multi.select(1.0)
+            finished = True
+        finally:
+            multi.remove_handle(curl)
+            multi.close()
+            if finished:
+                curl.setopt(pycurl.WRITEDATA, buff)
+                self._pool.append((curl, buff))
+            else:
+                # Response is not read to the end, connection is unusable
+                curl.close()
+
+class _JSONFramer(object):
+    """Splits stream of concatenated JSON objects and arrays into separate
+    documents. Only brackets and strings are scanned, every byte is scanned
+    once however the stream is chunked. If 'keep' is false the scanned bytes
+    are dropped and only ends of documents are reported, as None."""
+    _outside = re.compile(b'[{}\\[\\]"]')
+    _inside = re.compile(b'["\\\\]')
+    _space = b' \t\r\n'
+
+    def __init__(self, keep=True):
+        self._keep = keep
+        self._buff = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._instring = False
+
+    def feed(self, data):
+        "Returns list of documents completed by the given bytes."
+        buff = self._buff
+        buff.extend(data)
+        documents = []
+        pos = self._pos
+        while True:
+            if self._instring:
+                match = self._inside.search(buff, pos)
+                if match is None:
+                    pos = len(buff)
+                    break
+                pos = match.end()
+                if match.group() == b'\\':
+                    if pos == len(buff):
+                        pos -= 1
+                        break
+                    pos += 1
+                else:
+                    self._instring = False
+                continue
+            if not self._depth:
+                # Skips whitespace between documents
+                start = pos
+                while start < len(buff) and buff[start:start + 1] in self._space:
+                    start += 1
+                del buff[:start]
+                pos = 0
+                if not buff:
+                    break
+                if buff[:1] not in (b'{', b'['):
+                    raise ValueError("Invalid JSON-RPC message: %r" % bytes(buff[:100]))
+            match = self._outside.search(buff, pos)
+            if match is None:
+                pos = len(buff)
+                break
+            pos = match.end()
+            symbol = match.group()
+            if symbol == b'"':
+                self._instring = True
+            elif symbol in (b'{', b'['):
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if not self._depth:
+                    documents.append(bytes(buff[:pos]) if self._keep else None)
+                    del buff[:pos]
+                    pos = 0
+        if not self._keep:
+            del buff[:pos]
+            pos = 0
+        self._pos = pos
+        return documents
+
+class _IPCConnection(object):
+    # Connected socket may be given in place of the path, e.g. an end of
+    # socket.socketpair()
+    def __init__(self, path, timeout=None, connecttimeout=None):
+        self._timeout = timeout
+        self._framer = _JSONFramer()
+        self._documents = collections.deque()
+        if isinstance(path, socket.socket):
+            self._socket = path
+            self._socket.settimeout(timeout)
+            return
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.settimeout(connecttimeout)
+            self._socket.connect(path)
+            self._socket.settimeout(timeout)
+        except:
+            self._socket.close()
+            raise
+
+    def write(self, postfields):
+        if not isinstance(postfields, bytes):
+            postfields = postfields.encode('utf-8')
+        self._socket.sendall(postfields)
+
+    def _receive(self):
+        data = self._socket.recv(65536)
+        if not data:
+            raise EOFError("Connection closed by the node")
+        self._documents.extend(self._framer.feed(data))
+
+    def readOne(self):
+        while not self._documents:
+            self._receive()
+        return self._documents.popleft()
+
+    def stream(self):
+        "Generator of chunks of the next response as they are received."
+        assert not self._documents, "Pipelined responses are pending"
+        ends = _JSONFramer(keep=False)
+        while True:
+            data = self._socket.recv(65536)
+            if not data:
+                raise EOFError("Connection closed by the node")
+            finished = ends.feed(data)
+            yield data
+            if finished:
+                return
+
+    def read(self, timeout=None):
+        if not self._documents:
+            readable = select.select([self._socket], [], [], timeout)[0]
+            if readable:
+                self._receive()
+                while select.select([self._socket], [], [], 0)[0]:
+                    self._receive()
+        documents = list(self._documents)
+        self._documents.clear()
+        return documents
+
+    def close(self):
+        self._socket.close()
+
+class _IPCChannel(object):
+    def __init__(self, transport):
+        self._transport = transport
+        self._connection = None
+
+    def write(self, postfields):
+        transport = self._transport
+        try:
+            if self._connection is None:
+                self._connection = transport._connect()
+            self._connection.write(postfields)
+        except (socket.error, EOFError):
+            self.close()
+            raise EthConnectionError(transport._path)
+
+    def read(self, timeout=None):
+        if self._connection is None:
+            return []
+        try:
+            return self._connection.read(timeout)
+        except (socket.error, EOFError, ValueError):
+            self.close()
+            raise EthConnectionError(self._transport._path)
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class IPCTransport(Transport):
+    """Unix domain socket transport of the node IPC endpoint, e.g.
+    '~/.ethereum/geth.ipc'. Messages are framed by JSON itself. Connections
+    are kept in a pool, one per concurrent thread, and 'open' returns a
+    dedicated connection where calls are pipelined, i.e. written without
+    waiting for responses of the previous ones.
+    Parameters:
+    1. String - path of the socket.
+    2. Number - (optional) timeout of a single read in seconds.
+    3. Number - (optional) timeout of connection phase in seconds."""
+    def __init__(self, path, timeout=None, connecttimeout=None):
+        self._path = path
+        self._timeout = timeout
+        self._connecttimeout = connecttimeout
+        self._pool = []
+
+    def close(self):
+        while self._pool:
+            self._pool.pop().close()
+
+    def _connect(self):
+        return _IPCConnection(self._path, self._timeout, self._connecttimeout)
+
+    def send(self, postfields):
+        try:
+            connection = self._pool.pop()
+            reused = True
+        except IndexError:
+            connection = None
+        try:
+            if connection is None:
+                reused = False
+                connection = self._connect()
+            try:
+                connection.write(postfields)
+                body = connection.readOne()
+            except (socket.error, EOFError) as exc:
+                connection.close()
+                if not reused or isinstance(exc, socket.timeout):
+                    raise
+                # Node closed kept alive connection, sends on the new one
+                connection = self._connect()
+                connection.write(postfields)
+                body = connection.readOne()
+        except (socket.error, EOFError, ValueError) as exc:
+            if connection is not None:
+                connection.close()
+            if isinstance(exc, socket.timeout):
+                raise EthTimeoutError(self._path)
+            raise EthConnectionError(self._path)
+        self._pool.append(connection)
+        return body
+
+    def stream(self, postfields):
+        try:
+            connection = self._pool.pop()
+        except IndexError:
+            connection = None
+        finished = False
+        try:
+            if connection is None:
+                connection = self._connect()
+            connection.write(postfields)
+            for chunk in connection.stream():
+                yield chunk
+            finished = True
+        except (socket.error, EOFError, ValueError) as exc:
+            if isinstance(exc, socket.timeout):
+                raise EthTimeoutError(self._path)
+            raise EthConnectionError(self._path)
+        finally:
+            if finished:
+                self._pool.append(connection)
+            elif connection is not None:
+                # Response is not read to the end, connection is unusable
+                connection.close()
+
+    def open(self):
+        return _IPCChannel(self)
+
+class CallableTransport(Transport):
+    """In-process transport passing calls to the given function, e.g. an
+    embedded node or a test double. Requests and responses are encoded to
+    JSON and back, so the function gets and returns plain JSON values.
+    Parameters:
+    1. Function - handler(request) returning the response, the request is
+    a JSON-RPC object or a list of them for batches."""
+    def __init__(self, handler):
+        self._handler = handler
+
+    def send(self, postfields):
+        if isinstance(postfields, bytes):
+            postfields = postfields.decode('utf-8')
+        response = self._handler(json.loads(postfields))
+        return json.dumps(response).encode('utf-8')
+
+def _toTransport(host, port, timeout=None, connecttimeout=None):
+    "Returns transport of the given address, IPC for 'ipc://' or '.ipc' paths."
+    if host.startswith("ipc://"):
+        return IPCTransport(host[len("ipc://"):], timeout, connecttimeout)
+    elif host.endswith(".ipc"):
+        return IPCTransport(host, timeout, connecttimeout)
+    return HTTPTransport(host, port, timeout, connecttimeout)